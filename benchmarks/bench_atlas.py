@@ -0,0 +1,52 @@
+# /// script
+# requires-python = ">=3.11"
+# dependencies = [
+#     "numpy",
+#     "pillow",
+# ]
+# ///
+
+import os
+import sys
+import time
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from fpga_renderer.atlas import pack_atlas
+
+# ==============================================================================
+# 1. CONFIGURATION
+# ==============================================================================
+# Material counts to pack; a quarter of each set are solid colors, an eighth repeats
+MATERIAL_COUNTS = [4, 16, 64, 256]
+TEXTURE_SIZE = 64
+GUTTER = 1
+SEED = 0
+
+# ==============================================================================
+# 2. HELPERS
+# ==============================================================================
+def random_textures(count, rng):
+    textures = []
+    for i in range(count):
+        if i % 4 == 3:
+            textures.append(np.full((8, 8, 3), rng.integers(0, 256, 3), dtype=np.uint8))
+        else:
+            h, w = rng.integers(4, 65, 2)
+            textures.append(rng.integers(0, 256, (h, w, 3), dtype=np.uint8))
+    repeats = [textures[int(j)] for j in rng.integers(0, count, count // 8)]
+    return textures + repeats
+
+# ==============================================================================
+# MAIN
+# ==============================================================================
+if __name__ == "__main__":
+    rng = np.random.default_rng(SEED)
+    print(f"{'Textures':>9} {'Tiles':>6} {'Scale':>6} {'Fill':>6} {'Time (ms)':>10}")
+    for count in MATERIAL_COUNTS:
+        textures = random_textures(count, rng)
+        t0 = time.perf_counter()
+        _, _, stats = pack_atlas(textures, size=TEXTURE_SIZE, gutter=GUTTER)
+        elapsed = time.perf_counter() - t0
+        print(f"{len(textures):>9} {stats['tiles']:>6} {stats['scale']:>6.2f} "
+              f"{100 * stats['fill']:>5.0f}% {1e3 * elapsed:>10.1f}")
@@ -0,0 +1,75 @@
+# /// script
+# requires-python = ">=3.11"
+# dependencies = [
+#     "numpy",
+# ]
+# ///
+
+import os
+import sys
+import time
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from fpga_renderer.decimate import decimate, faces_for_lines
+
+# ==============================================================================
+# 1. CONFIGURATION
+# ==============================================================================
+# UV spheres (latitude, longitude bands): ~1k, ~10k and ~100k faces
+SPHERES = [(20, 25), (64, 80), (200, 250)]
+MAX_BRAM_LINES = 1024
+
+# ==============================================================================
+# 2. HELPERS
+# ==============================================================================
+def uv_sphere(n_lat, n_lon):
+    """
+    Unit sphere with one UV seam (u = 0 / 1) and two materials split at the
+    equator. Returns positions, face_verts, face_uvs, face_mats.
+    """
+    theta = np.linspace(0.0, np.pi, n_lat + 1)
+    phi = np.linspace(0.0, 2.0 * np.pi, n_lon + 1)
+    t, p = np.meshgrid(theta, phi, indexing="ij")
+    grid = np.stack([np.sin(t) * np.cos(p), np.cos(t), np.sin(t) * np.sin(p)], axis=-1).reshape(-1, 3)
+
+    # Quads on the (lat, lon) grid; UV indices are grid indices
+    idx = np.arange(len(grid)).reshape(n_lat + 1, n_lon + 1)
+    a, b = idx[:-1, :-1].ravel(), idx[1:, :-1].ravel()
+    c, d = idx[1:, 1:].ravel(), idx[:-1, 1:].ravel()
+    face_uvs = np.concatenate([np.stack([a, b, c], axis=1), np.stack([a, c, d], axis=1)])
+
+    # Weld the seam column and the poles into shared positions
+    positions, first, weld = np.unique(np.round(grid, 9), axis=0, return_index=True, return_inverse=True)
+    face_verts = weld.ravel()[face_uvs]
+    ok = ((face_verts[:, 0] != face_verts[:, 1]) & (face_verts[:, 1] != face_verts[:, 2]) &
+          (face_verts[:, 2] != face_verts[:, 0]))
+    face_verts, face_uvs = face_verts[ok], face_uvs[ok]
+    face_mats = (grid[face_uvs].mean(axis=1)[:, 1] > 0).astype(np.int64)
+    return grid[first], face_verts, face_uvs, face_mats
+
+def seam_wedges(face_verts, face_uvs, face_mats):
+    """Vertices whose corners carry more than one (UV, material) pair."""
+    corners = np.stack([face_verts.ravel(), face_uvs.ravel(), np.repeat(face_mats, 3)], axis=1)
+    wedges = np.unique(corners, axis=0)
+    return int((np.bincount(wedges[:, 0]) > 1).sum())
+
+# ==============================================================================
+# MAIN
+# ==============================================================================
+if __name__ == "__main__":
+    target = faces_for_lines(MAX_BRAM_LINES)
+    print(f"Budget: {MAX_BRAM_LINES} lines = {target} triangles")
+    print(f"{'Faces in':>9} {'Faces out':>10} {'Seam verts':>11} {'Radius err':>11} {'Time (s)':>9}")
+
+    for n_lat, n_lon in SPHERES:
+        positions, face_verts, face_uvs, face_mats = uv_sphere(n_lat, n_lon)
+        t0 = time.perf_counter()
+        out = decimate(positions, face_verts, target, face_uvs=face_uvs, face_mats=face_mats)
+        elapsed = time.perf_counter() - t0
+
+        assert out['reached'], "decimation stopped above the budget"
+        # Half-edge collapses keep original vertices, so they all stay on the sphere
+        radius_err = np.abs(np.linalg.norm(out['positions'], axis=1) - 1.0).max()
+        seams = seam_wedges(out['face_verts'], out['face_uvs'], out['face_mats'])
+        print(f"{len(face_verts):>9} {len(out['face_verts']):>10} {seams:>11} {radius_err:>11.1e} {elapsed:>9.2f}")
@@ -0,0 +1,44 @@
+# /// script
+# requires-python = ">=3.11"
+# dependencies = [
+#     "numpy",
+# ]
+# ///
+
+import os
+import sys
+import tempfile
+import time
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from fpga_renderer.memimage import write_image, read_image
+
+# ==============================================================================
+# 1. CONFIGURATION
+# ==============================================================================
+# (width in bits, depth): texture ROM, frame buffer, vertex BRAM words
+IMAGES = [(12, 4096), (12, 76800), (32, 5120)]
+FORMATS = [".mem", ".coe", ".bin", ".hex"]
+SEED = 0
+
+# ==============================================================================
+# MAIN
+# ==============================================================================
+if __name__ == "__main__":
+    rng = np.random.default_rng(SEED)
+    print(f"{'Width':>6} {'Depth':>7} {'Format':>7} {'Bytes':>9} {'Write (ms)':>11} {'Read (ms)':>10}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for width, depth in IMAGES:
+            words = rng.integers(0, 1 << width, depth, dtype=np.uint64)
+            for ext in FORMATS:
+                path = os.path.join(tmp, "image" + ext)
+                t0 = time.perf_counter()
+                write_image(path, words, width)
+                written = time.perf_counter() - t0
+                t0 = time.perf_counter()
+                back = read_image(path, width=width)
+                read = time.perf_counter() - t0
+                assert np.array_equal(back, words), f"{ext} round trip failed"
+                print(f"{width:>6} {depth:>7} {ext:>7} {os.path.getsize(path):>9} "
+                      f"{1e3 * written:>11.1f} {1e3 * read:>10.1f}")
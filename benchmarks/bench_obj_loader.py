@@ -0,0 +1,131 @@
+# /// script
+# requires-python = ">=3.11"
+# dependencies = [
+#     "numpy",
+# ]
+# ///
+
+import os
+import sys
+import tempfile
+import time
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from fpga_renderer.obj_loader import load_obj
+
+# ==============================================================================
+# 1. CONFIGURATION
+# ==============================================================================
+REPO_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+BUNDLED_OBJS = [
+    os.path.join(REPO_DIR, "mariostar", "input", "star.obj"),
+    os.path.join(REPO_DIR, "starwing", "input", "B4BC 66001.obj"),
+]
+
+# Synthetic scans: the bundled star tiled until it reaches these face counts
+SYNTHETIC_FACES = [10_000, 100_000]
+REPEATS = 5
+
+# ==============================================================================
+# 2. REFERENCE (previous line-by-line parser from mariostar/starwing)
+# ==============================================================================
+def legacy_parse_obj(filepath):
+    vertices = []
+    tex_coords = []
+    faces = []
+    current_mat = None
+
+    with open(filepath, 'r') as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith('#'): continue
+
+            parts = line.split()
+            cmd = parts[0]
+
+            if cmd == 'v':
+                vertices.append([float(parts[1]), float(parts[2]), float(parts[3])])
+            elif cmd == 'vt':
+                tex_coords.append([float(parts[1]), float(parts[2])])
+            elif cmd == 'usemtl':
+                current_mat = parts[1]
+            elif cmd == 'f':
+                v_indices = []
+                vt_indices = []
+                for p in parts[1:]:
+                    vals = p.split('/')
+                    v_indices.append(int(vals[0]) - 1)
+                    if len(vals) > 1 and vals[1]:
+                        vt_indices.append(int(vals[1]) - 1)
+                    else:
+                        vt_indices.append(0)
+
+                if len(v_indices) == 3:
+                    faces.append({'verts': v_indices, 'uvs': vt_indices, 'mat': current_mat})
+                elif len(v_indices) == 4:
+                    faces.append({'verts': [v_indices[0], v_indices[1], v_indices[2]],
+                                  'uvs': [vt_indices[0], vt_indices[1], vt_indices[2]],
+                                  'mat': current_mat})
+                    faces.append({'verts': [v_indices[0], v_indices[2], v_indices[3]],
+                                  'uvs': [vt_indices[0], vt_indices[2], vt_indices[3]],
+                                  'mat': current_mat})
+
+    return np.array(vertices), np.array(tex_coords), faces
+
+# ==============================================================================
+# 3. HELPERS
+# ==============================================================================
+def write_tiled_obj(src_path, target_faces, out_path):
+    """Repeats the geometry of src_path (with shifted indices) until target_faces is reached."""
+    obj = load_obj(src_path)
+    pos, uvs, fv, fu = obj['positions'], obj['uvs'], obj['face_verts'], obj['face_uvs']
+    copies = max(1, target_faces // len(fv))
+
+    with open(out_path, 'w') as f:
+        f.write(f"# {copies} tiled copies of {os.path.basename(src_path)}\n")
+        for c in range(copies):
+            for x, y, z in pos + c * 0.01:
+                f.write(f"v {x:.6f} {y:.6f} {z:.6f}\n")
+            for u, v in uvs:
+                f.write(f"vt {u:.4f} {v:.4f}\n")
+            f.write(f"usemtl mat_{c % 4}\n")
+            for tri_v, tri_u in zip(fv + c * len(pos) + 1, fu + c * len(uvs) + 1):
+                f.write("f " + " ".join(f"{a}/{b}" for a, b in zip(tri_v, tri_u)) + "\n")
+    return copies * len(fv)
+
+def best_time(fn, path):
+    best = float("inf")
+    for _ in range(REPEATS):
+        t0 = time.perf_counter()
+        fn(path)
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+def check_same(path):
+    verts, uvs, faces = legacy_parse_obj(path)
+    obj = load_obj(path)
+    assert np.array_equal(verts, obj['positions'])
+    assert np.array_equal(uvs, obj['uvs'])
+    assert np.array_equal(np.array([f['verts'] for f in faces]), obj['face_verts'])
+
+def report(label, path, n_faces):
+    check_same(path)
+    t_old = best_time(legacy_parse_obj, path)
+    t_new = best_time(load_obj, path)
+    print(f"{label:<28} {n_faces:>8} {t_old * 1e3:>10.2f} {t_new * 1e3:>10.2f} {t_old / t_new:>8.1f}x")
+
+# ==============================================================================
+# MAIN
+# ==============================================================================
+if __name__ == "__main__":
+    print(f"{'Model':<28} {'Faces':>8} {'Old (ms)':>10} {'New (ms)':>10} {'Speedup':>9}")
+
+    for path in BUNDLED_OBJS:
+        report(os.path.basename(path), path, len(load_obj(path)['face_verts']))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for target in SYNTHETIC_FACES:
+            path = os.path.join(tmp, f"tiled_{target}.obj")
+            n_faces = write_tiled_obj(BUNDLED_OBJS[0], target, path)
+            report(f"star.obj tiled", path, n_faces)
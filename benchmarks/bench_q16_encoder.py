@@ -0,0 +1,82 @@
+# /// script
+# requires-python = ">=3.11"
+# dependencies = [
+#     "numpy",
+# ]
+# ///
+
+import os
+import sys
+import tempfile
+import time
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from fpga_renderer.encode import write_vertex_mem
+
+# ==============================================================================
+# 1. CONFIGURATION
+# ==============================================================================
+# Vertex counts (3 per triangle, 5 lines per vertex)
+VERTEX_COUNTS = [3_000, 30_000, 300_000]
+REPEATS = 3
+HEADER = "// Star Data\n// X, Y, Z, U, V (Q16.16)\n"
+
+# ==============================================================================
+# 2. REFERENCE (previous per-scalar writer from mariostar/starwing)
+# ==============================================================================
+def to_q16_16(val):
+    scaled = int(val * 65536.0)
+    if scaled < 0: scaled = (1 << 32) + scaled
+    return f"{scaled & 0xFFFFFFFF:08X}"
+
+def legacy_write(path, xyz, uv):
+    with open(path, 'w') as f:
+        f.write(HEADER)
+        for vert, (u, v) in zip(xyz, uv):
+            f.write(to_q16_16(vert[0]) + "\n") # X
+            f.write(to_q16_16(vert[1]) + "\n") # Y
+            f.write(to_q16_16(vert[2]) + "\n") # Z
+            f.write(to_q16_16(u) + "\n")       # U
+            f.write(to_q16_16(v) + "\n")       # V
+        f.write("// EOS\n")
+        f.write("FFFFFFFF\n" * 5)
+
+def bulk_write(path, xyz, uv):
+    write_vertex_mem(path, xyz, uv, header=HEADER)
+
+# ==============================================================================
+# 3. HELPERS
+# ==============================================================================
+def best_time(fn, *args):
+    best = float("inf")
+    for _ in range(REPEATS):
+        t0 = time.perf_counter()
+        fn(*args)
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+# ==============================================================================
+# MAIN
+# ==============================================================================
+if __name__ == "__main__":
+    rng = np.random.default_rng(0)
+    print(f"{'Vertices':>10} {'Lines':>10} {'Old lines/s':>14} {'New lines/s':>14} {'Speedup':>9}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        old_path = os.path.join(tmp, "old.mem")
+        new_path = os.path.join(tmp, "new.mem")
+
+        for n in VERTEX_COUNTS:
+            # Positions in the usual +-4 range, uvs in 0..1, plus exact edge values
+            xyz = rng.uniform(-4.0, 4.0, (n, 3))
+            uv = rng.uniform(0.0, 1.0, (n, 2))
+            xyz[:4, 0] = [-1.0, -1.5e-5, 0.0, 32767.99998]
+
+            t_old = best_time(legacy_write, old_path, xyz, uv)
+            t_new = best_time(bulk_write, new_path, xyz, uv)
+            with open(old_path, "rb") as a, open(new_path, "rb") as b:
+                assert a.read() == b.read(), "bulk encoder output differs"
+
+            lines = n * 5
+            print(f"{n:>10} {lines:>10} {lines / t_old:>14,.0f} {lines / t_new:>14,.0f} {t_old / t_new:>8.1f}x")
@@ -0,0 +1,295 @@
+# /// script
+# requires-python = ">=3.11"
+# dependencies = [
+#     "numpy",
+#     "pillow",
+# ]
+# ///
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import numpy as np
+from PIL import Image
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from fpga_renderer.build import load_generator
+from fpga_renderer.mesh import Mesh
+from fpga_renderer.encode import write_vertex_mem, write_texture_mem, vertex_words
+from fpga_renderer.mvp import mvp_table, format_verilog_array
+from fpga_renderer.preview import project_vertices, rasterize_zbuffered, rasterize_textured_triangles
+from fpga_renderer.geometry_model import load_mvp_lutram
+from fpga_renderer.raster_model import render_frame
+
+# ==============================================================================
+# 1. CONFIGURATION
+# ==============================================================================
+# Usage:
+#   python bench_suite.py --out baseline.json          # record
+#   python bench_suite.py --compare baseline.json      # exit 1 if any case lost > --threshold of its throughput
+# Results are keyed benchmark/dataset; throughput is items (triangles, texels, ...) per second.
+REPO_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+# name: (OBJ, flip_winding as the generator parses it)
+BUNDLED = {
+    "star": (os.path.join(REPO_DIR, "mariostar", "input", "star.obj"), False),
+    "arwing": (os.path.join(REPO_DIR, "starwing", "input", "B4BC 66001.obj"), True),
+}
+MARIOSTAR_GEN = os.path.join(REPO_DIR, "mariostar", "gen.py")
+
+# Synthetic grid meshes (triangles); --quick drops the largest
+SYNTHETIC_TRIANGLES = [1_000, 10_000, 100_000, 1_000_000]
+# The bit-exact board model is a per-triangle reference, not a hot path at 1M
+RENDER_FRAME_MAX_TRIANGLES = 100_000
+ATLAS_MATERIALS = [4, 16, 64]
+TEXTURE_SIDES = [64, 256, 1024]
+MVP_FRAMES = [16, 64, 1024]
+
+REPEATS = 3
+# Stop repeating a case once one run takes this long
+SLOW_CASE_SECONDS = 2.0
+DEFAULT_THRESHOLD = 0.10
+SEED = 0
+
+# ==============================================================================
+# 2. WORKLOADS
+# ==============================================================================
+def grid_mesh(triangles, size=8.0):
+    """Triangulated square grid in the XY plane, facing the preview camera: (positions, uvs, faces)."""
+    k = int(np.ceil(np.sqrt(triangles / 2.0)))
+    t = np.linspace(0.0, 1.0, k + 1)
+    u, v = np.meshgrid(t, t)
+    rng = np.random.default_rng(SEED)
+    positions = np.stack([(u.ravel() - 0.5) * size, (0.5 - v.ravel()) * size,
+                          rng.uniform(-0.05, 0.05, u.size)], axis=1)
+    uvs = np.stack([u.ravel(), v.ravel()], axis=1)
+    i = (np.arange(k)[:, None] * (k + 1) + np.arange(k)[None, :]).ravel()
+    quads = np.stack([i, i + 1, i + k + 2, i + k + 1], axis=1)
+    faces = np.concatenate([quads[:, [0, 3, 2]], quads[:, [0, 2, 1]]])[:triangles]
+    return positions, uvs, faces
+
+
+def write_obj(path, positions, uvs, faces):
+    with open(path, "w") as f:
+        f.write("mtllib synthetic.mtl\nusemtl grid\n")
+        np.savetxt(f, positions, fmt="v %.6f %.6f %.6f")
+        np.savetxt(f, uvs, fmt="vt %.6f %.6f")
+        idx = np.repeat(faces + 1, 2, axis=1)
+        np.savetxt(f, idx, fmt="f %d/%d %d/%d %d/%d")
+
+
+def vertex_uvs(mesh):
+    """Per-vertex UVs for the bundled meshes: the UV of the first corner that uses each vertex."""
+    uvs = np.zeros((mesh.num_verts, 2))
+    uvs[mesh.face_verts.ravel()[::-1]] = mesh.corner_uvs().reshape(-1, 2)[::-1]
+    return uvs
+
+
+def corner_arrays(positions, uvs, faces):
+    return positions[faces], uvs[faces]
+
+
+# ==============================================================================
+# 3. CASES
+# ==============================================================================
+# Each case: (benchmark, dataset, items, unit, setup) where setup() returns the timed function
+def mesh_cases(name, positions, uvs, faces, obj_path, gen, tmp, flip_winding=False):
+    tris = len(faces)
+    mvp = gen.mvp_matrix
+    tex = np.random.default_rng(SEED).integers(0, 256, (64, 64, 3), dtype=np.uint8)
+
+    def parse():
+        return lambda: Mesh.load(obj_path, flip_winding)
+
+    def transform():
+        return lambda: gen.process_geometry(positions.copy(), (10, 20, 30), 2.5)
+
+    def export():
+        xyz, uv = corner_arrays(positions, uvs, faces)
+        path = os.path.join(tmp, "vertex_data.mem")
+        return lambda: write_vertex_mem(path, xyz, uv)
+
+    def projected():
+        screen, z = project_vertices(positions, mvp, 320, 240)
+        return screen[faces], z[faces], uvs[faces]
+
+    def zbuffered():
+        s, z, uv = projected()
+        return lambda: rasterize_zbuffered(np.zeros((240, 320, 3), np.uint8), tex, s, z, uv)
+
+    def textured():
+        s, _, uv = projected()
+        return lambda: rasterize_textured_triangles(np.zeros((240, 320, 3), np.uint8), tex, s, uv)
+
+    def board():
+        xyz, uv = corner_arrays(positions * 0.35, uvs, faces)
+        words = vertex_words(xyz, uv).astype(np.int64)
+        words = np.where(words >= 1 << 31, words - (1 << 32), words)
+        mvp_table_ = load_mvp_lutram()
+        rom = np.random.default_rng(SEED).integers(0, 4096, 4096, dtype=np.int64)
+        return lambda: render_frame(words, mvp_table_, rom, 0)
+
+    cases = [("obj_parse", parse), ("process_geometry", transform), ("q16_export", export),
+             ("preview_zbuffered", zbuffered), ("preview_textured", textured)]
+    if tris <= RENDER_FRAME_MAX_TRIANGLES:
+        cases.append(("preview_board_model", board))
+    return [(bench, name, tris, "triangles", setup) for bench, setup in cases]
+
+
+def atlas_cases(gen, tmp):
+    cases = []
+
+    def bundled():
+        mgr = gen.MaterialManager()
+        gen.INPUT_DIR = os.path.join(REPO_DIR, "mariostar", "input")
+        mgr.parse_mtl(os.path.join(gen.INPUT_DIR, "star.mtl"))
+        return mgr.generate_atlas
+
+    cases.append(("generate_atlas", "star", 2, "textures", bundled))
+
+    for n in ATLAS_MATERIALS:
+        def synthetic(n=n):
+            rng = np.random.default_rng(SEED)
+            tex_dir = os.path.join(tmp, f"atlas_{n}")
+            os.makedirs(tex_dir, exist_ok=True)
+            mgr = gen.MaterialManager()
+            for i in range(n):
+                h, w = rng.integers(8, 65, 2)
+                Image.fromarray(rng.integers(0, 256, (h, w, 3), dtype=np.uint8)).save(
+                    os.path.join(tex_dir, f"t{i}.png"))
+                mgr.materials[f"m{i}"] = {'texture_file': f"t{i}.png"}
+            gen.INPUT_DIR = tex_dir
+            return mgr.generate_atlas
+        cases.append(("generate_atlas", f"synthetic-{n}", n, "textures", synthetic))
+    return cases
+
+
+def texture_cases(tmp):
+    cases = []
+    for side in TEXTURE_SIDES:
+        def setup(side=side):
+            img = Image.fromarray(np.random.default_rng(SEED).integers(0, 256, (side, side, 3), dtype=np.uint8))
+            path = os.path.join(tmp, "texture.mem")
+            return lambda: write_texture_mem(path, img)
+        cases.append(("rgb444_export", f"{side}x{side}", side * side, "texels", setup))
+    return cases
+
+
+def mvp_cases():
+    return [("mvp_table", f"{n}-frames", n, "frames",
+             lambda n=n: (lambda: format_verilog_array(mvp_table(num_frames=n))))
+            for n in MVP_FRAMES]
+
+
+# ==============================================================================
+# 4. RUNNING + COMPARING
+# ==============================================================================
+def time_case(fn, repeats):
+    """Best of repeats in seconds; the generator code's progress prints are swallowed."""
+    best = float("inf")
+    for _ in range(repeats):
+        with contextlib.redirect_stdout(io.StringIO()):
+            t0 = time.perf_counter()
+            fn()
+            elapsed = time.perf_counter() - t0
+        best = min(best, elapsed)
+        if elapsed > SLOW_CASE_SECONDS:
+            break
+    return best
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_DIR,
+                                       stderr=subprocess.DEVNULL, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(sizes, only, repeats):
+    gen = load_generator(MARIOSTAR_GEN, "bench_mariostar")
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        cases = []
+        for name, (path, flip_winding) in BUNDLED.items():
+            mesh = Mesh.load(path, flip_winding)
+            cases += mesh_cases(name, mesh.positions, vertex_uvs(mesh), mesh.face_verts,
+                                path, gen, tmp, flip_winding)
+        for n in sizes:
+            positions, uvs, faces = grid_mesh(n)
+            obj_path = os.path.join(tmp, f"grid_{n}.obj")
+            if only is None or "obj_parse" in only:
+                write_obj(obj_path, positions, uvs, faces)
+            cases += mesh_cases(f"grid-{n}", positions, uvs, faces, obj_path, gen, tmp)
+        cases += atlas_cases(gen, tmp) + texture_cases(tmp) + mvp_cases()
+
+        print(f"{'Benchmark':<22} {'Dataset':<18} {'Items':>9} {'Time (ms)':>11} {'Throughput':>14}")
+        for bench, dataset, items, unit, setup in cases:
+            if only is not None and bench not in only:
+                continue
+            with contextlib.redirect_stdout(io.StringIO()):
+                fn = setup()
+            seconds = time_case(fn, repeats)
+            key = f"{bench}/{dataset}"
+            results[key] = {'benchmark': bench, 'dataset': dataset, 'items': items, 'unit': unit,
+                            'seconds': seconds, 'throughput': items / seconds}
+            print(f"{bench:<22} {dataset:<18} {items:>9} {1e3 * seconds:>11.2f} "
+                  f"{items / seconds:>14,.0f} {unit}/s")
+    return results
+
+
+def compare(results, baseline, threshold):
+    """Prints throughput ratios against a baseline; returns the regressed keys."""
+    regressed = []
+    print(f"\n{'Benchmark / dataset':<42} {'Baseline':>14} {'Now':>14} {'Ratio':>7}")
+    for key, now in results.items():
+        old = baseline.get(key)
+        if old is None:
+            continue
+        ratio = now['throughput'] / old['throughput']
+        flag = ""
+        if ratio < 1.0 - threshold:
+            regressed.append(key)
+            flag = "  REGRESSED"
+        print(f"{key:<42} {old['throughput']:>14,.0f} {now['throughput']:>14,.0f} {ratio:>7.2f}{flag}")
+    return regressed
+
+
+# ==============================================================================
+# MAIN
+# ==============================================================================
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generator, exporter and preview benchmarks")
+    parser.add_argument("--out", default=None, help="write results to this JSON file")
+    parser.add_argument("--compare", default=None, metavar="BASELINE",
+                        help="fail if throughput drops below the baseline JSON by more than --threshold")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help=f"allowed fractional throughput drop (default {DEFAULT_THRESHOLD})")
+    parser.add_argument("--quick", action="store_true", help="skip the largest synthetic mesh")
+    parser.add_argument("--only", nargs="+", metavar="BENCHMARK", help="run only these benchmarks")
+    parser.add_argument("--repeats", type=int, default=REPEATS)
+    args = parser.parse_args()
+
+    sizes = SYNTHETIC_TRIANGLES[:-1] if args.quick else SYNTHETIC_TRIANGLES
+    results = run(sizes, set(args.only) if args.only else None, args.repeats)
+
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump({'revision': git_revision(), 'python': platform.python_version(),
+                       'numpy': np.__version__, 'machine': platform.machine(), 'cpus': os.cpu_count(),
+                       'created': time.time(), 'results': results}, f, indent=2)
+        print(f"Saved {args.out}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressed = compare(results, json.load(f)['results'], args.threshold)
+        if regressed:
+            print(f"\n{len(regressed)} benchmarks regressed by more than {100 * args.threshold:.0f}%")
+            sys.exit(1)
+        print(f"\nNo regressions beyond {100 * args.threshold:.0f}%")
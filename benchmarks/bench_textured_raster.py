@@ -0,0 +1,108 @@
+# /// script
+# requires-python = ">=3.11"
+# dependencies = [
+#     "numpy",
+#     "pillow",
+# ]
+# ///
+
+import math
+import os
+import sys
+import time
+import numpy as np
+from PIL import Image
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from fpga_renderer.preview import rasterize_textured_triangles
+
+# ==============================================================================
+# 1. CONFIGURATION
+# ==============================================================================
+# Triangle counts: 20 is the plain d20, the rest are subdivision levels
+TRIANGLE_COUNTS = [20, 80, 320, 1280, 5120]
+SCREEN_WIDTH = 320
+SCREEN_HEIGHT = 240
+TEXTURE_SIZE = 64
+# Total covered area stays roughly constant, like a subdivided mesh
+COVERED_PIXELS = 40_000
+REPEATS = 3
+
+# ==============================================================================
+# 2. REFERENCE (previous per-pixel loop from d20gen/gen.py)
+# ==============================================================================
+def legacy_rasterize(canvas_pixels, tex_pixels, tex_w, tex_h, p0, p1, p2, uv0, uv1, uv2):
+    min_x = max(0, int(math.floor(min(p0[0], p1[0], p2[0]))))
+    max_x = min(SCREEN_WIDTH - 1, int(math.ceil(max(p0[0], p1[0], p2[0]))))
+    min_y = max(0, int(math.floor(min(p0[1], p1[1], p2[1]))))
+    max_y = min(SCREEN_HEIGHT - 1, int(math.ceil(max(p0[1], p1[1], p2[1]))))
+
+    def edge_function(a, b, c_x, c_y):
+        return (c_x - a[0]) * (b[1] - a[1]) - (c_y - a[1]) * (b[0] - a[0])
+
+    area = edge_function(p0, p1, p2[0], p2[1])
+    if abs(area) < 1e-9: return
+
+    for y in range(min_y, max_y + 1):
+        for x in range(min_x, max_x + 1):
+            w0 = edge_function(p1, p2, x, y)
+            w1 = edge_function(p2, p0, x, y)
+            w2 = edge_function(p0, p1, x, y)
+            if w0 >= -1e-9 and w1 >= -1e-9 and w2 >= -1e-9:
+                lambda0 = w0 / area
+                lambda1 = w1 / area
+                lambda2 = w2 / area
+                u_norm = lambda0 * uv0[0] + lambda1 * uv1[0] + lambda2 * uv2[0]
+                v_norm = lambda0 * uv0[1] + lambda1 * uv1[1] + lambda2 * uv2[1]
+                tex_x = max(0, min(tex_w - 1, int(u_norm * tex_w)))
+                tex_y = max(0, min(tex_h - 1, int(v_norm * tex_h)))
+                canvas_pixels[x, y] = tex_pixels[tex_x, tex_y]
+
+def legacy_draw(tris, uvs, tex_img):
+    img = Image.new('RGB', (SCREEN_WIDTH, SCREEN_HEIGHT), (10, 10, 10))
+    canvas_pixels = img.load()
+    tex_pixels = tex_img.load()
+    for sv, uv in zip(tris, uvs):
+        legacy_rasterize(canvas_pixels, tex_pixels, TEXTURE_SIZE, TEXTURE_SIZE, *sv, *uv)
+    return np.asarray(img)
+
+def vector_draw(tris, uvs, tex_img):
+    canvas = np.full((SCREEN_HEIGHT, SCREEN_WIDTH, 3), (10, 10, 10), dtype=np.uint8)
+    rasterize_textured_triangles(canvas, np.asarray(tex_img), tris, uvs)
+    return canvas
+
+# ==============================================================================
+# 3. HELPERS
+# ==============================================================================
+def make_scene(rng, n):
+    """n triangles scattered over the screen, each about COVERED_PIXELS / n pixels."""
+    size = math.sqrt(2.0 * COVERED_PIXELS / n)
+    centers = rng.uniform((0, 0), (SCREEN_WIDTH, SCREEN_HEIGHT), (n, 1, 2))
+    tris = centers + rng.uniform(-size, size, (n, 3, 2))
+    uvs = rng.uniform(0.0, 1.0, (n, 3, 2))
+    # Lists of tuples, as the preview pipeline passes them
+    return ([[tuple(p) for p in t] for t in tris.tolist()],
+            [[tuple(p) for p in t] for t in uvs.tolist()])
+
+def best_time(fn, *args):
+    best = float("inf")
+    for _ in range(REPEATS):
+        t0 = time.perf_counter()
+        out = fn(*args)
+        best = min(best, time.perf_counter() - t0)
+    return best, out
+
+# ==============================================================================
+# MAIN
+# ==============================================================================
+if __name__ == "__main__":
+    rng = np.random.default_rng(0)
+    tex_img = Image.fromarray(rng.integers(0, 256, (TEXTURE_SIZE, TEXTURE_SIZE, 3), dtype=np.uint8))
+    print(f"{'Triangles':>10} {'Old (ms)':>10} {'New (ms)':>10} {'Speedup':>9}")
+
+    for n in TRIANGLE_COUNTS:
+        tris, uvs = make_scene(rng, n)
+        t_old, old = best_time(legacy_draw, tris, uvs, tex_img)
+        t_new, new = best_time(vector_draw, tris, uvs, tex_img)
+        assert np.array_equal(old, new), "vectorized rasterizer output differs"
+        print(f"{n:>10} {t_old * 1e3:>10.1f} {t_new * 1e3:>10.1f} {t_old / t_new:>8.1f}x")
@@ -1,14 +1,19 @@
 # /// script
 # requires-python = ">=3.11"
 # dependencies = [
+#     "numpy",
 #     "pillow",
 # ]
 # ///
 
+import os
 import sys
 from pathlib import Path
 from PIL import Image
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from fpga_renderer.encode import write_texture_mem
+
 def main():
     input_filename = "combined_block_64.png"
     output_filename = "texture.mem"
@@ -33,29 +38,9 @@ def main():
 
             width, height = img.size
             
-            with open(output_filename, 'w') as f:
-                # Loop row by row (y), then column by column (x)
-                # This ensures standard raster order for FPGA memory initialization
-                for y in range(height):
-                    for x in range(width):
-                        r, g, b = img.getpixel((x, y))
-                        
-                        # Convert 8-bit (0-255) to 4-bit (0-15)
-                        # Shift right by 4 bits
-                        r_4 = r >> 4
-                        g_4 = g >> 4
-                        b_4 = b >> 4
-                        
-                        # anything in hte bottom half of hte image will become black
-                        if y >= height // 2:
-                            r_4 = 0
-                            g_4 = 0
-                            b_4 = 0
-                
-                        # Format as 3-digit hex string (e.g., f0a)
-                        hex_val = f"{r_4:x}{g_4:x}{b_4:x}"
-                        
-                        f.write(hex_val + '\n')
+            # Raster order (row by row) for FPGA memory initialization, 8-bit -> 4-bit
+            # per channel. Anything in the bottom half of the image becomes black.
+            write_texture_mem(output_filename, img, upper=False, blackout_from_row=height // 2)
             
             print(f"Success! Generated '{output_filename}' with {width * height} lines.")
 
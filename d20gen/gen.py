@@ -9,6 +9,16 @@
 import numpy as np
 from PIL import Image, ImageDraw
 import math
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from fpga_renderer.cache import make_key, cached_outputs, evict
+from fpga_renderer.encode import write_vertex_mem, write_texture_mem
+from fpga_renderer.preview import rasterize_textured_triangles
+from fpga_renderer.profiling import stage, session
+from fpga_renderer.workloads import icosahedron
+from fpga_renderer.mesh import Mesh
 
 # ==============================================================================
 # 1. SETUP & CONFIGURATION
@@ -33,6 +43,9 @@ TEXTURE_MEM_FILE = "d20_star_texture.mem"
 TEXTURE_PREVIEW_FILE = "d20_star_tex_preview.png"
 SCENE_PREVIEW_FILE = "d20_star_scene_preview.png"
 
+# --- Build Cache ---
+USE_CACHE = True  # Skip the build when the script and its constants are unchanged
+
 # --- MVP Matrix ---
 mvp_matrix = np.array([
     [ 7.5000000e-01,  0.0000000e+00,  0.0000000e+00,  0.0000000e+00],
@@ -55,20 +68,9 @@ STANDARD_FACE_UVS = [
 # 2. GEOMETRY GENERATION (ICOSAHEDRON)
 # ==============================================================================
 def generate_icosahedron(scale):
-    phi = (1.0 + math.sqrt(5.0)) / 2.0
-    verts = [
-        (-1,  phi, 0), ( 1,  phi, 0), (-1, -phi, 0), ( 1, -phi, 0),
-        ( 0, -1,  phi), ( 0,  1,  phi), ( 0, -1, -phi), ( 0,  1, -phi),
-        ( phi, 0, -1), ( phi, 0,  1), (-phi, 0, -1), (-phi, 0,  1)
-    ]
-    vertices = [np.array(v, dtype=np.float32) * scale for v in verts]
-    faces = [
-        (0, 11, 5), (0, 5, 1), (0, 1, 7), (0, 7, 10), (0, 10, 11),
-        (1, 5, 9), (5, 11, 4), (11, 10, 2), (10, 7, 6), (7, 1, 8),
-        (3, 9, 4), (3, 4, 2), (3, 2, 6), (3, 6, 8), (3, 8, 9),
-        (4, 9, 5), (2, 4, 11), (6, 2, 10), (8, 6, 7), (9, 8, 1)
-    ]
-    return vertices, faces
+    """The d20 solid (shared with fpga_renderer.workloads); every face uses STANDARD_FACE_UVS."""
+    verts, faces = icosahedron(scale)
+    return Mesh(verts, faces, uvs=STANDARD_FACE_UVS, face_uvs=np.tile([0, 1, 2], (len(faces), 1)))
 
 # ==============================================================================
 # 3. TEXTURE GENERATION (UPDATED: Smaller Stars)
@@ -100,173 +102,106 @@ def generate_star_texture():
 # ==============================================================================
 # 4. EXPORTERS
 # ==============================================================================
-def float_to_q16_16_hex(val):
-    fixed_val = int(val * FIXED_POINT_SCALE)
-    if fixed_val < 0: fixed_val = (1 << 32) + fixed_val
-    return f"{fixed_val & 0xFFFFFFFF:08X}"
-
-def rgb_to_12bit_hex(r, g, b):
-    return f"{(r>>4)&0xF:x}{(g>>4)&0xF:x}{(b>>4)&0xF:x}"
-
 def export_texture_mem(img, filename):
     print(f"Exporting Texture to {filename}...")
-    width, height = img.size
-    with open(filename, 'w') as f:
-        for y in range(height):
-            for x in range(width):
-                r, g, b = img.getpixel((x, y))
-                f.write(rgb_to_12bit_hex(r, g, b) + "\n")
+    write_texture_mem(filename, img, upper=False)
 
-def export_vertex_mem(vertices, faces, filename):
+def export_vertex_mem(mesh, filename):
     print(f"Exporting Vertices to {filename}...")
-    with open(filename, 'w') as f:
-        f.write("// D20 Star Map Data\n")
-        f.write(f"// Format: X, Y, Z, U, V (Q16.16 Hex)\n")
-        
-        for face_indices in faces:
-            # Loop through the 3 vertices of the face
-            for i, v_idx in enumerate(face_indices):
-                v = vertices[v_idx]
-                # Use the standard UV set, matching vertex index in face (0, 1, or 2)
-                uv = STANDARD_FACE_UVS[i] 
-                
-                lines = []
-                lines.append(float_to_q16_16_hex(v[0])) # X
-                lines.append(float_to_q16_16_hex(v[1])) # Y
-                lines.append(float_to_q16_16_hex(v[2])) # Z
-                # UVs are already normalized 0-1 floats here
-                lines.append(float_to_q16_16_hex(uv[0])) # U (Normalized)
-                lines.append(float_to_q16_16_hex(uv[1])) # V (Normalized)
-                
-                f.write("\n".join(lines) + "\n")
-        
-        f.write("// EOS\n")
-        for _ in range(5): f.write("FFFFFFFF\n")
+    # Every face uses the standard UV set, matching vertex index in face (0, 1, or 2)
+    write_vertex_mem(filename, mesh.corners(), mesh.corner_uvs(),
+                     header="// D20 Star Map Data\n// Format: X, Y, Z, U, V (Q16.16 Hex)\n")
 
 # ==============================================================================
 # 5. VISUALIZATION PIPELINE (UPDATED: Textured Rasterizer)
 # ==============================================================================
 
-def rasterize_textured_triangle(canvas_pixels, tex_pixels, tex_w, tex_h, p0, p1, p2, uv0, uv1, uv2):
-    """
-    Simple software rasterizer using barycentric coordinates and affine texture mapping.
-    Takes normalized UVs (0.0-1.0) and maps them to texture dimensions.
-    """
-    # 1. Find Bounding Box on screen
-    min_x = max(0, int(math.floor(min(p0[0], p1[0], p2[0]))))
-    max_x = min(SCREEN_WIDTH - 1, int(math.ceil(max(p0[0], p1[0], p2[0]))))
-    min_y = max(0, int(math.floor(min(p0[1], p1[1], p2[1]))))
-    max_y = min(SCREEN_HEIGHT - 1, int(math.ceil(max(p0[1], p1[1], p2[1]))))
-
-    # Edge function for barycentric calculation
-    def edge_function(a, b, c_x, c_y):
-        return (c_x - a[0]) * (b[1] - a[1]) - (c_y - a[1]) * (b[0] - a[0])
-
-    area = edge_function(p0, p1, p2[0], p2[1])
-    # Avoid division by zero for degenerate triangles
-    if abs(area) < 1e-9: return
-
-    # 2. Iterate over bounding box pixels
-    for y in range(min_y, max_y + 1):
-        for x in range(min_x, max_x + 1):
-            # Calculate barycentric weights
-            w0 = edge_function(p1, p2, x, y)
-            w1 = edge_function(p2, p0, x, y)
-            w2 = edge_function(p0, p1, x, y)
-
-            # Check if pixel is inside triangle (using slightly loose tolerance for edges)
-            if w0 >= -1e-9 and w1 >= -1e-9 and w2 >= -1e-9:
-                lambda0 = w0 / area
-                lambda1 = w1 / area
-                lambda2 = w2 / area
-
-                # Interpolate normalized UVs
-                u_norm = lambda0 * uv0[0] + lambda1 * uv1[0] + lambda2 * uv2[0]
-                v_norm = lambda0 * uv0[1] + lambda1 * uv1[1] + lambda2 * uv2[1]
-
-                # --- CRITICAL: Map Normalized UV (0->1) to Texture Coordinates ---
-                # Scale by dimensions and clamp to ensure we don't sample outside image boundaries
-                tex_x = max(0, min(tex_w - 1, int(u_norm * tex_w)))
-                tex_y = max(0, min(tex_h - 1, int(v_norm * tex_h)))
-
-                # Sample texture and write to canvas
-                canvas_pixels[x, y] = tex_pixels[tex_x, tex_y]
-
-
-def run_preview_pipeline(vertices, faces, mvp_mat, texture_img):
+def run_preview_pipeline(mesh, mvp_mat, texture_img):
     print("Running Textured Geometry Preview...")
-    img = Image.new('RGB', (SCREEN_WIDTH, SCREEN_HEIGHT), PREVIEW_BG_COLOR)
-    canvas_pixels = img.load()
-    
-    # Prepare texture for fast access
-    tex_pixels = texture_img.load()
-    tex_w, tex_h = texture_img.size
-
-    projected_verts = []
-    for v in vertices:
-        v4 = np.array([v[0], v[1], v[2], 1.0])
-        clip = mvp_mat @ v4
-        # Simple w-division guard
-        w = clip[3] if abs(clip[3]) > 1e-9 else 1e-9
-        # Viewport transform to screen coordinates
-        sx = (clip[0]/w + 1.0) * (SCREEN_WIDTH / 2.0)
-        sy = (1.0 - clip[1]/w) * (SCREEN_HEIGHT / 2.0) 
-        projected_verts.append((sx, sy, w))
-
-    render_list = []
-    for face_indices in faces:
-        p0 = projected_verts[face_indices[0]]
-        p1 = projected_verts[face_indices[1]]
-        p2 = projected_verts[face_indices[2]]
-        
-        # Culling check
-        cross_z = (p1[0] - p0[0]) * (p2[1] - p0[1]) - (p1[1] - p0[1]) * (p2[0] - p0[0])
-        is_visible = True
-        if CULL_BACKFACES and cross_z > 0: is_visible = False
-        
-        if is_visible:
-            avg_depth = (p0[2] + p1[2] + p2[2]) / 3.0
-            render_list.append({
-                'depth': avg_depth,
-                # Store screen coordinates (x,y) tuples
-                'screen_verts': [(p0[0], p0[1]), (p1[0], p1[1]), (p2[0], p2[1])],
-                # Store corresponding normalized UVs based on standard mapping
-                'uvs': [STANDARD_FACE_UVS[0], STANDARD_FACE_UVS[1], STANDARD_FACE_UVS[2]]
-            })
-            
-    # Simple painter's algorithm sort
-    render_list.sort(key=lambda x: x['depth'], reverse=True)
-    
-    print(f"Rasterizing {len(render_list)} visible triangles...")
-    for item in render_list:
-        sv = item['screen_verts']
-        uvs = item['uvs']
-        # Call custom software rasterizer
-        rasterize_textured_triangle(
-            canvas_pixels, tex_pixels, tex_w, tex_h,
-            sv[0], sv[1], sv[2], # Screen vertices P0, P1, P2
-            uvs[0], uvs[1], uvs[2] # Normalized UVs UV0, UV1, UV2
-        )
-        
-    img.save(SCENE_PREVIEW_FILE)
+    canvas = np.full((SCREEN_HEIGHT, SCREEN_WIDTH, 3), PREVIEW_BG_COLOR, dtype=np.uint8)
+
+    # Texture as an array for bulk texel gathers
+    tex_pixels = np.asarray(texture_img.convert('RGB'))
+
+    v4 = np.concatenate([mesh.positions, np.ones((mesh.num_verts, 1))], axis=1)
+    clip = v4 @ mvp_mat.T
+    # Simple w-division guard
+    w = np.where(np.abs(clip[:, 3]) > 1e-9, clip[:, 3], 1e-9)
+    # Viewport transform to screen coordinates
+    sx = (clip[:, 0]/w + 1.0) * (SCREEN_WIDTH / 2.0)
+    sy = (1.0 - clip[:, 1]/w) * (SCREEN_HEIGHT / 2.0)
+    screen = mesh.corners(np.stack([sx, sy], axis=1))  # (F, 3, 2)
+    corner_w = mesh.corners(w)                          # (F, 3)
+    p0, p1, p2 = screen[:, 0], screen[:, 1], screen[:, 2]
+
+    # Culling check
+    cross_z = (p1[:, 0] - p0[:, 0]) * (p2[:, 1] - p0[:, 1]) - (p1[:, 1] - p0[:, 1]) * (p2[:, 0] - p0[:, 0])
+    visible = np.flatnonzero(~(cross_z > 0) if CULL_BACKFACES else np.ones(len(mesh), dtype=bool))
+
+    # Simple painter's algorithm sort: farthest first, ties in face order
+    avg_depth = (corner_w[:, 0] + corner_w[:, 1] + corner_w[:, 2]) / 3.0
+    order = visible[np.argsort(-avg_depth[visible], kind="stable")]
+
+    print(f"Rasterizing {len(order)} visible triangles...")
+    # Vectorized software rasterizer: all triangles in one call, drawn in sorted order
+    rasterize_textured_triangles(canvas, tex_pixels, screen[order], mesh.corner_uvs()[order])
+
+    Image.fromarray(canvas).save(SCENE_PREVIEW_FILE)
     print(f"Textured preview saved to {SCENE_PREVIEW_FILE}")
 
 # ==============================================================================
 # MAIN
 # ==============================================================================
-if __name__ == "__main__":
-    print("--- D20 Star Texture Exporter & Previewer ---")
-    verts, faces = generate_icosahedron(SCALE)
+def build_outputs():
+    with stage("geometry") as counts:
+        mesh = generate_icosahedron(SCALE)
+        counts.update(verts=mesh.num_verts, faces=len(mesh))
     
     # 1. Generate Texture (Now smaller stars)
-    tex_img = generate_star_texture()
-    tex_img.save(TEXTURE_PREVIEW_FILE)
+    with stage("texture") as counts:
+        tex_img = generate_star_texture()
+        tex_img.save(TEXTURE_PREVIEW_FILE)
+        counts['texels'] = tex_img.width * tex_img.height
     print(f"Texture preview saved to {TEXTURE_PREVIEW_FILE}")
 
     # 2. Export Hardware Files (using 0->1 UVs translated to Q16.16)
-    export_vertex_mem(verts, faces, VERTEX_MEM_FILE)
-    export_texture_mem(tex_img, TEXTURE_MEM_FILE)
+    with stage("export") as counts:
+        export_vertex_mem(mesh, VERTEX_MEM_FILE)
+        export_texture_mem(tex_img, TEXTURE_MEM_FILE)
+        counts.update(rows=len(mesh) * 15, texels=tex_img.width * tex_img.height)
     
     # 3. Run Textured Preview (using 0->1 UVs and software rasterization)
-    run_preview_pipeline(verts, faces, mvp_matrix, tex_img)
-    print("\nDone.")
\ No newline at end of file
+    with stage("preview") as counts:
+        run_preview_pipeline(mesh, mvp_matrix, tex_img)
+        counts['faces'] = len(mesh)
+
+def output_config():
+    """Every constant the outputs depend on."""
+    return {'TEXTURE_WIDTH': TEXTURE_WIDTH, 'TEXTURE_HEIGHT': TEXTURE_HEIGHT,
+            'SCREEN_WIDTH': SCREEN_WIDTH, 'SCREEN_HEIGHT': SCREEN_HEIGHT,
+            'VERTEX_MEM_FILE': VERTEX_MEM_FILE, 'TEXTURE_MEM_FILE': TEXTURE_MEM_FILE,
+            'TEXTURE_PREVIEW_FILE': TEXTURE_PREVIEW_FILE, 'SCENE_PREVIEW_FILE': SCENE_PREVIEW_FILE,
+            'SCALE': SCALE, 'CULL_BACKFACES': CULL_BACKFACES, 'TEX_BG_COLOR': TEX_BG_COLOR,
+            'TEX_STAR_COLOR': TEX_STAR_COLOR, 'PREVIEW_BG_COLOR': PREVIEW_BG_COLOR,
+            'STANDARD_FACE_UVS': STANDARD_FACE_UVS, 'mvp_matrix': mvp_matrix.tolist()}
+
+def main():
+    print("--- D20 Star Texture Exporter & Previewer ---")
+    if not USE_CACHE:
+        build_outputs()
+    else:
+        # Everything is procedural: the key is the script itself plus every constant it reads
+        output_key = make_key("d20gen-outputs", [__file__], output_config())
+        output_paths = [VERTEX_MEM_FILE, TEXTURE_MEM_FILE, TEXTURE_PREVIEW_FILE, SCENE_PREVIEW_FILE]
+        with stage("outputs") as counts:
+            counts['cache_hit'] = int(cached_outputs(output_key, output_paths, build_outputs))
+        if counts['cache_hit']:
+            print("Inputs unchanged: restored outputs from cache.")
+        evict()
+    print("\nDone.")
+
+
+if __name__ == "__main__":
+    with session(sys.argv[1:]) as options:
+        USE_CACHE = USE_CACHE and not options['no_cache']
+        main()
@@ -0,0 +1,6 @@
+"""
+Shared helpers for the FPGA renderer asset scripts.
+
+The per-model generators (mariostar, starwing, d20gen, ...) import from here
+so that parsing, encoding and preview code only lives in one place.
+"""
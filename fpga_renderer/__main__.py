@@ -0,0 +1,7 @@
+"""python -m fpga_renderer build scene.toml (see fpga_renderer.build)."""
+
+import sys
+
+from fpga_renderer.build import main
+
+sys.exit(main())
@@ -0,0 +1,140 @@
+"""
+Multi-frame animation renderer for exported meshes.
+
+Every frame of an MVP table is rendered with the bit-exact raster_model, so
+the animation is what the board will show frame by frame. Frames are spread
+over a process pool and come back in frame order (pool.map), and each one is
+written out as soon as it arrives: a GIF is appended frame by frame (see
+GifStream) and a PNG sequence is one file per frame, so no frame list is ever
+held in memory.
+"""
+
+import io
+import os
+import struct
+from concurrent.futures import ProcessPoolExecutor
+
+from PIL import Image
+
+from fpga_renderer.raster_model import render_frame, frame_to_rgb
+
+DEFAULT_FRAME_MS = 50
+
+
+# ==============================================================================
+# 1. RENDERING
+# ==============================================================================
+_job = {}
+
+
+def _init_worker(vertices, mvp, texture, upscale):
+    # Inputs are sent once per worker, not once per frame
+    _job.update(vertices=vertices, mvp=mvp, texture=texture, upscale=upscale)
+
+
+def _render(frame):
+    fb, _ = render_frame(_job['vertices'], _job['mvp'], _job['texture'], frame)
+    rgb = frame_to_rgb(fb)
+    if _job['upscale'] > 1:
+        rgb = rgb.repeat(_job['upscale'], axis=0).repeat(_job['upscale'], axis=1)
+    return rgb
+
+
+def render_frames(vertices, mvp, texture, frames=None, workers=None, upscale=1):
+    """
+    Yields (frame, (H, W, 3) uint8 RGB) for each frame index, in order.
+    frames defaults to the whole MVP table; workers=1 renders in-process.
+    """
+    frames = list(range(len(mvp)) if frames is None else frames)
+    args = (vertices, mvp, texture, upscale)
+
+    if workers == 1 or len(frames) <= 1:
+        _init_worker(*args)
+        for f in frames:
+            yield f, _render(f)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=args) as pool:
+        # map() yields in submission order, so frames are written in sequence
+        yield from zip(frames, pool.map(_render, frames))
+
+
+# ==============================================================================
+# 2. STREAMING OUTPUT
+# ==============================================================================
+class GifStream:
+    """
+    Appends frames to an animated GIF one at a time.
+
+    Pillow buffers every frame before writing a multi-frame GIF, so each frame
+    is encoded on its own (adaptive 256-colour palette) and its image block is
+    copied into the output with the palette moved into a local colour table.
+    """
+
+    def __init__(self, path, frame_ms=DEFAULT_FRAME_MS, loop=0):
+        self.f = open(path, "wb")
+        self.delay = max(1, round(frame_ms / 10))  # GIF delays are in 1/100 s
+        self.loop = loop
+        self.frames = 0
+
+    def add(self, rgb):
+        img = Image.fromarray(rgb).quantize(256, method=Image.Quantize.MEDIANCUT)
+        buf = io.BytesIO()
+        img.save(buf, "GIF")
+        data = buf.getvalue()
+
+        # Logical screen descriptor: size, then the global colour table
+        width, height, packed = struct.unpack_from("<HHB", data, 6)
+        table_len = 3 << ((packed & 7) + 1) if packed & 0x80 else 0
+        table = data[13:13 + table_len]
+
+        # Skip any extension blocks up to the image descriptor
+        pos = 13 + table_len
+        while data[pos] == 0x21:
+            pos += 2
+            while data[pos]:
+                pos += data[pos] + 1
+            pos += 1
+        desc = bytearray(data[pos:pos + 10])
+        desc[9] = (desc[9] & 0x40) | (0x80 | (packed & 7) if table_len else 0)
+        image_data = data[pos + 10:data.rindex(b"\x3b")]
+
+        if self.frames == 0:
+            self.f.write(b"GIF89a" + struct.pack("<HHBBB", width, height, 0, 0, 0))
+            # NETSCAPE2.0 loop count
+            self.f.write(b"\x21\xff\x0bNETSCAPE2.0\x03\x01" + struct.pack("<H", self.loop) + b"\x00")
+        # Graphic control extension: no disposal, frame delay
+        self.f.write(b"\x21\xf9\x04\x04" + struct.pack("<H", self.delay) + b"\x00\x00")
+        self.f.write(bytes(desc) + table + image_data)
+        self.frames += 1
+
+    def close(self):
+        if not self.f.closed:
+            self.f.write(b"\x3b")
+            self.f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def write_animation(path, frames, frame_ms=DEFAULT_FRAME_MS):
+    """
+    Streams (frame, rgb) pairs to path: an animated GIF if path ends in .gif,
+    otherwise a directory of frame_XX.png files. Returns the frame count.
+    """
+    count = 0
+    if path.lower().endswith(".gif"):
+        with GifStream(path, frame_ms) as gif:
+            for _, rgb in frames:
+                gif.add(rgb)
+                count += 1
+        return count
+
+    os.makedirs(path, exist_ok=True)
+    for f, rgb in frames:
+        Image.fromarray(rgb).save(os.path.join(path, f"frame_{f:02d}.png"))
+        count += 1
+    return count
@@ -0,0 +1,211 @@
+"""
+Texture atlas packing for texture_rom.
+
+Every material texture is cropped to the part its UVs actually use, identical
+tiles are stored once, and the tiles are bin-packed into the square atlas
+with MaxRects (best short side fit). If they do not fit at full resolution,
+all tiles are shrunk by one common factor, found by bisection, until they
+do. Single-color tiles need one texel whatever their size.
+
+Each placed tile gets `gutter` texels of its own edge color around it, so
+UVs that land exactly on a tile border (or a texel past it after Q16.16
+truncation) still sample the right material.
+
+The result is a per-texture UV transform u' = u * su + ou, v' = v * sv + ov
+(same convention as the generators' uv_scale / uv_offset), mapping the
+texture's own 0..1 UVs into its tile. Solid tiles get scale 0 and point at
+the tile center.
+
+UVs outside 0..1 (a repeating texture) are not wrapped: texture_rom has no
+per-tile wrap, so they sample the neighboring tiles. Such materials keep
+their whole texture as the tile, so no part of it is cropped away, but the
+repeat itself only survives if the generator folds the UVs into 0..1
+before packing.
+"""
+
+import numpy as np
+from PIL import Image
+
+# Bisection steps for the common shrink factor (1 / 2^12 resolution)
+SCALE_STEPS = 12
+
+
+# ==============================================================================
+# 1. UV EXTENTS
+# ==============================================================================
+def uv_extents(tex_coords, face_uvs, face_mats, n_mats):
+    """
+    (n_mats, 4) u0, v0, u1, v1 of the UVs each material's faces use.
+    Materials without faces (or UVs), or with any UV outside 0..1, get the
+    whole texture.
+    """
+    extents = np.tile([0.0, 0.0, 1.0, 1.0], (n_mats, 1))
+    if len(tex_coords) == 0 or len(face_uvs) == 0:
+        return extents
+    uv = np.asarray(tex_coords)[face_uvs]  # (F, 3, 2)
+    mats = np.asarray(face_mats)
+    used = mats >= 0
+    lo = np.full((n_mats, 2), np.inf)
+    hi = np.full((n_mats, 2), -np.inf)
+    np.minimum.at(lo, mats[used], uv[used].min(axis=1))
+    np.maximum.at(hi, mats[used], uv[used].max(axis=1))
+    # A repeating texture uses all of itself, wherever its UVs land
+    seen = np.isfinite(lo[:, 0]) & (lo >= 0.0).all(axis=1) & (hi <= 1.0).all(axis=1)
+    extents[seen] = np.concatenate([lo, hi], axis=1)[seen]
+    return extents
+
+
+def crop_to_extent(pixels, extent):
+    """(H, W, 3) texture -> (crop, (x0, y0, x1, y1)) texel bounds covering extent."""
+    h, w = pixels.shape[:2]
+    u0, v0, u1, v1 = extent
+    x0 = min(int(np.floor(u0 * w)), w - 1)
+    y0 = min(int(np.floor(v0 * h)), h - 1)
+    x1 = max(int(np.ceil(u1 * w)), x0 + 1)
+    y1 = max(int(np.ceil(v1 * h)), y0 + 1)
+    return pixels[y0:y1, x0:x1], (x0, y0, x1, y1)
+
+
+# ==============================================================================
+# 2. MAXRECTS
+# ==============================================================================
+def _prune(free):
+    """Drops free rectangles contained in another one."""
+    keep = []
+    for i, (x, y, w, h) in enumerate(free):
+        contained = any(j != i and x >= fx and y >= fy and x + w <= fx + fw and y + h <= fy + fh
+                        and (free[j] != free[i] or j < i)
+                        for j, (fx, fy, fw, fh) in enumerate(free))
+        if not contained:
+            keep.append(free[i])
+    return keep
+
+
+def maxrects_pack(sizes, width, height):
+    """
+    Packs (w, h) rectangles into a width x height bin. Returns one (x, y) per
+    input rectangle, or None if they do not all fit. Largest side first,
+    each into the free rectangle with the best short side fit.
+    """
+    order = sorted(range(len(sizes)), key=lambda i: (-max(sizes[i]), -sizes[i][0] * sizes[i][1], i))
+    free = [(0, 0, width, height)]
+    placed = [None] * len(sizes)
+
+    for i in order:
+        w, h = sizes[i]
+        best = None
+        for fx, fy, fw, fh in free:
+            if w <= fw and h <= fh:
+                fit = (min(fw - w, fh - h), max(fw - w, fh - h), fy, fx)
+                if best is None or fit < best[0]:
+                    best = (fit, fx, fy)
+        if best is None:
+            return None
+        _, x, y = best
+        placed[i] = (x, y)
+
+        # Split every free rectangle the new one overlaps into up to four
+        split = []
+        for fx, fy, fw, fh in free:
+            if x >= fx + fw or x + w <= fx or y >= fy + fh or y + h <= fy:
+                split.append((fx, fy, fw, fh))
+                continue
+            if x > fx:
+                split.append((fx, fy, x - fx, fh))
+            if x + w < fx + fw:
+                split.append((x + w, fy, fx + fw - x - w, fh))
+            if y > fy:
+                split.append((fx, fy, fw, y - fy))
+            if y + h < fy + fh:
+                split.append((fx, y + h, fw, fy + fh - y - h))
+        free = _prune(split)
+    return placed
+
+
+# ==============================================================================
+# 3. ATLAS
+# ==============================================================================
+def _tile_size(crop, scale):
+    if (crop == crop[0, 0]).all():
+        return 1, 1
+    h, w = crop.shape[:2]
+    return max(1, round(w * scale)), max(1, round(h * scale))
+
+
+def pack_atlas(textures, extents=None, size=64, gutter=1, background=(255, 0, 255)):
+    """
+    textures: list of (H, W, 3) uint8 arrays (or PIL images), extents: their
+    (u0, v0, u1, v1) UV extents (None = whole textures).
+
+    Returns (atlas, transforms, stats): a size x size RGB PIL image, one dict
+    per texture with 'uv_scale', 'uv_offset' and 'rect' (x, y, w, h of the
+    tile without gutter), and 'scale', 'tiles', 'duplicates', 'fill'.
+    Raises ValueError if the tiles do not fit even at one texel each.
+    """
+    pixels = [np.asarray(t.convert("RGB") if isinstance(t, Image.Image) else t, dtype=np.uint8)
+              for t in textures]
+    extents = [(0.0, 0.0, 1.0, 1.0)] * len(pixels) if extents is None else extents
+
+    # Crop, then store identical crops once
+    crops, bounds, tile_of, tiles = [], [], [], {}
+    for p, extent in zip(pixels, extents):
+        crop, box = crop_to_extent(p, extent)
+        key = (crop.shape, crop.tobytes())
+        if key not in tiles:
+            tiles[key] = len(crops)
+            crops.append(crop)
+        tile_of.append(tiles[key])
+        bounds.append(box)
+
+    def layout(scale):
+        sizes = [_tile_size(c, scale) for c in crops]
+        placed = maxrects_pack([(w + 2 * gutter, h + 2 * gutter) for w, h in sizes], size, size)
+        return None if placed is None else (sizes, placed)
+
+    # Largest common scale (<= 1: tiles are never upscaled) that fits
+    scale, result = 1.0, layout(1.0)
+    if result is None:
+        lo, hi = 0.0, 1.0
+        result = layout(0.0)
+        if result is None:
+            raise ValueError(f"{len(crops)} tiles do not fit a {size}x{size} atlas")
+        for _ in range(SCALE_STEPS):
+            mid = (lo + hi) / 2
+            attempt = layout(mid)
+            if attempt is None:
+                hi = mid
+            else:
+                lo, result = mid, attempt
+        scale = lo
+
+    sizes, placed = result
+    atlas = np.empty((size, size, 3), dtype=np.uint8)
+    atlas[:] = background
+    for crop, (w, h), (x, y) in zip(crops, sizes, placed):
+        if (w, h) == (crop.shape[1], crop.shape[0]):
+            tile = crop
+        elif (crop == crop[0, 0]).all():
+            tile = np.broadcast_to(crop[0, 0], (h, w, 3))
+        else:
+            tile = np.asarray(Image.fromarray(crop).resize((w, h)))
+        atlas[y:y + h + 2 * gutter, x:x + w + 2 * gutter] = np.pad(
+            tile, ((gutter, gutter), (gutter, gutter), (0, 0)), mode="edge")
+
+    transforms = []
+    for p, t, (x0, y0, x1, y1) in zip(pixels, tile_of, bounds):
+        (w, h), (x, y) = sizes[t], placed[t]
+        tx, ty = x + gutter, y + gutter
+        if (crops[t] == crops[t][0, 0]).all():
+            su = sv = 0.0
+            ou, ov = (tx + 0.5) / size, (ty + 0.5) / size
+        else:
+            # Source texel x0 lands on tile texel tx, x1 on tx + w
+            kx, ky = w / (x1 - x0), h / (y1 - y0)
+            su, sv = p.shape[1] * kx / size, p.shape[0] * ky / size
+            ou, ov = (tx - x0 * kx) / size, (ty - y0 * ky) / size
+        transforms.append({'uv_scale': (su, sv), 'uv_offset': (ou, ov), 'rect': (tx, ty, w, h)})
+
+    used = sum((w + 2 * gutter) * (h + 2 * gutter) for w, h in sizes)
+    stats = {'scale': scale, 'tiles': len(crops), 'duplicates': len(pixels) - len(crops),
+             'fill': used / (size * size)}
+    return Image.fromarray(atlas), transforms, stats
@@ -0,0 +1,291 @@
+"""
+Asset builds from a scene file: python -m fpga_renderer build scene.toml
+
+A scene lists the models and MVP tables to build:
+
+  [build]
+  workers = 4                       # default: one per core
+  manifest = "build/manifest.json"
+
+  [[model]]
+  name = "mariostar"
+  generator = "mariostar/gen.py"    # any generator script with a main()
+  config = { SCALE = 2.5, MIPMAP = true }
+
+  [[mvp]]
+  name = "cube_mvp"
+  output = "build/cube_mvp.sv"
+  num_frames = 64
+  cam_pos = [0.0, 7.5, 10.0]
+
+Paths are relative to the scene file. A model job imports its generator as a
+module, overrides the named constants (unknown names, and in a cached
+generator names its output_config() does not key on, are errors), and runs
+its main() from the generator's own directory, so INPUT_DIR / OUTPUT_DIR and
+the other relative paths mean what they do when the script is run by hand.
+An MVP job calls fpga_renderer.mvp.mvp_table() with the remaining keys.
+
+Jobs run in a process pool, one fresh process per job (generators keep
+state in module globals). The manifest records, per job, its status, wall
+time, log file and every file it wrote (size and SHA-256); the build cache
+(fpga_renderer.cache) is shared, so unchanged jobs only restore outputs.
+--profile traces each job's stages (fpga_renderer.profiling) and adds the
+per-stage totals to its manifest entry.
+"""
+
+import contextlib
+import importlib.util
+import json
+import os
+import sys
+import time
+import tomllib
+import traceback
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from fpga_renderer import profiling
+from fpga_renderer.cache import file_digest
+from fpga_renderer.mvp import mvp_table, write_mvp_table
+
+MANIFEST_VERSION = 1
+DEFAULT_MANIFEST = "build_manifest.json"
+
+# Overridable in any generator: they say whether / where, not what, it writes
+UNKEYED_CONFIG = ("USE_CACHE", "OUTPUT_DIR")
+
+# Not outputs, even when touched during a job
+_SKIP_DIRS = {"__pycache__", ".build_cache", "input"}
+
+
+# ==============================================================================
+# 1. SCENE FILES
+# ==============================================================================
+def load_scene(path):
+    """Parses a scene file into (settings, jobs); every job dict has 'kind' and 'name'."""
+    with open(path, "rb") as f:
+        scene = tomllib.load(f)
+    base = os.path.dirname(os.path.abspath(path))
+
+    settings = dict(scene.get("build", {}))
+    settings['manifest'] = os.path.normpath(os.path.join(base, settings.get("manifest", DEFAULT_MANIFEST)))
+
+    jobs = []
+    for model in scene.get("model", []):
+        if "generator" not in model:
+            raise ValueError(f"model {model.get('name', '?')!r} has no generator")
+        jobs.append({'kind': "model",
+                     'name': model.get('name', os.path.basename(os.path.dirname(model['generator']))),
+                     'generator': os.path.normpath(os.path.join(base, model['generator'])),
+                     'config': dict(model.get('config', {}))})
+    for table in scene.get("mvp", []):
+        table = dict(table)
+        name = table.pop('name', "mvp")
+        if "output" not in table:
+            raise ValueError(f"mvp {name!r} has no output")
+        jobs.append({'kind': "mvp", 'name': name,
+                     'output': os.path.normpath(os.path.join(base, table.pop('output'))),
+                     'settings': table})
+
+    names = [job['name'] for job in jobs]
+    duplicates = sorted({n for n in names if names.count(n) > 1})
+    if duplicates:
+        raise ValueError(f"duplicate job names: {', '.join(duplicates)}")
+    return settings, jobs
+
+
+# ==============================================================================
+# 2. JOBS
+# ==============================================================================
+def load_generator(path, name):
+    """Imports a generator script as a module (its __main__ block does not run)."""
+    spec = importlib.util.spec_from_file_location(f"fpga_renderer_job_{name}", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    if not hasattr(module, "main"):
+        raise AttributeError(f"{path} has no main()")
+    return module
+
+
+def apply_config(module, config):
+    """
+    Overrides the generator's constants; TOML arrays become tuples or arrays
+    where the default is one. A cached generator's output_config() lists the
+    constants its output key covers, and only those (plus UNKEYED_CONFIG) may
+    be overridden: anything else would restore stale outputs from the cache.
+    """
+    keyed = set(module.output_config()) | set(UNKEYED_CONFIG) if hasattr(module, "output_config") else None
+    for key, value in config.items():
+        if not hasattr(module, key):
+            raise KeyError(f"{module.__file__} has no constant {key}")
+        if keyed is not None and key not in keyed:
+            raise KeyError(f"{module.__file__}: {key} is not in its output_config(), so the build cache "
+                           f"would ignore it")
+        default = getattr(module, key)
+        if isinstance(value, list) and isinstance(default, tuple):
+            value = tuple(value)
+        elif isinstance(value, list) and isinstance(default, np.ndarray):
+            value = np.array(value, dtype=default.dtype)
+        setattr(module, key, value)
+
+
+def _written_since(root, start):
+    """Files under root modified at or after start (absolute paths, sorted)."""
+    found = []
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames[:] = [d for d in dirnames if d not in _SKIP_DIRS and not d.startswith(".")]
+        for n in filenames:
+            path = os.path.join(dirpath, n)
+            if os.path.getmtime(path) >= start:
+                found.append(path)
+    return sorted(found)
+
+
+def _run_model(job, no_cache=False):
+    workdir = os.path.dirname(job['generator'])
+    os.chdir(workdir)
+    module = load_generator(job['generator'], job['name'])
+    apply_config(module, job['config'])
+    if no_cache and hasattr(module, "USE_CACHE"):
+        module.USE_CACHE = False
+    module.main()
+    # Generators with an OUTPUT_DIR only write there; the others write next to themselves
+    return os.path.abspath(getattr(module, "OUTPUT_DIR", workdir))
+
+
+def _run_mvp(job, no_cache=False):
+    os.makedirs(os.path.dirname(job['output']), exist_ok=True)
+    write_mvp_table(job['output'], mvp_table(**job['settings']))
+    print(f"Saved {job['output']}")
+    return None
+
+
+def run_job(job, log_dir, profile_dir=None, profile_stage=None, no_cache=False):
+    """
+    Runs one job, stdout and stderr to <log_dir>/<name>.log. Returns its
+    manifest entry. With profile_dir, the job's stages are traced to
+    <profile_dir>/<name>.json (see fpga_renderer.profiling).
+    """
+    os.makedirs(log_dir, exist_ok=True)
+    log_path = os.path.join(log_dir, f"{job['name']}.log")
+    if profile_dir:
+        os.makedirs(profile_dir, exist_ok=True)
+        profiling.enable(profile_stage, os.path.join(profile_dir, job['name']))
+    run = _run_model if job['kind'] == "model" else _run_mvp
+    # File mtimes can be coarser than time.time(): back off a little
+    start = time.time() - 1.0
+    t0 = time.perf_counter()
+    status, error, out_dir = "ok", None, None
+    with open(log_path, "w") as log, contextlib.redirect_stdout(log), contextlib.redirect_stderr(log):
+        try:
+            with profiling.stage("total"):
+                out_dir = run(job, no_cache)
+        except BaseException as e:  # SystemExit from a generator's sys.exit() too
+            status, error = "failed", f"{type(e).__name__}: {e}"
+            traceback.print_exc()
+    seconds = time.perf_counter() - t0
+
+    written = [job['output']] if job['kind'] == "mvp" else []
+    if out_dir is not None and os.path.isdir(out_dir):
+        written = _written_since(out_dir, start)
+    files = [{'path': p, 'bytes': os.path.getsize(p), 'sha256': file_digest(p)}
+             for p in written if os.path.exists(p) and p != log_path]
+    entry = {'name': job['name'], 'kind': job['kind'], 'status': status,
+             'seconds': round(seconds, 3), 'log': log_path, 'files': files}
+    if error:
+        entry['error'] = error
+    if profile_dir:
+        entry['profile'] = profiling.write_trace(os.path.join(profile_dir, f"{job['name']}.json"),
+                                                 job.get('generator', job.get('output')))
+        entry['stages'] = profiling.totals()
+        profiling.disable()
+    return entry
+
+
+# ==============================================================================
+# 3. BUILD
+# ==============================================================================
+def build(scene_path, workers=None, only=None, profile=False, profile_stage=None, no_cache=False):
+    """
+    Runs every job of the scene (or those named in only) and writes the
+    manifest. Returns the manifest dict; manifest['ok'] is False if a job failed.
+    profile: trace every job's stages to <manifest dir>/profile/<name>.json.
+    """
+    settings, jobs = load_scene(scene_path)
+    if only:
+        unknown = set(only) - {job['name'] for job in jobs}
+        if unknown:
+            raise KeyError(f"no such jobs: {', '.join(sorted(unknown))}")
+        jobs = [job for job in jobs if job['name'] in only]
+    workers = workers or settings.get('workers') or os.cpu_count()
+    manifest_path = settings['manifest']
+    log_dir = os.path.join(os.path.dirname(manifest_path), "logs")
+    profile_dir = os.path.join(os.path.dirname(manifest_path), "profile") if profile else None
+
+    t0 = time.perf_counter()
+    entries = []
+    # A fresh process per job: generators keep their config in module globals
+    with ProcessPoolExecutor(max_workers=min(workers, max(1, len(jobs))), max_tasks_per_child=1) as pool:
+        futures = [pool.submit(run_job, job, log_dir, profile_dir, profile_stage, no_cache) for job in jobs]
+        for job, future in zip(jobs, futures):
+            entry = future.result()
+            entries.append(entry)
+            print(f"  {entry['status']:<6} {entry['name']:<20} {entry['seconds']:>8.2f} s  "
+                  f"{len(entry['files'])} files")
+
+    manifest = {
+        'version': MANIFEST_VERSION,
+        'scene': os.path.abspath(scene_path),
+        'manifest': manifest_path,
+        'workers': workers,
+        'seconds': round(time.perf_counter() - t0, 3),
+        'job_seconds': round(sum(e['seconds'] for e in entries), 3),
+        'ok': all(e['status'] == "ok" for e in entries),
+        'jobs': entries,
+    }
+    os.makedirs(os.path.dirname(manifest_path), exist_ok=True)
+    with open(manifest_path, "w") as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+
+def _print_stage_table(entries):
+    """Seconds per job and stage, one column per stage name."""
+    names = []
+    for e in entries:
+        names += [n for n in e.get('stages', {}) if n not in names and n != "total"]
+    print(f"  {'Job':<20}" + "".join(f"{n:>11}" for n in names) + f"{'total':>11}")
+    for e in entries:
+        stages = e.get('stages', {})
+        cells = [f"{stages[n]['seconds']:>11.3f}" if n in stages else f"{'-':>11}" for n in names + ["total"]]
+        print(f"  {e['name']:<20}" + "".join(cells))
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(prog="python -m fpga_renderer")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p = sub.add_parser("build", help="build the models and MVP tables of a scene file")
+    p.add_argument("scene", help="scene .toml")
+    p.add_argument("-j", "--workers", type=int, default=None, help="processes (default: scene / cores)")
+    p.add_argument("--only", nargs="+", metavar="NAME", help="build only these jobs")
+    p.add_argument("--profile", action="store_true", help="trace every job's stages (manifest dir / profile)")
+    p.add_argument("--profile-stage", default=None, metavar="STAGE",
+                   help="also run STAGE under cProfile in every job and dump its pstats")
+    p.add_argument("--no-cache", action="store_true", help="ignore the build cache")
+    args = parser.parse_args(argv)
+
+    manifest = build(args.scene, args.workers, args.only, args.profile or bool(args.profile_stage),
+                     args.profile_stage, args.no_cache)
+    print(f"Built {len(manifest['jobs'])} jobs in {manifest['seconds']:.2f} s "
+          f"({manifest['job_seconds']:.2f} s of job time, {manifest['workers']} workers)")
+    if args.profile or args.profile_stage:
+        _print_stage_table(manifest['jobs'])
+    print(f"Manifest: {manifest['manifest']}")
+    if not manifest['ok']:
+        failed = [e['name'] for e in manifest['jobs'] if e['status'] != "ok"]
+        print(f"FAILED: {', '.join(failed)}", file=sys.stderr)
+        return 1
+    return 0
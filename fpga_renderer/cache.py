@@ -0,0 +1,195 @@
+"""
+On-disk build cache for the asset generators.
+
+Each stage of a build (parse the OBJ, build the atlas, write the outputs) is
+stored under a key: a SHA-256 over the stage name, the bytes of its input
+files, its config constants and the keys of the stages it depends on. A
+changed input or constant only changes the keys downstream of it, so only
+those stages run again.
+
+Two kinds of entries:
+  cached_arrays   parsed data as .npy files (loaded memory-mapped) + meta.json
+  cached_outputs  copies of finished output files (.mem, .png)
+
+Entries are directories named after their key. Their mtime is refreshed on
+every hit, and evict() drops the stale or least recently used ones.
+"""
+
+import glob
+import hashlib
+import json
+import os
+import shutil
+import time
+
+import numpy as np
+
+REPO_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+CACHE_DIR = os.environ.get("FPGA_RENDERER_CACHE", os.path.join(REPO_DIR, ".build_cache"))
+
+# Bump when the on-disk layout changes
+CACHE_VERSION = 1
+
+MAX_CACHE_BYTES = 1 << 30
+MAX_CACHE_AGE_DAYS = 30
+
+_HASH_BLOCK = 1 << 20
+_library_digest = None
+
+
+# ==============================================================================
+# 1. KEYS
+# ==============================================================================
+def file_digest(path):
+    """SHA-256 of a file's bytes ("missing" if it does not exist)."""
+    if not os.path.exists(path):
+        return "missing"
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(_HASH_BLOCK), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def library_digest():
+    """Digest of the fpga_renderer sources, so library changes invalidate every entry."""
+    global _library_digest
+    if _library_digest is None:
+        h = hashlib.sha256()
+        for path in sorted(glob.glob(os.path.join(os.path.dirname(__file__), "*.py"))):
+            h.update(file_digest(path).encode())
+        _library_digest = h.hexdigest()
+    return _library_digest
+
+
+def make_key(stage, files=(), config=None, parents=()):
+    """Cache key for one stage: its input file contents, config constants and parent keys."""
+    h = hashlib.sha256()
+    h.update(f"{CACHE_VERSION}:{stage}:{library_digest()}".encode())
+    for path in files:
+        h.update(f"{os.path.basename(path)}={file_digest(path)}".encode())
+    for name, value in sorted((config or {}).items()):
+        h.update(f"{name}={value!r}".encode())
+    for parent in parents:
+        h.update(parent.encode())
+    return f"{stage}-{h.hexdigest()[:32]}"
+
+
+# ==============================================================================
+# 2. ENTRIES
+# ==============================================================================
+def _entry(key, cache_dir):
+    return os.path.join(cache_dir or CACHE_DIR, key)
+
+
+def _touch(path):
+    now = time.time()
+    os.utime(path, (now, now))
+
+
+def _commit(tmp, path):
+    """Moves a finished temp entry into place (another build may have won the race)."""
+    try:
+        os.replace(tmp, path)
+    except OSError:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+def _load_arrays(path):
+    """(arrays, meta) of a finished entry, or None if there is none."""
+    meta_path = os.path.join(path, "meta.json")
+    if not os.path.exists(meta_path):
+        return None
+    with open(meta_path) as f:
+        meta = json.load(f)
+    arrays = {name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode="c")
+              for name in meta.pop("_arrays")}
+    return arrays, meta
+
+
+def cached_arrays(key, build, cache_dir=None):
+    """
+    Returns (arrays, meta) for key. On a miss, build() is called and must return
+    (dict of np arrays, JSON-able meta dict). Either way the arrays are memory-
+    mapped copy-on-write from the entry, so callers may modify them in place
+    and the built arrays (and any temp files behind them) can be released.
+    """
+    path = _entry(key, cache_dir)
+    hit = _load_arrays(path)
+    if hit is not None:
+        _touch(path)
+        return hit
+
+    arrays, meta = build()
+
+    tmp = f"{path}.tmp{os.getpid()}"
+    os.makedirs(tmp, exist_ok=True)
+    for name, arr in arrays.items():
+        np.save(os.path.join(tmp, f"{name}.npy"), arr)
+    with open(os.path.join(tmp, "meta.json"), "w") as f:
+        json.dump(dict(meta, _arrays=list(arrays)), f)
+    _commit(tmp, path)
+    return _load_arrays(path) or (arrays, meta)
+
+
+def cached_outputs(key, paths, build, cache_dir=None):
+    """
+    Restores the files in paths from the entry for key. On a miss, build() is
+    called to write them and copies are stored. Returns True on a hit.
+    """
+    path = _entry(key, cache_dir)
+    names = [os.path.basename(p) for p in paths]
+    if all(os.path.exists(os.path.join(path, n)) for n in names):
+        for n, dst in zip(names, paths):
+            if os.path.dirname(dst):
+                os.makedirs(os.path.dirname(dst), exist_ok=True)
+            shutil.copyfile(os.path.join(path, n), dst)
+        _touch(path)
+        return True
+
+    build()
+
+    tmp = f"{path}.tmp{os.getpid()}"
+    os.makedirs(tmp, exist_ok=True)
+    for n, src in zip(names, paths):
+        shutil.copyfile(src, os.path.join(tmp, n))
+    _commit(tmp, path)
+    return False
+
+
+# ==============================================================================
+# 3. EVICTION
+# ==============================================================================
+def _dir_size(path):
+    total = 0
+    for root, _, files in os.walk(path):
+        for n in files:
+            total += os.path.getsize(os.path.join(root, n))
+    return total
+
+
+def evict(max_bytes=MAX_CACHE_BYTES, max_age_days=MAX_CACHE_AGE_DAYS, cache_dir=None):
+    """
+    Drops entries unused for max_age_days, then the least recently used ones
+    until the cache fits in max_bytes. Returns the number of entries removed.
+    """
+    cache_dir = cache_dir or CACHE_DIR
+    if not os.path.isdir(cache_dir):
+        return 0
+
+    entries = []
+    for e in os.scandir(cache_dir):
+        if e.is_dir() and ".tmp" not in e.name:
+            entries.append((e.stat().st_mtime, _dir_size(e.path), e.path))
+    entries.sort()  # oldest first
+
+    cutoff = time.time() - max_age_days * 86400
+    total = sum(size for _, size, _ in entries)
+    removed = 0
+    for mtime, size, path in entries:
+        if mtime >= cutoff and total <= max_bytes:
+            break
+        shutil.rmtree(path, ignore_errors=True)
+        total -= size
+        removed += 1
+    return removed
@@ -0,0 +1,291 @@
+"""
+Quadric error decimation down to a BRAM budget.
+
+Garland-Heckbert quadrics with half-edge collapses: a vertex is always merged
+into one of its neighbours, so surviving vertices keep their original
+positions and UV indices and no new texture coordinates are invented. The
+per-vertex quadrics and the initial edge costs are built with array math;
+the collapses run from a heap whose stale entries are skipped by version
+stamps.
+
+Seams and material borders are respected through "wedges": the corners of a
+vertex grouped by (UV index, material). A vertex may only collapse along an
+edge that has a face in each of its wedges, so every wedge knows which UV of
+the target to take. Interior vertices (one wedge) collapse freely, seam
+vertices only slide along their seam, and seam corners stay put. Open-border
+vertices only slide along the border, and non-manifold vertices are never
+moved. A collapse is also rejected if it would break manifoldness (link
+condition) or flip a neighbouring face.
+"""
+
+import heapq
+
+import numpy as np
+
+from fpga_renderer.encode import EOS_COUNT
+from fpga_renderer.geometry_model import WORDS_PER_VERTEX
+
+
+# ==============================================================================
+# 1. BUDGET
+# ==============================================================================
+def faces_for_lines(max_lines):
+    """Largest triangle count whose flat vertex stream (EOS included) fits in max_lines."""
+    return max(0, (max_lines - EOS_COUNT) // (3 * WORDS_PER_VERTEX))
+
+
+def faces_for_indexed_lines(max_lines, faces, unique_vertices):
+    """
+    Largest triangle count whose indexed pair (fpga_renderer.indexed: unique
+    vertices, one index word per triangle, both EOS blocks) fits in max_lines,
+    if the unique vertices per face stay at unique_vertices / faces.
+    """
+    lines_per_face = WORDS_PER_VERTEX * unique_vertices / max(faces, 1) + 1
+    return max(0, int((max_lines - EOS_COUNT - 1) // lines_per_face))
+
+
+# ==============================================================================
+# 2. SETUP (vectorized)
+# ==============================================================================
+def face_quadrics(positions, face_verts):
+    """Area-weighted plane quadric of every face: (F, 4, 4)."""
+    p = positions[face_verts]
+    n = np.cross(p[:, 1] - p[:, 0], p[:, 2] - p[:, 0])
+    length = np.linalg.norm(n, axis=1)
+    unit = n / np.where(length > 0, length, 1.0)[:, None]
+    plane = np.concatenate([unit, -(unit * p[:, 0]).sum(axis=1, keepdims=True)], axis=1)
+    return (0.5 * length)[:, None, None] * plane[:, :, None] * plane[:, None, :]
+
+
+# Upper triangle of the symmetric 4x4 quadric, off-diagonal terms doubled, so
+# the error of v = (x, y, z, 1) is dot(q, _monomials(v)) over 10 terms
+_TRIU = np.triu_indices(4)
+_TRIU_WEIGHT = np.where(_TRIU[0] == _TRIU[1], 1.0, 2.0)
+
+
+def vertex_quadrics(positions, face_verts):
+    """Sum of the quadrics of the faces around each vertex: (V, 10) coefficients."""
+    q = np.zeros((len(positions), 4, 4))
+    kf = face_quadrics(positions, face_verts)
+    for c in range(3):
+        np.add.at(q, face_verts[:, c], kf)
+    return q[:, _TRIU[0], _TRIU[1]] * _TRIU_WEIGHT
+
+
+def unique_edges(n_verts, face_verts):
+    """(E, 2) undirected edges (low, high) and how many faces use each."""
+    edges = np.sort(face_verts[:, [0, 1, 1, 2, 2, 0]].reshape(-1, 2), axis=1)
+    keys, count = np.unique(edges[:, 0] * n_verts + edges[:, 1], return_counts=True)
+    return np.stack([keys // n_verts, keys % n_verts], axis=1), count
+
+
+def edge_flags(n_verts, edges, count):
+    """(border, locked) vertex masks: on an open edge, on a non-manifold edge."""
+    border = np.zeros(n_verts, dtype=bool)
+    locked = np.zeros(n_verts, dtype=bool)
+    border[edges[count == 1].ravel()] = True
+    locked[edges[count > 2].ravel()] = True
+    return border, locked
+
+
+def _monomials(p):
+    v = np.concatenate([p, np.ones((len(p), 1))], axis=1)
+    return v[:, _TRIU[0]] * v[:, _TRIU[1]]
+
+
+def _costs(q, positions, src, dst):
+    """Error of moving each src vertex onto its dst neighbour (vectorized)."""
+    return ((q[src] + q[dst]) * _monomials(positions[dst])).sum(axis=1)
+
+
+def _cost(qa, qb, p):
+    """Scalar _costs for one half-edge, for the collapse loop."""
+    x, y, z = p
+    a0, a1, a2, a3, a4, a5, a6, a7, a8, a9 = qa
+    b0, b1, b2, b3, b4, b5, b6, b7, b8, b9 = qb
+    return (x * ((a0 + b0) * x + (a1 + b1) * y + (a2 + b2) * z + a3 + b3) +
+            y * ((a4 + b4) * y + (a5 + b5) * z + a6 + b6) +
+            z * ((a7 + b7) * z + a8 + b8) + a9 + b9)
+
+
+# ==============================================================================
+# 3. COLLAPSE
+# ==============================================================================
+def decimate(positions, face_verts, target_faces, face_uvs=None, face_mats=None):
+    """
+    Collapses edges until at most target_faces triangles remain (or no legal
+    collapse is left).
+
+    positions:  (V, 3) floats
+    face_verts: (F, 3) vertex indices
+    face_uvs:   optional (F, 3) UV indices (kept per corner, seams respected)
+    face_mats:  optional (F,) material ids (boundaries respected)
+
+    Returns a dict with compacted 'positions', 'face_verts', 'face_uvs',
+    'face_mats' (None if not given), 'face_ids' (the surviving input faces)
+    and 'reached' (whether target_faces was met).
+    """
+    positions = np.asarray(positions, dtype=np.float64)
+    face_verts = np.asarray(face_verts, dtype=np.int64)
+    n_verts = len(positions)
+
+    # Plain lists: the collapse loop touches a handful of items at a time
+    F = face_verts.tolist()
+    U = None if face_uvs is None else np.asarray(face_uvs, dtype=np.int64).tolist()
+    M = [0] * len(F) if face_mats is None else np.asarray(face_mats).tolist()
+    alive = [True] * len(F)
+    n_alive = len(F)
+
+    if n_alive > target_faces:
+        P = positions.tolist()
+        q = vertex_quadrics(positions, face_verts)
+        edges, count = unique_edges(n_verts, face_verts)
+        border, locked = edge_flags(n_verts, edges, count)
+        border, locked = border.tolist(), locked.tolist()
+        removed = [False] * n_verts
+        stuck = [False] * n_verts
+        version = [0] * n_verts
+
+        vert_faces = [set() for _ in range(n_verts)]
+        for f, tri in enumerate(F):
+            for v in tri:
+                vert_faces[v].add(f)
+
+        def ring(v):
+            return {w for f in vert_faces[v] for w in F[f]} - {v}
+
+        def plan(a, b, ring_a):
+            """(shared faces, {moved face: new UV index}) for a -> b, or None if illegal."""
+            shared = vert_faces[a] & vert_faces[b]
+            if not shared or (border[a] and len(shared) != 1):
+                return None
+            # Wedges of a: each must see b through a face on this edge
+            wedge_uv = {}
+            for f in shared:
+                tri = F[f]
+                wedge_uv[(U[f][tri.index(a)] if U else 0, M[f])] = U[f][tri.index(b)] if U else 0
+            moved = {}
+            for f in vert_faces[a] - shared:
+                wedge = (U[f][F[f].index(a)] if U else 0, M[f])
+                if wedge not in wedge_uv:
+                    return None
+                moved[f] = wedge_uv[wedge]
+            if not _link_ok(F, vert_faces, ring_a, b, shared) or not _no_flip(P, F, moved, a, b):
+                return None
+            return shared, moved
+
+        # One heap entry per movable vertex, keyed by its cheapest target
+        half = np.concatenate([edges, edges[:, ::-1]])
+        costs = _costs(q, positions, half[:, 0], half[:, 1])
+        order = np.lexsort((costs, half[:, 0]))
+        first = order[np.r_[True, half[order[1:], 0] != half[order[:-1], 0]]]
+        key = [np.inf] * n_verts
+        target = [-1] * n_verts
+        for v, t, c in zip(half[first, 0].tolist(), half[first, 1].tolist(), costs[first].tolist()):
+            key[v], target[v] = c, t
+        heap = [(c, v, 0) for v, c in enumerate(key) if c < np.inf and not locked[v]]
+        heapq.heapify(heap)
+        Q = q.tolist()
+
+        while heap and n_alive > target_faces:
+            _, a, va = heapq.heappop(heap)
+            if removed[a] or va != version[a]:
+                continue
+
+            # Cheapest legal target of a; if it is not the cheapest collapse
+            # left (a was blocked, or its key is out of date), requeue a
+            ring_a = ring(a)
+            candidates = sorted((_cost(Q[a], Q[b], P[b]), b) for b in ring_a)
+            if not candidates:
+                continue
+            for cost, b in candidates:
+                step = plan(a, b, ring_a)
+                if step is not None:
+                    break
+            else:
+                stuck[a] = True  # until its neighbourhood changes
+                continue
+            if heap and cost > heap[0][0]:
+                key[a], target[a] = cost, b
+                heapq.heappush(heap, (cost, a, va))
+                continue
+
+            shared, moved = step
+            for f, uv in moved.items():
+                j = F[f].index(a)
+                F[f][j] = b
+                if U:
+                    U[f][j] = uv
+            for f in shared:
+                alive[f] = False
+                for v in F[f]:
+                    vert_faces[v].discard(f)
+            vert_faces[b] |= moved.keys()
+            vert_faces[a] = set()
+            n_alive -= len(shared)
+
+            removed[a] = True
+            border[b] = border[b] or border[a]
+            Q[b] = [x + y for x, y in zip(Q[b], Q[a])]
+
+            # Only edges into and out of b got new costs, and stuck vertices
+            # around b may have become movable: refresh the keys that depend
+            # on a or b and requeue whatever changed
+            around = ring(b)
+            for v in around | {b}:
+                if locked[v]:
+                    continue
+                if v == b or target[v] in (a, b):
+                    cost, t = min(((_cost(Q[v], Q[w], P[w]), w) for w in ring(v)), default=(None, -1))
+                    if t < 0:
+                        continue  # no faces left around v
+                else:
+                    cost, t = _cost(Q[v], Q[b], P[b]), b
+                    if cost >= key[v]:
+                        if not stuck[v]:
+                            continue
+                        cost, t = key[v], target[v]
+                stuck[v] = False
+                key[v], target[v] = cost, t
+                version[v] += 1
+                heapq.heappush(heap, (cost, v, version[v]))
+
+    # Compact: surviving faces, used vertices only
+    face_ids = np.flatnonzero(alive)
+    kept = np.array(F, dtype=np.int64).reshape(-1, 3)[face_ids]
+    used, remap = np.unique(kept, return_inverse=True)
+    return {
+        'positions': positions[used],
+        'face_verts': remap.reshape(-1, 3),
+        'face_uvs': None if U is None else np.array(U, dtype=np.int64).reshape(-1, 3)[face_ids],
+        'face_mats': None if face_mats is None else np.asarray(face_mats)[face_ids],
+        'face_ids': face_ids,
+        'reached': len(face_ids) <= target_faces,
+    }
+
+
+def _link_ok(F, vert_faces, ring_a, b, shared):
+    """Link condition: a and b may only share the neighbours opposite the edge."""
+    common = {v for f in vert_faces[b] for v in F[f] if v in ring_a}
+    common.discard(b)
+    opposite = {v for f in shared for v in F[f]}
+    return common <= opposite
+
+
+def _no_flip(P, F, moved, a, b):
+    """Faces that move with a must keep their orientation and not collapse to zero area."""
+    for f in moved:
+        p = [P[v] for v in F[f]]
+        n0 = _normal(p)
+        p[F[f].index(a)] = P[b]
+        n1 = _normal(p)
+        if n0[0] * n1[0] + n0[1] * n1[1] + n0[2] * n1[2] <= 1e-12 * (n0[0] ** 2 + n0[1] ** 2 + n0[2] ** 2):
+            return False
+    return True
+
+
+def _normal(p):
+    (x0, y0, z0), (x1, y1, z1), (x2, y2, z2) = p
+    ux, uy, uz = x1 - x0, y1 - y0, z1 - z0
+    vx, vy, vz = x2 - x0, y2 - y0, z2 - z0
+    return (uy * vz - uz * vy, uz * vx - ux * vz, ux * vy - uy * vx)
@@ -0,0 +1,126 @@
+"""
+Bulk encoders for the $readmemh files the FPGA loads.
+
+Every value is converted in NumPy and the text is built as one uint8 array
+(hex digits looked up from a table), so a whole .mem file is a single write.
+The output matches the old per-scalar helpers byte for byte:
+
+    scaled = int(val * 65536.0)              # truncates toward zero
+    if scaled < 0: scaled = (1 << 32) + scaled
+    f"{scaled & 0xFFFFFFFF:08X}"
+"""
+
+import numpy as np
+
+_HEX_UPPER = np.frombuffer(b"0123456789ABCDEF", dtype=np.uint8)
+_HEX_LOWER = np.frombuffer(b"0123456789abcdef", dtype=np.uint8)
+_NL = ord("\n")
+
+# End-of-stream sentinel the geometry engine stops on
+EOS_WORD = 0xFFFFFFFF
+EOS_COUNT = 5
+
+
+# ==============================================================================
+# 1. FIXED POINT
+# ==============================================================================
+def q16_16(values):
+    """Float array -> uint32 two's-complement Q16.16 words (same shape)."""
+    scaled = (np.asarray(values) * 65536.0).astype(np.int64)  # truncates like int()
+    return (scaled & 0xFFFFFFFF).astype(np.uint32)
+
+
+# ==============================================================================
+# 2. HEX TEXT
+# ==============================================================================
+def hex_lines(words, digits=8, upper=True):
+    """Unsigned words -> b"XXXXXXXX\\n" * N, zero padded to `digits` hex digits."""
+    words = np.asarray(words).astype(np.uint64).ravel()
+    shifts = np.arange(digits - 1, -1, -1, dtype=np.uint64) * np.uint64(4)
+    nibbles = (words[:, None] >> shifts) & np.uint64(0xF)
+
+    text = np.empty((len(words), digits + 1), dtype=np.uint8)
+    text[:, :digits] = (_HEX_UPPER if upper else _HEX_LOWER)[nibbles]
+    text[:, digits] = _NL
+    return text.tobytes()
+
+
+# ==============================================================================
+# 3. VERTEX STREAM
+# ==============================================================================
+def vertex_words(xyz, uv):
+    """
+    (N, 3) positions + (N, 2) uvs -> (N, 5) uint32 words in stream order
+    X, Y, Z, U, V. Leading dims are flattened, so (F, 3, 3) per-corner arrays
+    work too.
+    """
+    xyz = np.asarray(xyz)
+    uv = np.asarray(uv)
+    # Convert separately so each keeps its own float dtype
+    return np.concatenate([q16_16(xyz.reshape(-1, xyz.shape[-1])[:, :3]),
+                           q16_16(uv.reshape(-1, 2))], axis=1)
+
+
+def format_vertex_stream(xyz, uv, header="", eos_comment="// EOS\n"):
+    """Full vertex .mem text: header, 5 words per vertex, then the EOS block."""
+    body = hex_lines(vertex_words(xyz, uv))
+    eos = hex_lines(np.full(EOS_COUNT, EOS_WORD, dtype=np.uint32))
+    return header.encode() + body + eos_comment.encode() + eos
+
+
+def write_vertex_mem(path, xyz, uv, header="", eos_comment="// EOS\n"):
+    """Writes a vertex .mem file with a single write. Returns the number of data lines."""
+    with open(path, "wb") as f:
+        f.write(format_vertex_stream(xyz, uv, header, eos_comment))
+    return len(np.asarray(uv).reshape(-1, 2)) * 5
+
+
+# ==============================================================================
+# 4. TEXTURES (RGB444)
+# ==============================================================================
+def rgb444(pixels):
+    """(..., 3) 8-bit RGB -> (...) 12-bit words 0xRGB, keeping the top 4 bits of each channel."""
+    px = np.asarray(pixels).astype(np.uint16)
+    return ((px[..., 0] >> 4) << 8) | ((px[..., 1] >> 4) << 4) | (px[..., 2] >> 4)
+
+
+def texture_words(image, blackout_from_row=None):
+    """
+    PIL image or (H, W, 3) array -> (H*W,) RGB444 words in raster order.
+    Rows from blackout_from_row down are written as black.
+    """
+    if hasattr(image, "convert"):
+        image = image.convert("RGB")
+    words = rgb444(np.asarray(image))
+    if blackout_from_row is not None:
+        words[blackout_from_row:] = 0
+    return words.ravel()
+
+
+def write_texture_mem(path, images, upper=True, blackout_from_row=None):
+    """
+    Writes one or more texture pages to a single .mem file (3 hex digits per
+    texel, pages back to back) with one write. `images` is an image, an
+    (H, W, 3) array, a list of either, or an (N, H, W, 3) stack.
+    Returns the number of lines written.
+    """
+    if hasattr(images, "convert") or (isinstance(images, np.ndarray) and images.ndim == 3):
+        images = [images]
+    words = np.concatenate([texture_words(img, blackout_from_row) for img in images])
+    with open(path, "wb") as f:
+        f.write(hex_lines(words, digits=3, upper=upper))
+    return len(words)
+
+
+# ==============================================================================
+# 5. READING
+# ==============================================================================
+def read_hex_words(path, depth=None):
+    """
+    Parses a $readmemh file into a uint32 array: '//' comments are skipped,
+    '@addr' jumps to a word address, and unwritten gaps read as 0. If depth is
+    given, words past it are dropped like the simulator does. The file is
+    memory-mapped and parsed by fpga_renderer.memimage.
+    """
+    from fpga_renderer.memimage import read_mem
+    return read_mem(path)[:depth].astype(np.uint32)
@@ -0,0 +1,85 @@
+"""
+Bit-exact NumPy versions of the fixed-point primitives used by the RTL.
+
+All functions take and return int64 arrays holding the signed 32-bit value of
+a Verilog register, so results can be compared directly with waveforms or
+$display output. Everything broadcasts, so a whole (frames, vertices) grid is
+evaluated in one call.
+"""
+
+import numpy as np
+
+_MASK32 = 0xFFFFFFFF
+_SIGN32 = 1 << 31
+
+
+# ==============================================================================
+# 1. REGISTER WIDTHS
+# ==============================================================================
+def wrap32(values):
+    """Truncates to 32 bits and reinterprets as signed (what a signed [31:0] reg holds)."""
+    v = np.asarray(values, dtype=np.int64)
+    return ((v + _SIGN32) & _MASK32) - _SIGN32
+
+
+def to_signed32(words):
+    """Unsigned 32-bit words (e.g. from a .mem file) -> signed int64 values."""
+    return wrap32(np.asarray(words, dtype=np.uint64).astype(np.int64))
+
+
+def to_unsigned32(values):
+    """Signed register values -> uint32 words, e.g. for hex dumps."""
+    return (np.asarray(values, dtype=np.int64) & _MASK32).astype(np.uint32)
+
+
+# ==============================================================================
+# 2. ARITHMETIC
+# ==============================================================================
+def mul_fix(a, b):
+    """
+    geometry_engine.mul_fix: 64-bit signed product, arithmetic shift right by
+    16, truncated to signed [31:0].
+    """
+    prod = np.asarray(a, dtype=np.int64) * np.asarray(b, dtype=np.int64)
+    return wrap32(prod >> 16)
+
+
+def restoring_div(dividend, divisor, frac_bits):
+    """
+    q16_16_div (frac_bits=16) / q2_30_div (frac_bits=30): sign-magnitude
+    restoring division, 32 iterations on a 64-bit working register.
+
+    Follows the RTL exactly, including its edge cases: the magnitudes are
+    32-bit negations (so -0x80000000 stays 0x80000000), bits shifted out of
+    the working register are lost, and a zero divisor gives an all-ones
+    magnitude.
+    """
+    a = wrap32(dividend)
+    b = wrap32(divisor)
+    sign_diff = (a < 0) != (b < 0)
+
+    abs_a = np.where(a < 0, -a, a) & _MASK32
+    abs_b = (np.where(b < 0, -b, b) & _MASK32).astype(np.uint64)
+
+    work = (abs_a.astype(np.uint64) << np.uint64(frac_bits))
+    work, abs_b = np.broadcast_arrays(work, abs_b)
+    work = work.copy()
+    low_mask = np.uint64(_MASK32)
+    for _ in range(32):
+        work <<= np.uint64(1)                    # 64-bit shift, MSB falls off
+        hi = work >> np.uint64(32)
+        ge = hi >= abs_b
+        work = np.where(ge, ((hi - abs_b) << np.uint64(32)) | (work & low_mask) | np.uint64(1), work)
+
+    quot = (work & low_mask).astype(np.int64)
+    return wrap32(np.where(sign_diff, -quot, quot))
+
+
+def q16_16_div(dividend, divisor):
+    """(dividend << 16) / divisor, as q16_16_div.v computes it."""
+    return restoring_div(dividend, divisor, 16)
+
+
+def q2_30_div(dividend, divisor):
+    """(dividend << 30) / divisor, as q2_30_div.sv computes it."""
+    return restoring_div(dividend, divisor, 30)
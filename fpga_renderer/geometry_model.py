@@ -0,0 +1,115 @@
+"""
+Bit-exact model of geometry_engine.sv.
+
+For every vertex of the stream and every frame of the MVP table this
+reproduces the register values the engine produces:
+
+  S_MATRIX_TRANSFORM  clip = sum(mul_fix(M[r*4+c], xyz[c])) + M[r*4+3]   (wraps at 32 bits)
+  S_PERSP_DIVIDE      ndc  = q16_16_div(clip, w)
+  S_VIEWPORT_MAP      x_screen = mul_fix(x_ndc + 1.0, 160.0)
+                      y_screen = mul_fix(y_ndc + 1.0, 120.0)
+                      z_screen = mul_fix(z_ndc + 1.0, 127.5),  o_z = z_screen[23:16]
+
+All arrays are (frames, vertices), so a whole asset over all 64 frames is a
+handful of vectorized operations.
+"""
+
+import os
+import re
+
+import numpy as np
+
+from fpga_renderer.encode import read_hex_words
+from fpga_renderer.fixed_point import wrap32, to_signed32, mul_fix, q16_16_div
+
+REPO_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+RTL_DIR = os.path.join(REPO_DIR, "sources_1", "new")
+MVP_LUTRAM_FILE = os.path.join(RTL_DIR, "mvp_lutram.sv")
+VERTEX_MEM_FILE = os.path.join(RTL_DIR, "vertex_data.mem")
+
+# simple_bram in geometry_engine: ADDR_WIDTH = 10
+VERTEX_BRAM_DEPTH = 1 << 10
+WORDS_PER_VERTEX = 5
+EOS_WORD = 0xFFFFFFFF
+
+ONE = 0x00010000
+VIEWPORT_X = 0x00A00000  # 160.0
+VIEWPORT_Y = 0x00780000  # 120.0
+VIEWPORT_Z = 0x007F8000  # 127.5
+
+
+# ==============================================================================
+# 1. INPUTS
+# ==============================================================================
+def load_mvp_lutram(path=MVP_LUTRAM_FILE):
+    """(frames, 16) signed MVP table parsed from the 32'hXXXXXXXX literals of mvp_lutram.sv."""
+    with open(path) as f:
+        words = re.findall(r"32'h([0-9A-Fa-f_]+)", f.read())
+    table = np.array([int(w.replace("_", ""), 16) for w in words], dtype=np.uint64)
+    return to_signed32(table).reshape(-1, 16)
+
+
+def load_vertex_stream(path=VERTEX_MEM_FILE, depth=VERTEX_BRAM_DEPTH):
+    """
+    (N, 5) signed X, Y, Z, U, V words as the engine fetches them: 5 words per
+    vertex, stopping at the first all-FFFFFFFF vertex (the EOS block).
+    """
+    words = read_hex_words(path, depth)
+    n = len(words) // WORDS_PER_VERTEX
+    verts = words[:n * WORDS_PER_VERTEX].reshape(n, WORDS_PER_VERTEX)
+
+    eos = np.flatnonzero((verts == EOS_WORD).all(axis=1))
+    if len(eos):
+        verts = verts[:eos[0]]
+    return to_signed32(verts)
+
+
+# ==============================================================================
+# 2. PIPELINE
+# ==============================================================================
+def transform(vertices, mvp):
+    """
+    Runs the engine on every (frame, vertex) pair.
+
+    vertices: (N, 5) signed words (see load_vertex_stream)
+    mvp:      (F, 16) or (16,) signed matrix words, row-major like MVP_MATRIX
+
+    Returns a dict of (F, N) int64 arrays named after the RTL registers:
+    x/y/z/w_clip, x/y/z_ndc, x/y/z_screen, plus the engine outputs o_x, o_y
+    (Q16.16 screen position), o_z (8-bit depth), o_u, o_v.
+    """
+    vertices = np.asarray(vertices, dtype=np.int64)
+    mvp = np.atleast_2d(np.asarray(mvp, dtype=np.int64))
+
+    x, y, z = (vertices[None, :, i] for i in range(3))
+    m = mvp[:, :, None]  # (F, 16, 1) broadcasts against (1, N)
+
+    clip = [wrap32(mul_fix(m[:, r * 4 + 0], x) + mul_fix(m[:, r * 4 + 1], y) +
+                   mul_fix(m[:, r * 4 + 2], z) + m[:, r * 4 + 3]) for r in range(4)]
+    x_clip, y_clip, z_clip, w_clip = clip
+
+    x_ndc = q16_16_div(x_clip, w_clip)
+    y_ndc = q16_16_div(y_clip, w_clip)
+    z_ndc = q16_16_div(z_clip, w_clip)
+
+    # The "+ 32'h00010000" sum is 32 bits wide before it reaches mul_fix
+    x_screen = mul_fix(wrap32(x_ndc + ONE), VIEWPORT_X)
+    y_screen = mul_fix(wrap32(y_ndc + ONE), VIEWPORT_Y)
+    z_screen = mul_fix(wrap32(z_ndc + ONE), VIEWPORT_Z)
+
+    shape = x_clip.shape
+    return {
+        'x_clip': x_clip, 'y_clip': y_clip, 'z_clip': z_clip, 'w_clip': w_clip,
+        'x_ndc': x_ndc, 'y_ndc': y_ndc, 'z_ndc': z_ndc,
+        'x_screen': x_screen, 'y_screen': y_screen, 'z_screen': z_screen,
+        'o_x': x_screen,
+        'o_y': y_screen,
+        'o_z': (z_screen >> 16) & 0xFF,
+        'o_u': np.broadcast_to(vertices[None, :, 3], shape),
+        'o_v': np.broadcast_to(vertices[None, :, 4], shape),
+    }
+
+
+def run_asset(vertex_mem=VERTEX_MEM_FILE, mvp_lutram=MVP_LUTRAM_FILE):
+    """Loads a vertex .mem and the MVP table and transforms all vertices for all frames."""
+    return transform(load_vertex_stream(vertex_mem), load_mvp_lutram(mvp_lutram))
@@ -0,0 +1,145 @@
+"""
+Indexed vertex buffer export.
+
+The flat format writes X, Y, Z, U, V for every corner of every triangle, so
+a shared vertex costs 5 BRAM lines each time it is used. The indexed format
+welds corners whose encoded words are identical (position and UV) into one
+vertex .mem, and describes the triangles with an index .mem holding one
+32-bit word per triangle:
+
+    {2'b00, i0[9:0], i1[9:0], i2[9:0]}    vertex numbers (address = i * 5)
+
+terminated by an all-ones word like the vertex stream's EOS. Welding is done
+on the Q16.16 words, so expanding the indices gives exactly the flat stream.
+"""
+
+import numpy as np
+
+from fpga_renderer.encode import (vertex_words, hex_lines, read_hex_words,
+                                  EOS_WORD, EOS_COUNT)
+from fpga_renderer.fixed_point import to_signed32
+from fpga_renderer.geometry_model import transform, WORDS_PER_VERTEX
+
+INDEX_BITS = 10
+MAX_INDEXED_VERTICES = 1 << INDEX_BITS
+
+
+# ==============================================================================
+# 1. WELDING
+# ==============================================================================
+def weld(words):
+    """
+    (N, 5) stream words -> (unique (U, 5) words, (N,) indices). Unique
+    vertices keep the order of their first use.
+    """
+    words = np.asarray(words)
+    _, first, inverse = np.unique(words, axis=0, return_index=True, return_inverse=True)
+    order = np.argsort(first)
+    rank = np.empty_like(order)
+    rank[order] = np.arange(len(order))
+    return words[first[order]], rank[inverse.ravel()]
+
+
+def weld_corners(xyz, uv):
+    """Per-corner positions / UVs (any leading shape, e.g. (F, 3, 3)) -> weld(vertex_words)."""
+    return weld(vertex_words(xyz, uv))
+
+
+# ==============================================================================
+# 2. INDEX WORDS
+# ==============================================================================
+def pack_indices(indices):
+    """(3T,) vertex numbers -> (T,) uint32 index words."""
+    tri = np.asarray(indices, dtype=np.uint64).reshape(-1, 3)
+    if len(tri) and tri.max() >= MAX_INDEXED_VERTICES:
+        raise ValueError(f"index {int(tri.max())} does not fit in {INDEX_BITS} bits")
+    b = np.uint64(INDEX_BITS)
+    return ((tri[:, 0] << (b * np.uint64(2))) | (tri[:, 1] << b) | tri[:, 2]).astype(np.uint32)
+
+
+def unpack_indices(index_words):
+    """(T,) index words (stopping at EOS) -> (3T,) vertex numbers."""
+    words = np.asarray(index_words, dtype=np.int64)
+    eos = np.flatnonzero(words == EOS_WORD)
+    if len(eos):
+        words = words[:eos[0]]
+    mask = MAX_INDEXED_VERTICES - 1
+    return np.stack([(words >> (2 * INDEX_BITS)) & mask,
+                     (words >> INDEX_BITS) & mask,
+                     words & mask], axis=1).ravel()
+
+
+# ==============================================================================
+# 3. FILES
+# ==============================================================================
+def write_indexed_words(vertex_path, index_path, unique, indices, header=""):
+    """
+    Writes the unique-vertex .mem (same format as write_vertex_mem, EOS
+    included) and the index .mem. Returns report().
+    """
+    with open(vertex_path, "wb") as f:
+        f.write(header.encode() + hex_lines(unique) + b"// EOS\n" +
+                hex_lines(np.full(EOS_COUNT, EOS_WORD, dtype=np.uint32)))
+    with open(index_path, "wb") as f:
+        f.write(b"// Triangle indices: {2'b00, i0[9:0], i1[9:0], i2[9:0]}\n" +
+                hex_lines(pack_indices(indices)) + b"// EOS\n" + hex_lines([EOS_WORD]))
+    return report(len(indices) // 3, len(unique))
+
+
+def write_indexed_mem(vertex_path, index_path, xyz, uv, header=""):
+    """Welds per-corner xyz / uv and writes the indexed pair. Returns report()."""
+    unique, indices = weld_corners(xyz, uv)
+    return write_indexed_words(vertex_path, index_path, unique, indices, header)
+
+
+def load_indexed(vertex_path, index_path):
+    """Reads an indexed pair back: ((U, 5) signed vertex words, (3T,) indices)."""
+    words = read_hex_words(vertex_path)
+    n = len(words) // WORDS_PER_VERTEX
+    verts = words[:n * WORDS_PER_VERTEX].reshape(n, WORDS_PER_VERTEX)
+    eos = np.flatnonzero((verts == EOS_WORD).all(axis=1))
+    if len(eos):
+        verts = verts[:eos[0]]
+    return to_signed32(verts), unpack_indices(read_hex_words(index_path))
+
+
+# ==============================================================================
+# 4. MEMORY REPORT
+# ==============================================================================
+def report(triangles, unique_vertices):
+    """BRAM lines of the flat format vs the indexed pair (EOS blocks included)."""
+    flat = triangles * 3 * WORDS_PER_VERTEX + EOS_COUNT
+    vertex_lines = unique_vertices * WORDS_PER_VERTEX + EOS_COUNT
+    index_lines = triangles + 1
+    indexed = vertex_lines + index_lines
+    return {
+        'triangles': triangles,
+        'unique_vertices': unique_vertices,
+        'flat_lines': flat,
+        'vertex_lines': vertex_lines,
+        'index_lines': index_lines,
+        'saved_lines': flat - indexed,
+        'saved_pct': 100.0 * (flat - indexed) / flat if flat else 0.0,
+    }
+
+
+def format_report(r):
+    return (f"Indexed export: {r['triangles']} triangles, {r['unique_vertices']} unique vertices\n"
+            f"  Flat:    {r['flat_lines']} lines\n"
+            f"  Indexed: {r['vertex_lines']} vertex + {r['index_lines']} index lines\n"
+            f"  Saved:   {r['saved_lines']} lines ({r['saved_pct']:.1f}%)")
+
+
+# ==============================================================================
+# 5. REFERENCE MODEL (index-fetching geometry engine)
+# ==============================================================================
+def transform_indexed(vertices, indices, mvp):
+    """
+    Geometry engine that fetches vertices through the index buffer: each
+    unique vertex is transformed once per frame and the results are gathered
+    into FIFO order. Returns the same (F, 3T) dict as geometry_model.transform
+    on the expanded stream.
+    """
+    out = transform(vertices, mvp)
+    idx = np.asarray(indices, dtype=np.int64)
+    return {k: v[:, idx] for k, v in out.items()}
@@ -0,0 +1,337 @@
+"""
+Memory images in the formats the toolchains load:
+
+  .mem   $readmemh text: one hex word per line, '//' comments, '@addr' jumps
+  .coe   Xilinx coefficient file (memory_initialization_radix / _vector)
+  .bin   raw little-endian words, ceil(width / 8) bytes each
+  .hex   Intel HEX as Quartus reads it: one word per record, word addresses
+
+Every writer takes width (bits), an optional depth and a fill value for the
+words past the data, and builds the whole file in memory before a single
+write. Readers map the file (np.memmap) and parse it with array operations,
+so a 76800-line frame buffer reads back in milliseconds; unwritten words
+read as the fill value and words past depth are dropped, like $readmemh.
+"""
+
+import os
+
+import numpy as np
+
+from fpga_renderer.encode import hex_lines
+
+_HEX_VALUE = np.full(256, -1, dtype=np.int64)
+for _i, _c in enumerate(b"0123456789abcdef"):
+    _HEX_VALUE[_c] = _i
+for _i, _c in enumerate(b"ABCDEF"):
+    _HEX_VALUE[_c] = 10 + _i
+_UNDERSCORE = ord("_")
+_AT = ord("@")
+_NL = ord("\n")
+_SLASH = ord("/")
+
+
+# ==============================================================================
+# 1. WORDS
+# ==============================================================================
+def digits_for(width):
+    return max(1, -(-width // 4))
+
+
+def bytes_for(width):
+    return max(1, -(-width // 8))
+
+
+def image_words(words, width, depth=None, fill=0):
+    """Words masked to width and padded with fill (or cut) to depth, as uint64."""
+    words = np.asarray(words).astype(np.uint64).ravel() & np.uint64((1 << width) - 1)
+    if depth is None or depth == len(words):
+        return words
+    out = np.full(depth, fill, dtype=np.uint64) & np.uint64((1 << width) - 1)
+    n = min(depth, len(words))
+    out[:n] = words[:n]
+    return out
+
+
+def _map(path):
+    """File bytes as a read-only uint8 array (memory-mapped; empty files give [])."""
+    if os.path.getsize(path) == 0:
+        return np.zeros(0, dtype=np.uint8)
+    return np.memmap(path, dtype=np.uint8, mode="r")
+
+
+def _finish(values, addresses, depth, fill):
+    """Scatter (address, value) pairs into a uint64 image of depth (or max address + 1)."""
+    size = int(addresses.max()) + 1 if len(addresses) else 0
+    if depth is not None:
+        size = depth
+    out = np.full(size, fill, dtype=np.uint64)
+    ok = addresses < size
+    out[addresses[ok]] = values[ok]
+    return out
+
+
+# ==============================================================================
+# 2. $READMEMH TEXT (.mem)
+# ==============================================================================
+def format_mem(words, width, depth=None, fill=0, header=""):
+    return header.encode() + hex_lines(image_words(words, width, depth, fill), digits=digits_for(width))
+
+
+def write_mem(path, words, width, depth=None, fill=0, header=""):
+    """Writes a .mem file in one write. Returns the number of words."""
+    data = format_mem(words, width, depth, fill, header)
+    with open(path, "wb") as f:
+        f.write(data)
+    return len(words) if depth is None else depth
+
+
+def _fixed_width(text):
+    """
+    Fast path for the files this repo writes: one word per line, every line
+    the same length, hex digits only. Returns the words or None.
+    """
+    nl = np.flatnonzero(text[:80] == _NL)
+    if len(nl) == 0:
+        return None
+    stride = int(nl[0]) + 1
+    if stride < 2 or stride > 17 or len(text) % stride:
+        return None
+    rows = text.reshape(-1, stride)
+    digits = _HEX_VALUE[rows[:, :-1]]
+    if (rows[:, -1] != _NL).any() or (digits < 0).any():
+        return None
+    shifts = np.arange(stride - 2, -1, -1, dtype=np.uint64) * np.uint64(4)
+    return np.bitwise_or.reduce(digits.astype(np.uint64) << shifts, axis=1)
+
+
+def _hex_tokens(text, comments="//"):
+    """
+    Hex tokens of a text image: (values, is_at) per token, in file order.
+    Comments run from `comments` to the end of the line; '_' separators are
+    skipped; '@' marks an address token.
+    """
+    n = len(text)
+    if n == 0:
+        return np.zeros(0, dtype=np.uint64), np.zeros(0, dtype=bool)
+    pos = np.arange(n)
+    line = np.concatenate([[0], np.cumsum(text[:-1] == _NL)])
+
+    # Mask everything from the first comment marker of a line to its end
+    if comments == "//":
+        marker = np.flatnonzero((text[:-1] == _SLASH) & (text[1:] == _SLASH))
+    else:
+        marker = np.flatnonzero(text == ord(comments))
+    live = np.ones(n, dtype=bool)
+    if len(marker):
+        start = np.full(line[-1] + 1, n)
+        np.minimum.at(start, line[marker], marker)
+        live = pos < start[line]
+
+    value = _HEX_VALUE[text]
+    is_digit = (value >= 0) & live
+    in_token = (is_digit | (text == _UNDERSCORE) | (text == _AT)) & live
+    first = in_token & ~np.concatenate([[False], in_token[:-1]])
+    token = np.cumsum(first) - 1  # token index of every byte (valid where in_token)
+
+    # value = sum(digit << 4 * digits-after-it) per token
+    digit_pos = np.flatnonzero(is_digit)
+    tok = token[digit_pos]
+    rank = np.cumsum(is_digit)[digit_pos]  # 1-based digit count up to here
+    n_tokens = int(first.sum())
+    last_rank = np.zeros(n_tokens, dtype=np.int64)
+    np.maximum.at(last_rank, tok, rank)
+    shift = (4 * (last_rank[tok] - rank)).astype(np.uint64)
+    values = np.zeros(n_tokens, dtype=np.uint64)
+    np.add.at(values, tok, value[digit_pos].astype(np.uint64) << shift)
+    return values, text[first] == _AT
+
+
+def read_mem(path, depth=None, fill=0):
+    """Parses a $readmemh file into a uint64 array (see the module docstring)."""
+    text = _map(path)
+    words = _fixed_width(text)
+    if words is not None:
+        return _finish(words, np.arange(len(words)), depth, fill)
+    values, is_at = _hex_tokens(text)
+    if not is_at.any():
+        data = values
+        addresses = np.arange(len(data))
+    else:
+        # Data words count up from the last '@' address before them
+        segment = np.cumsum(is_at)
+        base = np.concatenate([[0], values[is_at]]).astype(np.int64)[segment]
+        start = np.concatenate([[0], np.flatnonzero(is_at)])[segment]
+        index = np.arange(len(values)) - start - (segment > 0)
+        data, addresses = values[~is_at], (base + index)[~is_at]
+    return _finish(data, np.asarray(addresses, dtype=np.int64), depth, fill)
+
+
+# ==============================================================================
+# 3. XILINX COE
+# ==============================================================================
+def format_coe(words, width, depth=None, fill=0):
+    body = hex_lines(image_words(words, width, depth, fill), digits=digits_for(width))
+    # "w\nw\n...w\n" -> "w,\nw,\n...w;\n"
+    text = body.replace(b"\n", b",\n")
+    if text:
+        text = text[:-2] + b";\n"
+    return b"memory_initialization_radix=16;\nmemory_initialization_vector=\n" + text
+
+
+def write_coe(path, words, width, depth=None, fill=0):
+    data = format_coe(words, width, depth, fill)
+    with open(path, "wb") as f:
+        f.write(data)
+    return len(words) if depth is None else depth
+
+
+def read_coe(path, depth=None, fill=0):
+    """Reads a radix-16 .coe file (';' comments) into a uint64 array."""
+    text = _map(path)
+    raw = bytes(text[:4096]).lower()
+    key = b"memory_initialization_vector"
+    at = raw.find(key)
+    if at < 0:
+        raise ValueError(f"{path}: no memory_initialization_vector")
+    radix = raw[raw.find(b"memory_initialization_radix"):at].split(b"=")[-1].split(b";")[0].strip()
+    if radix and int(radix) != 16:
+        raise ValueError(f"{path}: only radix 16 .coe files are supported (got {int(radix)})")
+    start = raw.find(b"=", at) + 1
+    values, _ = _hex_tokens(np.asarray(text[start:]), comments=";")
+    return _finish(values, np.arange(len(values)), depth, fill)
+
+
+# ==============================================================================
+# 4. RAW BINARY
+# ==============================================================================
+def format_bin(words, width, depth=None, fill=0):
+    words = image_words(words, width, depth, fill)
+    nbytes = bytes_for(width)
+    return words.astype("<u8").view(np.uint8).reshape(-1, 8)[:, :nbytes].tobytes()
+
+
+def write_bin(path, words, width, depth=None, fill=0):
+    data = format_bin(words, width, depth, fill)
+    with open(path, "wb") as f:
+        f.write(data)
+    return len(data) // bytes_for(width)
+
+
+def read_bin(path, width, depth=None, fill=0):
+    """Little-endian words of ceil(width / 8) bytes. 1/2/4/8-byte words are a zero-copy view."""
+    data = _map(path)
+    nbytes = bytes_for(width)
+    n = len(data) // nbytes
+    if nbytes in (1, 2, 4, 8):
+        words = data[:n * nbytes].view(f"<u{nbytes}")
+    else:
+        padded = np.zeros((n, 8), dtype=np.uint8)
+        padded[:, :nbytes] = data[:n * nbytes].reshape(n, nbytes)
+        words = padded.view("<u8").ravel()
+    if depth is None:
+        return words
+    return _finish(words.astype(np.uint64), np.arange(n), depth, fill)
+
+
+# ==============================================================================
+# 5. INTEL HEX
+# ==============================================================================
+def _records(kind, address, payload):
+    """(N, B) payload bytes -> (N,) ':LLAAAATTDD..CC' lines as one bytes object."""
+    n, size = payload.shape
+    rec = np.zeros((n, 4 + size + 1), dtype=np.uint8)
+    rec[:, 0] = size
+    rec[:, 1] = (address >> 8) & 0xFF
+    rec[:, 2] = address & 0xFF
+    rec[:, 3] = kind
+    rec[:, 4:4 + size] = payload
+    rec[:, -1] = (-rec[:, :-1].sum(axis=1, dtype=np.int64)) & 0xFF
+    text = np.frombuffer(hex_lines(rec.ravel(), digits=2), dtype=np.uint8).reshape(n, -1, 3)[:, :, :2]
+    out = np.empty((n, 1 + text.shape[1] * 2 + 1), dtype=np.uint8)
+    out[:, 0] = ord(":")
+    out[:, 1:-1] = text.reshape(n, -1)
+    out[:, -1] = _NL
+    return out.tobytes()
+
+
+def format_ihex(words, width, depth=None, fill=0):
+    """Quartus-style Intel HEX: one big-endian word per record, address = word index."""
+    words = image_words(words, width, depth, fill)
+    nbytes = bytes_for(width)
+    payload = words.astype(">u8").view(np.uint8).reshape(-1, 8)[:, 8 - nbytes:]
+    out = []
+    for upper in range(0, len(words), 1 << 16):
+        if upper:
+            # Extended linear address: upper 16 bits of the following addresses
+            out.append(_records(4, np.zeros(1, dtype=np.int64),
+                                np.array([[(upper >> 24) & 0xFF, (upper >> 16) & 0xFF]], dtype=np.uint8)))
+        chunk = slice(upper, upper + (1 << 16))
+        out.append(_records(0, np.arange(len(words[chunk]), dtype=np.int64), payload[chunk]))
+    return b"".join(out) + b":00000001FF\n"
+
+
+def write_ihex(path, words, width, depth=None, fill=0):
+    data = format_ihex(words, width, depth, fill)
+    with open(path, "wb") as f:
+        f.write(data)
+    return len(words) if depth is None else depth
+
+
+def read_ihex(path, depth=None, fill=0):
+    """Reads data (00) and extended linear address (04) records; word addresses, big-endian words."""
+    lines = [line[1:] for line in bytes(_map(path)).split() if line[:1] == b":"]
+    if not lines:
+        return _finish(np.zeros(0, dtype=np.uint64), np.zeros(0, dtype=np.int64), depth, fill)
+    rec = np.frombuffer(bytes.fromhex(b"".join(lines).decode()), dtype=np.uint8)
+    start = np.concatenate([[0], np.cumsum([len(line) // 2 for line in lines])[:-1]])
+    if (np.add.reduceat(rec, start, dtype=np.int64) & 0xFF).any():
+        raise ValueError(f"{path}: bad checksum")
+
+    size, kind = rec[start].astype(np.int64), rec[start + 3]
+    end = np.flatnonzero(kind == 1)
+    n = int(end[0]) if len(end) else len(lines)
+    address = (rec[start + 1].astype(np.int64) << 8) | rec[start + 2]
+
+    # Upper address bits of every record: from the last 04 record before it
+    ela = np.flatnonzero(kind[:n] == 4)
+    upper = np.zeros(n, dtype=np.int64)
+    upper[ela] = ((rec[start[ela] + 4].astype(np.int64) << 8) | rec[start[ela] + 5]) << 16
+    last = np.full(n, -1)
+    last[ela] = ela
+    last = np.maximum.accumulate(last)
+    upper = np.where(last >= 0, upper[last], 0)
+
+    data = np.flatnonzero(kind[:n] == 0)
+    # Big-endian bytes of each data record: value = sum(byte << 8 * bytes-after-it)
+    tok = np.repeat(np.arange(len(data)), size[data])
+    offset = np.arange(len(tok)) - np.repeat(np.cumsum(size[data]) - size[data], size[data])
+    payload = rec[start[data][tok] + 4 + offset].astype(np.uint64)
+    shift = (8 * (size[data][tok] - 1 - offset)).astype(np.uint64)
+    values = np.zeros(len(data), dtype=np.uint64)
+    np.add.at(values, tok, payload << shift)
+    return _finish(values, upper[data] + address[data], depth, fill)
+
+
+# ==============================================================================
+# 6. BY EXTENSION
+# ==============================================================================
+def write_image(path, words, width, depth=None, fill=0):
+    """Writes words in the format picked by the extension (.mem, .coe, .bin, .hex)."""
+    ext = os.path.splitext(path)[1].lower()
+    writers = {".mem": write_mem, ".coe": write_coe, ".bin": write_bin, ".hex": write_ihex}
+    if ext not in writers:
+        raise ValueError(f"Unknown memory image format {ext!r}")
+    return writers[ext](path, words, width, depth, fill)
+
+
+def read_image(path, width=None, depth=None, fill=0):
+    """Reads a memory image by extension; .bin needs width."""
+    ext = os.path.splitext(path)[1].lower()
+    if ext == ".bin":
+        if width is None:
+            raise ValueError("Raw binary images need a width")
+        return read_bin(path, width, depth, fill)
+    readers = {".mem": read_mem, ".coe": read_coe, ".hex": read_ihex}
+    if ext not in readers:
+        raise ValueError(f"Unknown memory image format {ext!r}")
+    return readers[ext](path, depth, fill)
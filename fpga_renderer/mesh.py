@@ -0,0 +1,155 @@
+"""
+Struct-of-arrays triangle mesh shared by the generators.
+
+A Mesh is five arrays and a name list, passed whole from parse through atlas
+remap, decimation, export and preview:
+
+  positions   (V, 3) float64  vertex positions
+  uvs         (T, 2) float64  texture coordinates
+  face_verts  (F, 3) int32    position index per corner
+  face_uvs    (F, 3) int32    uv index per corner, -1 if the corner had none
+  face_mats   (F,)   int32    index into materials, -1 = none
+  materials   material names (or slot names), in id order
+
+plus 'center', the centroid a streamed load already computed (else None).
+Arrays are stored as given when they already have these dtypes, so the
+memory-mapped arrays of a streamed load stay on disk; 'backing' holds the
+temp dir those files live in, which is deleted once no Mesh refers to it.
+
+Per-corner data is gathered in bulk (corners(), corner_uvs()); nothing per
+face is a Python object. face(i) and iteration return Face views (__slots__:
+just the mesh and an index) for debugging and small tools.
+"""
+
+import numpy as np
+
+from fpga_renderer.obj_stream import load_obj_auto
+
+INDEX_DTYPE = np.int32
+
+
+def _array(values, dtype, cols):
+    """values as dtype with cols columns (None = 1-D); no copy if already so (memmaps stay memmaps)."""
+    arr = np.asanyarray(values, dtype=dtype)
+    shape = (-1,) if cols is None else (-1, cols)
+    return arr if arr.ndim == len(shape) else arr.reshape(shape)
+
+
+def _gather_uvs(uvs, face_uvs):
+    """uvs rows for an array of uv indices; zeros where an index is -1 (or there are no uvs)."""
+    if len(uvs) == 0:
+        return np.zeros(face_uvs.shape + (2,))
+    uv = uvs[np.maximum(face_uvs, 0)]
+    uv[face_uvs < 0] = 0.0
+    return uv
+
+
+class Mesh:
+    """Triangle mesh as flat arrays (see the module docstring)."""
+    __slots__ = ('positions', 'uvs', 'face_verts', 'face_uvs', 'face_mats', 'materials', 'center', 'backing')
+
+    def __init__(self, positions, face_verts, uvs=None, face_uvs=None, face_mats=None, materials=(),
+                 center=None, backing=None):
+        self.positions = _array(positions, np.float64, 3)
+        self.face_verts = _array(face_verts, INDEX_DTYPE, 3)
+        self.uvs = _array(np.zeros((0, 2)) if uvs is None else uvs, np.float64, 2)
+        faces = len(self.face_verts)
+        self.face_uvs = _array(np.full((faces, 3), -1) if face_uvs is None else face_uvs, INDEX_DTYPE, 3)
+        self.face_mats = _array(np.full(faces, -1) if face_mats is None else face_mats, INDEX_DTYPE, None)
+        self.materials = list(materials)
+        self.center = center
+        self.backing = backing
+
+    @classmethod
+    def from_obj(cls, obj):
+        """Mesh from a load_obj / load_obj_streaming dict."""
+        center = obj['stats']['center'] if 'stats' in obj else None
+        return cls(obj['positions'], obj['face_verts'], obj['uvs'], obj['face_uvs'], obj['face_mats'],
+                   obj['materials'], center, obj.get('backing'))
+
+    @classmethod
+    def load(cls, filepath, flip_winding=False):
+        """Parses an OBJ file (streamed above obj_stream.STREAM_MIN_BYTES)."""
+        return cls.from_obj(load_obj_auto(filepath, flip_winding))
+
+    def replace(self, **changes):
+        """A new Mesh sharing every array that is not changed."""
+        fields = {name: getattr(self, name) for name in self.__slots__}
+        fields.update(changes)
+        return Mesh(**fields)
+
+    # --- Sizes ---
+    def __len__(self):
+        return len(self.face_verts)
+
+    @property
+    def num_verts(self):
+        return len(self.positions)
+
+    @property
+    def nbytes(self):
+        return sum(getattr(self, name).nbytes for name in
+                   ('positions', 'uvs', 'face_verts', 'face_uvs', 'face_mats'))
+
+    # --- Bulk per-corner gathers ---
+    def corners(self, values=None):
+        """(F, 3, ...) per-corner rows of values (default: the positions), e.g. projected screen points."""
+        return (self.positions if values is None else values)[self.face_verts]
+
+    def corner_uvs(self):
+        """(F, 3, 2) per-corner UVs; zeros where a corner has none."""
+        return _gather_uvs(self.uvs, self.face_uvs)
+
+    # --- Build cache ---
+    def to_cache(self):
+        """(arrays, meta) for fpga_renderer.cache.cached_arrays."""
+        arrays = {name: getattr(self, name) for name in ('positions', 'uvs', 'face_verts', 'face_uvs', 'face_mats')}
+        meta = {'materials': self.materials, 'center': None if self.center is None else list(map(float, self.center))}
+        return arrays, meta
+
+    @classmethod
+    def from_cache(cls, arrays, meta):
+        center = None if meta['center'] is None else np.array(meta['center'])
+        return cls(arrays['positions'], arrays['face_verts'], arrays['uvs'], arrays['face_uvs'],
+                   arrays['face_mats'], meta['materials'], center)
+
+    # --- Views ---
+    def face(self, i):
+        return Face(self, i)
+
+    def __iter__(self):
+        return (Face(self, i) for i in range(len(self)))
+
+    def __repr__(self):
+        return (f"Mesh({self.num_verts} verts, {len(self)} faces, {len(self.materials)} materials, "
+                f"{self.nbytes / max(len(self), 1):.0f} bytes/face)")
+
+
+class Face:
+    """Read-only view of one face of a Mesh."""
+    __slots__ = ('mesh', 'index')
+
+    def __init__(self, mesh, index):
+        self.mesh = mesh
+        self.index = index
+
+    @property
+    def verts(self):
+        return self.mesh.face_verts[self.index]
+
+    @property
+    def positions(self):
+        return self.mesh.positions[self.verts]
+
+    @property
+    def uvs(self):
+        return _gather_uvs(self.mesh.uvs, self.mesh.face_uvs[self.index])
+
+    @property
+    def mat(self):
+        """Material name, or None."""
+        m = self.mesh.face_mats[self.index]
+        return self.mesh.materials[m] if 0 <= m < len(self.mesh.materials) else None
+
+    def __repr__(self):
+        return f"Face({self.index}, verts={self.verts.tolist()}, mat={self.mat!r})"
@@ -0,0 +1,197 @@
+"""
+Mip chains for the texture atlas.
+
+texture_rom holds one 64x64 level, so a triangle a few pixels across still
+samples texels 64 apart: it aliases, and every fetch lands somewhere new.
+This builds the full chain (64x64 ... 1x1) with a box or Lanczos-3 filter
+and packs it into one .mem:
+
+  word 0 .. L-1   offset table: start address of level l
+  then            level 0, level 1, ... RGB444 texels in raster order
+
+The preview picks one level per triangle from its projected UV derivatives
+(texels per pixel, from the UV and screen areas), like a per-triangle LOD
+register would. fetch_locality() replays the texel fetches of a frame in
+pixel_iterator order through a small direct-mapped cache of 4x4 texel
+blocks, to show what mipmapping does for a future texture cache.
+"""
+
+import numpy as np
+
+from fpga_renderer.encode import hex_lines, rgb444
+from fpga_renderer.preview import _boxes, _box_pixels, _edge_function
+
+LANCZOS_A = 3
+
+# Cache model: lines of BLOCK x BLOCK texels
+CACHE_BLOCK = 4
+CACHE_LINES = 16
+
+
+# ==============================================================================
+# 1. FILTERS
+# ==============================================================================
+def _box_half(img):
+    """2x2 average, (H, W, C) float -> (H/2, W/2, C)."""
+    return 0.25 * (img[0::2, 0::2] + img[1::2, 0::2] + img[0::2, 1::2] + img[1::2, 1::2])
+
+
+def _lanczos_weights(n_out):
+    """(n_out, 4 * LANCZOS_A) taps and input indices for a 2:1 Lanczos-a downsample."""
+    taps = 2 * LANCZOS_A
+    # Output j is centered between inputs 2j and 2j + 1
+    offsets = np.arange(-taps + 1, taps + 1)
+    pos = 2 * np.arange(n_out)[:, None] + offsets[None, :]
+    d = (pos + 0.5 - (2 * np.arange(n_out)[:, None] + 1)) / 2.0
+    w = np.sinc(d) * np.sinc(d / LANCZOS_A) * (np.abs(d) < LANCZOS_A)
+    return w / w.sum(axis=1, keepdims=True), pos
+
+
+def _lanczos_half(img):
+    """Separable Lanczos-3 2:1 downsample, edges clamped."""
+    h, w = img.shape[:2]
+    wy, py = _lanczos_weights(h // 2)
+    img = np.einsum("ij,ijwc->iwc", wy, img[np.clip(py, 0, h - 1)])
+    wx, px = _lanczos_weights(w // 2)
+    return np.einsum("ij,hijc->hic", wx, img[:, np.clip(px, 0, w - 1)])
+
+
+def mip_chain(image, filter="box"):
+    """
+    (S, S, 3) uint8 (or PIL image), S a power of two -> list of levels
+    S, S/2, ..., 1 as uint8 arrays. Each level is filtered from the one above.
+    """
+    half = {"box": _box_half, "lanczos": _lanczos_half}[filter]
+    level = np.asarray(image.convert("RGB") if hasattr(image, "convert") else image, dtype=np.float64)
+    levels = [np.clip(np.rint(level), 0, 255).astype(np.uint8)]
+    while min(level.shape[:2]) > 1:
+        level = np.clip(half(level), 0.0, 255.0)
+        levels.append(np.rint(level).astype(np.uint8))
+    return levels
+
+
+# ==============================================================================
+# 2. PACKING
+# ==============================================================================
+def level_offsets(levels):
+    """Start address of every level, after the len(levels)-word offset table."""
+    sizes = [lv.shape[0] * lv.shape[1] for lv in levels]
+    return len(levels) + np.concatenate([[0], np.cumsum(sizes)[:-1]]).astype(np.int64)
+
+
+def format_mip_mem(levels):
+    """Offset table + RGB444 texels of every level, 4 hex digits per word."""
+    words = np.concatenate([level_offsets(levels)] + [rgb444(lv).ravel() for lv in levels])
+    sides = "/".join(str(lv.shape[0]) for lv in levels)
+    return (f"// Mip chain {sides}: {len(levels)} level offsets, then RGB444 texels\n".encode()
+            + hex_lines(words, digits=4))
+
+
+def write_mip_mem(path, levels):
+    """Writes the packed chain. Returns the number of words."""
+    with open(path, "wb") as f:
+        f.write(format_mip_mem(levels))
+    return len(levels) + sum(lv.shape[0] * lv.shape[1] for lv in levels)
+
+
+# ==============================================================================
+# 3. LOD SELECTION
+# ==============================================================================
+def triangle_lod(screen_verts, uvs, tex_size, n_levels):
+    """
+    (T,) mip level per triangle: log2 of texels per pixel, from the texel-
+    space and screen-space areas of the triangle, rounded and clamped.
+    """
+    pts = np.asarray(screen_verts, dtype=np.float64).reshape(-1, 3, 2)
+    tex = np.asarray(uvs, dtype=np.float64).reshape(-1, 3, 2) * tex_size
+    screen_area = np.abs(_edge_function(pts[:, 0], pts[:, 1], pts[:, 2, 0], pts[:, 2, 1]))
+    texel_area = np.abs(_edge_function(tex[:, 0], tex[:, 1], tex[:, 2, 0], tex[:, 2, 1]))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        lod = 0.5 * np.log2(texel_area / screen_area)
+    lod = np.nan_to_num(lod, nan=0.0, posinf=n_levels - 1, neginf=0.0)
+    return np.clip(np.floor(lod + 0.5), 0, n_levels - 1).astype(np.int64)
+
+
+# ==============================================================================
+# 4. FETCH LOCALITY
+# ==============================================================================
+def texel_fetches(screen_verts, uvs, lod, tex_size, width=320, height=240, cull_backfaces=True):
+    """
+    Level, x, y of every texel fetch in pixel_iterator order: triangle by
+    triangle, row-major over each box, one fetch per inside pixel (before the
+    z-test, as the interpolator reads the ROM for every inside pixel).
+    """
+    pts = np.asarray(screen_verts, dtype=np.float64).reshape(-1, 3, 2)
+    uvs = np.asarray(uvs, dtype=np.float64).reshape(-1, 3, 2)
+    area = _edge_function(pts[:, 0], pts[:, 1], pts[:, 2, 0], pts[:, 2, 1])
+    min_x, max_x, min_y, max_y = _boxes(pts, width, height)
+    keep = ((area > 0) if cull_backfaces else (area != 0)) & (min_x <= max_x) & (min_y <= max_y)
+    ids = np.flatnonzero(keep)
+    if len(ids) == 0:
+        return np.zeros((3, 0), dtype=np.int64)
+
+    local, x, y = _box_pixels(min_x[ids], max_x[ids], min_y[ids], max_y[ids])
+    tri = ids[local]
+    p0, p1, p2 = pts[tri, 0], pts[tri, 1], pts[tri, 2]
+    sign = np.sign(area[tri])
+    w = np.stack([_edge_function(p1, p2, x, y), _edge_function(p2, p0, x, y),
+                  _edge_function(p0, p1, x, y)], axis=1) * sign[:, None]
+    inside = (w >= 0).all(axis=1)
+    tri, w = tri[inside], w[inside]
+    uv = (w[:, :, None] * uvs[tri]).sum(axis=1) / np.abs(area[tri])[:, None]
+
+    level = np.asarray(lod)[tri]
+    size = tex_size >> level
+    return np.stack([level, np.floor(uv[:, 0] * size).astype(np.int64) % size,
+                     np.floor(uv[:, 1] * size).astype(np.int64) % size])
+
+
+def fetch_locality(fetches, block=CACHE_BLOCK, lines=CACHE_LINES):
+    """
+    Hit rate of a direct-mapped cache of `lines` block x block texel lines,
+    plus distinct texels and blocks touched, for (3, N) texel_fetches().
+    """
+    level, x, y = fetches
+    n = len(level)
+    if n == 0:
+        return {'fetches': 0, 'texels': 0, 'blocks': 0, 'hit_rate': 0.0}
+    bx, by = x // block, y // block
+    block_id = (level.astype(np.int64) << 32) | (by << 16) | bx
+    texel_id = (level.astype(np.int64) << 32) | (y << 16) | x
+    # Direct mapped, set = (bx + 4 * by + level) mod lines: a fetch hits if
+    # the previous fetch to its set was for the same block
+    sets = (bx + 4 * by + level) % lines
+    order = np.argsort(sets, kind="stable")
+    hits = np.concatenate([[False], (sets[order][1:] == sets[order][:-1]) &
+                           (block_id[order][1:] == block_id[order][:-1])])
+    return {'fetches': n, 'texels': len(np.unique(texel_id)), 'blocks': len(np.unique(block_id)),
+            'hit_rate': float(hits.sum()) / n}
+
+
+def format_locality(base, mip):
+    """Side-by-side report: level 0 only vs per-triangle LOD."""
+    rows = [("Fetches", 'fetches', "d"), ("Distinct texels", 'texels', "d"),
+            ("Distinct 4x4 blocks", 'blocks', "d"), ("Cache hit rate", 'hit_rate', ".1%")]
+    lines = [f"  {'':<20} {'Level 0':>10} {'Mipmapped':>10}"]
+    for name, key, fmt in rows:
+        lines.append(f"  {name:<20} {base[key]:>10{fmt}} {mip[key]:>10{fmt}}")
+    return "\n".join(lines)
+
+
+# ==============================================================================
+# 5. GENERATOR PREVIEW
+# ==============================================================================
+def preview_mips(screen_verts, uvs, image, tex_size, filter="box", cull_backfaces=True):
+    """
+    Mip chain of a generator's atlas and the per-triangle LOD of its preview.
+    Prints the LOD histogram and the texel fetches with and without mipmaps.
+    """
+    mips = mip_chain(image, filter)
+    lod = triangle_lod(screen_verts, uvs, tex_size, len(mips))
+    print(f"Mip levels per triangle: {np.bincount(lod, minlength=len(mips)).tolist()}")
+    base = fetch_locality(texel_fetches(screen_verts, uvs, np.zeros_like(lod), tex_size,
+                                        cull_backfaces=cull_backfaces))
+    mipped = fetch_locality(texel_fetches(screen_verts, uvs, lod, tex_size, cull_backfaces=cull_backfaces))
+    print("Texel fetches (preview view):")
+    print(format_locality(base, mipped))
+    return mips, lod
@@ -0,0 +1,175 @@
+"""
+MVP animation tables for mvp_lutram.
+
+One camera and a model spinning about one axis: frame i is
+proj @ view @ (T * R(i / frames * turn) * S), written as the Q16.16
+32'hXXXXXXXX literals of a SystemVerilog MVP_FRAMES[frame][16] array
+(geometry_model.load_mvp_lutram reads the same literals back).
+
+scripts/mvp_mat.py and cubescripts/mvp_mat.py are thin front ends with their
+own frame count and camera; the asset build (fpga_renderer.build) calls
+mvp_table() directly with the values from the scene file.
+"""
+
+import numpy as np
+
+# Defaults of the mvp_mat.py scripts
+DEFAULTS = {
+    'num_frames': 16,
+    'rotation_axis': 'Y',
+    'total_turn_degrees': 360.0,
+    'fov_degrees': 90.0,
+    'aspect_ratio': 320.0 / 240.0,
+    'near_plane': 1.0,
+    'far_plane': 20.0,
+    'cam_pos': [0.0, 5.0, 10.0],
+    'cam_target': [0.0, 0.0, 0.0],
+    'cam_up': [0.0, 1.0, 0.0],
+    'obj_pos': [0.0, 0.0, 0.0],
+    'obj_scale': [1.0, 1.0, 1.0],
+}
+
+
+# ==============================================================================
+# 1. MATHEMATICAL HELPERS
+# ==============================================================================
+def get_rotation_matrix(axis, radians):
+    """Generates a 4x4 rotation matrix for X, Y, or Z axis."""
+    c = np.cos(radians)
+    s = np.sin(radians)
+
+    if axis.upper() == 'X':
+        return np.array([
+            [1, 0, 0, 0],
+            [0, c, -s, 0],
+            [0, s, c, 0],
+            [0, 0, 0, 1]
+        ], dtype=np.float32)
+    elif axis.upper() == 'Y':
+        return np.array([
+            [ c, 0, s, 0],
+            [ 0, 1, 0, 0],
+            [-s, 0, c, 0],
+            [ 0, 0, 0, 1]
+        ], dtype=np.float32)
+    elif axis.upper() == 'Z':
+        return np.array([
+            [c, -s, 0, 0],
+            [s, c, 0, 0],
+            [0, 0, 1, 0],
+            [0, 0, 0, 1]
+        ], dtype=np.float32)
+    else:
+        return np.eye(4, dtype=np.float32)
+
+
+def create_model_matrix(position, scale, rotation_matrix):
+    tx, ty, tz = position
+    sx, sy, sz = scale
+
+    # Scale Matrix
+    scale_mat = np.eye(4, dtype=np.float32)
+    scale_mat[0, 0] = sx
+    scale_mat[1, 1] = sy
+    scale_mat[2, 2] = sz
+
+    # Translation Matrix
+    trans_mat = np.eye(4, dtype=np.float32)
+    trans_mat[:3, 3] = [tx, ty, tz]
+
+    # Order: T * R * S
+    return trans_mat @ rotation_matrix @ scale_mat
+
+
+def look_at(eye, target, up):
+    eye = np.array(eye, dtype=np.float32)
+    target = np.array(target, dtype=np.float32)
+    up = np.array(up, dtype=np.float32)
+    fwd = eye - target
+    fwd /= np.linalg.norm(fwd)
+    right = np.cross(up, fwd)
+    right /= np.linalg.norm(right)
+    true_up = np.cross(fwd, right)
+    rot = np.array([
+        [right[0],   right[1],   right[2],   0],
+        [true_up[0], true_up[1], true_up[2], 0],
+        [fwd[0],     fwd[1],     fwd[2],     0],
+        [0,          0,          0,          1]
+    ], dtype=np.float32)
+    trans = np.eye(4, dtype=np.float32)
+    trans[:3, 3] = -eye
+    return rot @ trans
+
+
+def perspective(fov_degrees, aspect_ratio, near, far):
+    fov_rad = np.radians(fov_degrees)
+    f = 1.0 / np.tan(fov_rad / 2.0)
+    return np.array([
+        [f / aspect_ratio, 0, 0, 0],
+        [0, f, 0, 0],
+        [0, 0, (far + near) / (near - far), (2 * far * near) / (near - far)],
+        [0, 0, -1, 0]
+    ], dtype=np.float32)
+
+
+# ==============================================================================
+# 2. TABLE
+# ==============================================================================
+def mvp_table(**settings):
+    """(frames, 4, 4) float32 MVP matrices; settings override DEFAULTS."""
+    unknown = set(settings) - set(DEFAULTS)
+    if unknown:
+        raise KeyError(f"Unknown MVP settings: {', '.join(sorted(unknown))}")
+    s = dict(DEFAULTS, **settings)
+
+    view_mat = look_at(s['cam_pos'], s['cam_target'], s['cam_up'])
+    proj_mat = perspective(s['fov_degrees'], s['aspect_ratio'], s['near_plane'], s['far_plane'])
+    vp_mat = proj_mat @ view_mat
+
+    frames = []
+    for i in range(s['num_frames']):
+        rad = np.radians((i / s['num_frames']) * s['total_turn_degrees'])
+        rot_mat = get_rotation_matrix(s['rotation_axis'], rad)
+        frames.append(vp_mat @ create_model_matrix(s['obj_pos'], s['obj_scale'], rot_mat))
+    return np.array(frames, dtype=np.float32).reshape(-1, 4, 4)
+
+
+# ==============================================================================
+# 3. OUTPUT FORMATTER (Q16.16)
+# ==============================================================================
+def float_to_q16_16_hex(val):
+    # Scale by 65536 (2^16)
+    fixed_val = int(val * 65536.0)
+    if fixed_val < 0:
+        fixed_val = (1 << 32) + fixed_val
+    return f"32'h{fixed_val & 0xFFFFFFFF:08X}"
+
+
+def format_verilog_array(table):
+    """(frames, 4, 4) matrices -> the MVP_FRAMES[frame][16] SystemVerilog literal."""
+    num_frames = len(table)
+    lines = ["",
+             "// ==========================================",
+             f"// ANIMATION DATA: {num_frames} FRAMES",
+             "// Access: MVP_FRAMES[frame_index][matrix_element_index]",
+             "// ==========================================",
+             f"logic signed [31:0] MVP_FRAMES [0:{num_frames-1}][0:15] = '{{"]
+
+    for i, mvp in enumerate(table):
+        lines += [f"    // Frame {i}", "    '{"]
+        # 4 rows of 4 elements; no comma after the last row of a frame
+        for r in range(4):
+            row = ", ".join(float_to_q16_16_hex(mvp[r, c]) for c in range(4))
+            lines.append(f"        {row}{',' if r < 3 else ''}")
+        # No comma after the last frame
+        lines.append("    }," if i < num_frames - 1 else "    }")
+
+    lines.append("};")
+    return "\n".join(lines) + "\n"
+
+
+def write_mvp_table(path, table):
+    """Writes the SystemVerilog array to path. Returns the frame count."""
+    with open(path, "w") as f:
+        f.write(format_verilog_array(table))
+    return len(table)
@@ -0,0 +1,253 @@
+"""
+NumPy-backed Wavefront OBJ loader.
+
+Only the commands the asset pipeline cares about are read:
+  v       -> positions  (V x 3 float64)
+  vt      -> uvs        (T x 2 float64, raw OBJ convention, V not flipped)
+  f       -> fan-triangulated corner indices (any polygon size)
+  usemtl  -> per-triangle material index
+
+The file is handled as one uint8 buffer: line heads come from array compares,
+each command's lines are copied out in contiguous runs, and their numbers are
+parsed by a single np.fromstring call per command. The result
+is a dict of contiguous arrays, not a list of per-face dicts.
+"""
+
+import numpy as np
+
+_NL, _SPACE, _TAB = ord("\n"), ord(" "), ord("\t")
+_SLASH, _HASH = ord("/"), ord("#")
+
+
+# ==============================================================================
+# 1. BUFFER HELPERS
+# ==============================================================================
+class _Lines:
+    """Line boundaries and command heads of a whole OBJ file."""
+
+    def __init__(self, data):
+        # Pad so head lookups never run off the end
+        self.data = data + b"\n" * 8
+        self.buf = np.frombuffer(self.data, dtype=np.uint8)
+
+        self.end = np.flatnonzero(self.buf[:len(data) + 1] == _NL)  # points at '\n'
+        self.head = np.concatenate(([0], self.end[:-1] + 1))
+
+        # Indented lines are rare, so just skip their leading blanks one by one
+        first = self.buf[self.head]
+        for i in np.flatnonzero((first == _SPACE) | (first == _TAB)):
+            line = self.data[self.head[i]:self.end[i]]
+            self.head[i] += len(line) - len(line.lstrip(b" \t"))
+
+    def select(self, cmd):
+        """Line numbers whose first token is exactly cmd."""
+        hit = np.ones(len(self.head), dtype=bool)
+        for i, ch in enumerate(cmd):
+            hit &= self.buf[self.head + i] == ch
+        after = self.buf[self.head + len(cmd)]
+        return np.flatnonzero(hit & (after <= _SPACE))
+
+    def payload(self, rows, cmd):
+        """
+        Bytes of the given lines with the command token blanked out, one line
+        per '\n'. Consecutive lines are copied as one run.
+        """
+        buf = self.buf.copy()
+        buf[self.head[rows][:, None] + np.arange(len(cmd))] = _SPACE
+
+        breaks = np.flatnonzero(np.diff(rows) != 1)
+        run_first = rows[np.concatenate(([0], breaks + 1))]
+        run_last = rows[np.append(breaks, len(rows) - 1)]
+        return np.concatenate([buf[s:e] for s, e in zip(self.head[run_first], self.end[run_last] + 1)])
+
+    def text(self, line):
+        return self.data[self.head[line]:self.end[line]]
+
+
+def _token_starts(payload):
+    """Boolean mask of the first byte of every whitespace separated token."""
+    blank = payload <= _SPACE
+    return ~blank & np.concatenate(([True], blank[:-1]))
+
+
+def _tokens_per_line(token_no, payload):
+    """Token count of each '\n' terminated line, given the running token count per byte."""
+    return np.diff(np.concatenate(([0], token_no[payload == _NL])))
+
+
+# ==============================================================================
+# 2. TOKENIZERS
+# ==============================================================================
+def _parse_float_rows(lines, rows, cmd, width):
+    """Parses 'v'/'vt' lines into an (N, width) float64 array (missing columns -> 0)."""
+    if len(rows) == 0:
+        return np.zeros((0, width), dtype=np.float64)
+
+    payload = lines.payload(rows, cmd)
+    if (payload == _HASH).any():
+        # Slow path: trailing comments -> split each line
+        table = [(lines.text(r).split(b"#")[0].split()[1:] + [b"0"] * width)[:width] for r in rows]
+        return np.array(table).astype(np.float64)
+
+    flat = np.fromstring(payload.tobytes(), dtype=np.float64, sep=" ")
+    cols = _tokens_per_line(np.cumsum(_token_starts(payload)), payload)
+    if (cols == cols[0]).all() and cols[0] >= width:
+        return flat.reshape(len(rows), cols[0])[:, :width].copy()
+
+    # Ragged rows (optional w, vertex colors, 1D uvs): pick the first `width`
+    # values of each row, padding short rows with 0.
+    offset = np.concatenate(([0], np.cumsum(cols)[:-1]))
+    col = np.arange(width)
+    out = np.zeros((len(rows), width), dtype=np.float64)
+    valid = col[None, :] < cols[:, None]
+    out[valid] = flat[(offset[:, None] + col[None, :])[valid]]
+    return out
+
+
+def _parse_corners(lines, rows):
+    """
+    Parses 'f' lines.
+    Returns (v_idx, vt_idx, counts): raw OBJ indices per corner (1-based or
+    negative, 0 where the field is missing) and the corner count of each line.
+    """
+    payload = lines.payload(rows, b"f")
+    token_no = np.cumsum(_token_starts(payload))
+    counts = _tokens_per_line(token_no, payload)
+
+    # Fast path: every corner shares the first corner's layout
+    # (v, v/vt, v//vn or v/vt/vn), checked by counting slashes per token.
+    first = lines.text(rows[0]).split()[1] if counts[0] > 0 else b""
+    n_slash = first.count(b"/")
+    no_vt = b"//" in first
+
+    slash = payload == _SLASH
+    owner = token_no - 1
+    n_tok = counts.sum()
+    per_tok = np.bincount(owner[slash], minlength=n_tok)
+    doubled = np.bincount(owner[:-1][slash[:-1] & slash[1:]], minlength=n_tok)
+    if (per_tok == n_slash).all() and (doubled == no_vt).all() and not (payload == _HASH).any():
+        payload[slash] = _SPACE
+        flat = np.fromstring(payload.tobytes(), dtype=np.int64, sep=" ")
+        n_fields = n_slash + 1 - no_vt
+        table = flat.reshape(-1, n_fields)
+        v_idx = table[:, 0]
+        vt_idx = table[:, 1] if n_fields > 1 and not no_vt else np.zeros_like(v_idx)
+        return v_idx, vt_idx, counts
+
+    # Mixed layouts or comments -> split every corner
+    v_idx, vt_idx, counts = [], [], []
+    for r in rows:
+        corners = lines.text(r).split(b"#")[0].split()[1:]
+        counts.append(len(corners))
+        for c in corners:
+            vals = c.split(b"/")
+            v_idx.append(int(vals[0]))
+            vt_idx.append(int(vals[1]) if len(vals) > 1 and vals[1] else 0)
+    return (np.array(v_idx, dtype=np.int64), np.array(vt_idx, dtype=np.int64),
+            np.array(counts, dtype=np.int64))
+
+
+def _resolve(idx, n_before):
+    """OBJ index -> 0-based. Negative indices count back from n_before; 0 (missing) -> -1."""
+    return np.where(idx < 0, n_before + idx, idx - 1)
+
+
+def _triangulate(counts, flip_winding):
+    """
+    Fan triangulation: (0, k, k+1) for k = 1 .. n-2 on every face line.
+    Returns (corner, tri_face): flat corner positions (F, 3) and the source
+    face line of each triangle.
+    """
+    first = np.concatenate(([0], np.cumsum(counts)[:-1]))
+    n_tris = np.maximum(counts - 2, 0)
+    tri_face = np.repeat(np.arange(len(counts)), n_tris)
+    tri_start = np.concatenate(([0], np.cumsum(n_tris)[:-1]))
+    k = np.arange(len(tri_face)) - tri_start[tri_face] + 1
+
+    local = np.stack([np.zeros_like(k), k, k + 1], axis=1)
+    if flip_winding:
+        # Same as reversing the corner list before triangulating
+        local = (counts[tri_face] - 1)[:, None] - local
+    return first[tri_face][:, None] + local, tri_face
+
+
+# ==============================================================================
+# 3. LOADER
+# ==============================================================================
+def _parse_bytes(data, flip_winding):
+    """
+    Parses a block of whole OBJ lines. Same keys as load_obj, plus
+    'v_rel'/'vt_rel' masks marking corners written with a negative index
+    (those were resolved against the elements of this block only) and
+    'last_mat', the material still active at the end of the block.
+    """
+    lines = _Lines(data)
+
+    rows_v = lines.select(b"v")
+    rows_vt = lines.select(b"vt")
+    rows_f = lines.select(b"f")
+    rows_mtl = lines.select(b"usemtl")
+
+    positions = _parse_float_rows(lines, rows_v, b"v", 3)
+    uvs = _parse_float_rows(lines, rows_vt, b"vt", 2)
+
+    # Materials: dedupe names in order of first use. Slot 0 of mtl_ids is the
+    # "no usemtl yet" state.
+    mat_lookup = {}
+    mtl_ids = np.full(len(rows_mtl) + 1, -1, dtype=np.int32)
+    for j, r in enumerate(rows_mtl):
+        parts = lines.text(r).split()
+        name = parts[1].decode() if len(parts) > 1 else ""
+        mtl_ids[j + 1] = mat_lookup.setdefault(name, len(mat_lookup))
+
+    if len(rows_f) == 0:
+        empty = np.zeros((0, 3), dtype=np.int64)
+        return {
+            'positions': positions, 'uvs': uvs,
+            'face_verts': empty, 'face_uvs': empty.copy(),
+            'face_mats': np.zeros(0, dtype=np.int32),
+            'materials': list(mat_lookup),
+            'v_rel': np.zeros((0, 3), dtype=bool), 'vt_rel': np.zeros((0, 3), dtype=bool),
+            'last_mat': int(mtl_ids[-1]),
+        }
+
+    v_raw, vt_raw, counts = _parse_corners(lines, rows_f)
+    corner, tri_face = _triangulate(counts, flip_winding)
+
+    # Relative (negative) indices count back from the elements defined
+    # before the face line
+    corner_line = np.repeat(np.arange(len(rows_f)), counts)
+    v_idx = _resolve(v_raw, np.searchsorted(rows_v, rows_f)[corner_line])
+    vt_idx = _resolve(vt_raw, np.searchsorted(rows_vt, rows_f)[corner_line])
+
+    line_mats = mtl_ids[np.searchsorted(rows_mtl, rows_f)]
+
+    return {
+        'positions': positions,
+        'uvs': uvs,
+        'face_verts': v_idx[corner],
+        'face_uvs': vt_idx[corner],
+        'face_mats': line_mats[tri_face],
+        'materials': list(mat_lookup),
+        'v_rel': (v_raw < 0)[corner],
+        'vt_rel': (vt_raw < 0)[corner],
+        'last_mat': int(mtl_ids[-1]),
+    }
+
+
+def load_obj(filepath, flip_winding=False):
+    """
+    Loads an OBJ file into contiguous arrays.
+
+    Returns a dict:
+      'positions'  (V, 3) float64
+      'uvs'        (T, 2) float64  raw OBJ uvs
+      'face_verts' (F, 3) int64    0-based position indices
+      'face_uvs'   (F, 3) int64    0-based uv indices, -1 if the corner had none
+      'face_mats'  (F,)   int32    index into 'materials', -1 before any usemtl
+      'materials'  list of material names in order of first 'usemtl'
+    """
+    with open(filepath, "rb") as f:
+        obj = _parse_bytes(f.read(), flip_winding)
+    del obj['v_rel'], obj['vt_rel'], obj['last_mat']
+    return obj
@@ -0,0 +1,193 @@
+"""
+Streaming OBJ ingest for meshes that do not fit in RAM.
+
+The file is memory-mapped and cut into chunks at line boundaries. A process
+pool parses the chunks with the same code as load_obj, and the parent appends
+each result, in file order, to raw files under out_dir. At most
+IN_FLIGHT_PER_WORKER chunks per worker are submitted ahead of the one being
+appended, and the files are opened as np.memmap arrays at the end, so peak
+memory is about 2 * workers * CHUNK_BYTES whatever the size of the OBJ.
+
+Running statistics (count, sum, min, max of the positions) are gathered while
+streaming, so process_geometry can center the mesh without another pass.
+"""
+
+import mmap
+import os
+import tempfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from fpga_renderer.obj_loader import _parse_bytes, load_obj
+
+CHUNK_BYTES = 64 << 20
+
+# Parsed chunks allowed to wait for the parent per worker
+IN_FLIGHT_PER_WORKER = 2
+
+# Above this size the generators switch from load_obj to load_obj_streaming
+STREAM_MIN_BYTES = 512 << 20
+
+# Rows per block when rotating a memory-mapped vertex array in place
+TRANSFORM_BLOCK_ROWS = 1 << 20
+
+_ARRAYS = {
+    # name: (dtype, columns)
+    'positions': (np.float64, 3),
+    'uvs': (np.float64, 2),
+    'face_verts': (np.int32, 3),  # fpga_renderer.mesh.INDEX_DTYPE: stays memory-mapped in a Mesh
+    'face_uvs': (np.int32, 3),
+    'face_mats': (np.int32, None),
+}
+
+
+# ==============================================================================
+# 1. CHUNKING
+# ==============================================================================
+def chunk_bounds(filepath, chunk_bytes=CHUNK_BYTES):
+    """(start, end) byte ranges of roughly chunk_bytes, each ending after a '\\n'."""
+    size = os.path.getsize(filepath)
+    if size == 0:
+        return []
+
+    bounds = []
+    with open(filepath, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        start = 0
+        while start < size:
+            cut = mm.find(b"\n", min(start + chunk_bytes, size) - 1)
+            end = size if cut < 0 else cut + 1
+            bounds.append((start, end))
+            start = end
+    return bounds
+
+
+def _parse_chunk(args):
+    """Worker: parses one byte range and returns its arrays plus position stats."""
+    filepath, start, end, flip_winding = args
+    with open(filepath, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        data = mm[start:end]
+    if not data.endswith(b"\n"):
+        data += b"\n"
+
+    obj = _parse_bytes(data, flip_winding)
+    pos = obj['positions']
+    obj['stats'] = {
+        'count': len(pos),
+        'sum': pos.sum(axis=0),
+        'min': pos.min(axis=0) if len(pos) else np.full(3, np.inf),
+        'max': pos.max(axis=0) if len(pos) else np.full(3, -np.inf),
+    }
+    return obj
+
+
+def _parse_in_order(pool, jobs, window):
+    """Parsed chunks in file order, with at most window of them submitted ahead."""
+    jobs = iter(jobs)
+    pending = deque(pool.submit(_parse_chunk, job) for _, job in zip(range(window), jobs))
+    while pending:
+        obj = pending.popleft().result()
+        job = next(jobs, None)
+        if job is not None:
+            pending.append(pool.submit(_parse_chunk, job))
+        yield obj
+
+
+# ==============================================================================
+# 2. STREAMING LOADER
+# ==============================================================================
+def load_obj_streaming(filepath, flip_winding=False, out_dir=None,
+                       chunk_bytes=CHUNK_BYTES, workers=None):
+    """
+    Loads an OBJ file chunk by chunk into memory-mapped arrays.
+
+    Returns the same dict as load_obj, with np.memmap arrays backed by raw
+    files in out_dir, plus:
+      'out_dir'  where the backing files live
+      'backing'  if out_dir was None: the tempfile.TemporaryDirectory that
+                 out_dir is. It deletes the files when it is garbage-collected,
+                 so it has to be kept as long as the arrays (Mesh does).
+      'stats'    {'count', 'sum', 'min', 'max', 'center'} of the positions
+    """
+    backing = None
+    if out_dir is None:
+        backing = tempfile.TemporaryDirectory(prefix="obj_stream_", ignore_cleanup_errors=True)
+        out_dir = backing.name
+    os.makedirs(out_dir, exist_ok=True)
+    workers = workers or os.cpu_count() or 1
+
+    files = {name: open(os.path.join(out_dir, f"{name}.bin"), "wb") for name in _ARRAYS}
+    rows = dict.fromkeys(_ARRAYS, 0)
+
+    mat_lookup = {}
+    current_mat = -1  # material still active at the end of the previous chunk
+    stats = {'count': 0, 'sum': np.zeros(3), 'min': np.full(3, np.inf), 'max': np.full(3, -np.inf)}
+
+    jobs = [(filepath, s, e, flip_winding) for s, e in chunk_bounds(filepath, chunk_bytes)]
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for obj in _parse_in_order(pool, jobs, IN_FLIGHT_PER_WORKER * workers):
+                # Negative indices were resolved inside the chunk: shift them by
+                # everything streamed before it. Positive indices are already global.
+                obj['face_verts'][obj['v_rel']] += rows['positions']
+                obj['face_uvs'][obj['vt_rel']] += rows['uvs']
+
+                # Chunk-local material ids -> global ids. Faces before the
+                # chunk's first usemtl keep the previous chunk's material.
+                to_global = np.array([mat_lookup.setdefault(n, len(mat_lookup)) for n in obj['materials']]
+                                     + [current_mat], dtype=np.int32)
+                obj['face_mats'] = to_global[obj['face_mats']]
+                current_mat = to_global[obj['last_mat']]
+
+                for name, (dtype, _) in _ARRAYS.items():
+                    arr = np.ascontiguousarray(obj[name], dtype=dtype)
+                    files[name].write(arr.tobytes())
+                    rows[name] += len(arr)
+
+                s = obj['stats']
+                stats['count'] += s['count']
+                stats['sum'] += s['sum']
+                stats['min'] = np.minimum(stats['min'], s['min'])
+                stats['max'] = np.maximum(stats['max'], s['max'])
+    finally:
+        for f in files.values():
+            f.close()
+
+    stats['center'] = stats['sum'] / max(stats['count'], 1)
+
+    result = {'materials': list(mat_lookup), 'out_dir': out_dir, 'backing': backing, 'stats': stats}
+    for name, (dtype, cols) in _ARRAYS.items():
+        shape = (rows[name],) if cols is None else (rows[name], cols)
+        path = os.path.join(out_dir, f"{name}.bin")
+        if rows[name] == 0:
+            result[name] = np.zeros(shape, dtype=dtype)
+        else:
+            result[name] = np.memmap(path, dtype=dtype, mode="r+", shape=shape)
+    return result
+
+
+# ==============================================================================
+# 3. OUT-OF-CORE TRANSFORMS
+# ==============================================================================
+def rotate_inplace(verts, rot_mat, block_rows=TRANSFORM_BLOCK_ROWS):
+    """verts = (rot_mat @ verts.T).T, one block of rows at a time."""
+    for s in range(0, len(verts), block_rows):
+        block = verts[s:s + block_rows]
+        block[:] = (rot_mat @ block.T).T
+    return verts
+
+
+# ==============================================================================
+# 4. ENTRY POINT
+# ==============================================================================
+def load_obj_auto(filepath, flip_winding=False):
+    """
+    load_obj for ordinary files, load_obj_streaming above STREAM_MIN_BYTES.
+    Only the streamed result carries 'stats', and its 'backing' temp dir
+    owns the memory-mapped files.
+    """
+    if os.path.getsize(filepath) < STREAM_MIN_BYTES:
+        return load_obj(filepath, flip_winding)
+    print(f"  Streaming {os.path.getsize(filepath) >> 20} MB OBJ in {CHUNK_BYTES >> 20} MB chunks...")
+    return load_obj_streaming(filepath, flip_winding)
@@ -0,0 +1,213 @@
+"""
+Palette-indexed textures for texture_rom.
+
+texture_rom stores a full RGB444 word per texel, although most atlases use
+a handful of colors (starwing: one per material). Storing a 4- or 8-bit
+palette index per texel plus a small RGB444 palette cuts the ROM to a third
+or two thirds, which is what makes a 128x128 atlas fit the BRAM a 64x64
+RGB444 one takes today.
+
+Quantization works on the distinct RGB444 words weighted by their texel
+counts (at most 4096 of them), so it is independent of the atlas size:
+
+  median_cut  split the box with the most weighted spread at its weighted
+              median, on its widest channel, until there are n boxes
+  kmeans      median cut, then Lloyd iterations on the weighted colors
+
+An atlas with no more distinct colors than palette entries is stored
+losslessly. sample() is the reference model of the indexed ROM: the word
+the fragment shader would receive for each texel address.
+"""
+
+import os
+
+import numpy as np
+from PIL import Image
+
+from fpga_renderer.encode import hex_lines, texture_words
+
+RGB444_BITS = 12
+
+# Xilinx RAMB36 aspect ratios (depth, width), parity bits usable as data
+RAMB36_SHAPES = ((32768, 1), (16384, 2), (8192, 4), (4096, 9), (2048, 18), (1024, 36))
+
+
+# ==============================================================================
+# 1. COLORS
+# ==============================================================================
+def split_channels(words):
+    """(...) RGB444 words -> (..., 3) int64 channels 0..15."""
+    words = np.asarray(words, dtype=np.int64)
+    return np.stack([(words >> 8) & 0xF, (words >> 4) & 0xF, words & 0xF], axis=-1)
+
+
+def join_channels(rgb):
+    rgb = np.asarray(rgb, dtype=np.int64)
+    return (rgb[..., 0] << 8) | (rgb[..., 1] << 4) | rgb[..., 2]
+
+
+def _weighted_mean(rgb, counts):
+    return np.rint((rgb * counts[:, None]).sum(axis=0) / counts.sum()).astype(np.int64)
+
+
+# ==============================================================================
+# 2. QUANTIZERS
+# ==============================================================================
+def median_cut(colors, counts, n_colors):
+    """Distinct (U, 3) colors with texel counts -> (K <= n_colors, 3) palette."""
+    boxes = [np.arange(len(colors))]
+    while len(boxes) < n_colors:
+        spread = [(counts[b][:, None] * (colors[b] - colors[b].mean(axis=0)) ** 2).sum()
+                  if len(b) > 1 else -1.0 for b in boxes]
+        i = int(np.argmax(spread))
+        if spread[i] <= 0:
+            break
+        box = boxes.pop(i)
+        c = colors[box]
+        channel = int(np.argmax(c.max(axis=0) - c.min(axis=0)))
+        order = box[np.argsort(c[:, channel], kind="stable")]
+        cum = np.cumsum(counts[order])
+        cut = int(np.searchsorted(cum, cum[-1] / 2.0)) + 1
+        cut = min(max(cut, 1), len(order) - 1)
+        boxes += [order[:cut], order[cut:]]
+    return np.array([_weighted_mean(colors[b], counts[b]) for b in boxes])
+
+
+def kmeans(colors, counts, n_colors, iterations=20):
+    """Weighted Lloyd iterations from the median-cut palette."""
+    palette = median_cut(colors, counts, n_colors).astype(np.float64)
+    weights = counts.astype(np.float64)
+    for _ in range(iterations):
+        dist = ((colors[:, None, :] - palette[None, :, :]) ** 2).sum(axis=-1)
+        label = dist.argmin(axis=1)
+        total = np.bincount(label, weights, minlength=len(palette))
+        sums = np.stack([np.bincount(label, weights * colors[:, k], minlength=len(palette))
+                         for k in range(3)], axis=1)
+        used = total > 0
+        moved = palette.copy()
+        moved[used] = sums[used] / total[used, None]
+        if np.allclose(moved, palette):
+            break
+        palette = moved
+    return np.unique(np.clip(np.rint(palette), 0, 15).astype(np.int64), axis=0)
+
+
+def quantize(words, n_colors=16, method="kmeans"):
+    """
+    (N,) RGB444 texel words -> (indices, palette): (N,) palette indices and
+    (K <= n_colors,) RGB444 palette words. Lossless when the texture has at
+    most n_colors distinct words.
+    """
+    words = np.asarray(words, dtype=np.int64)
+    distinct, inverse, counts = np.unique(words, return_inverse=True, return_counts=True)
+    if len(distinct) <= n_colors:
+        return inverse.astype(np.int64), distinct
+
+    colors = split_channels(distinct)
+    if method == "median_cut":
+        palette = median_cut(colors, counts, n_colors)
+    elif method == "kmeans":
+        palette = kmeans(colors, counts, n_colors)
+    else:
+        raise ValueError(f"Unknown quantizer {method!r}")
+
+    dist = ((colors[:, None, :] - palette[None, :, :]) ** 2).sum(axis=-1)
+    return dist.argmin(axis=1)[inverse], join_channels(palette)
+
+
+def sample(indices, palette):
+    """Reference indexed texture_rom: the RGB444 word at every texel address."""
+    return np.asarray(palette, dtype=np.int64)[np.asarray(indices)]
+
+
+def quantize_image(image, n_colors=16, method="kmeans"):
+    """
+    PIL image -> (image, words, indices, palette): the image as the indexed
+    ROM shows it (8-bit channels, RGB444 exact), its original RGB444 words,
+    and the quantize() result.
+    """
+    words = texture_words(image).astype(np.int64)
+    indices, palette = quantize(words, n_colors, method)
+    rgb = split_channels(sample(indices, palette)) * 17  # 0xF -> 0xFF
+    shaped = rgb.reshape(image.height, image.width, 3).astype(np.uint8)
+    return Image.fromarray(shaped), words, indices, palette
+
+
+# ==============================================================================
+# 3. MEMORY FILES + REPORT
+# ==============================================================================
+def index_bits(n_colors):
+    return max(1, int(np.ceil(np.log2(max(n_colors, 2)))))
+
+
+def write_palette_mem(index_path, palette_path, indices, palette, n_colors=16):
+    """
+    Index .mem (one texel per line, ceil(bits / 4) hex digits) and palette
+    .mem (n_colors RGB444 words, unused entries 000). Returns the index bits.
+    """
+    bits = index_bits(n_colors)
+    with open(index_path, "wb") as f:
+        f.write(hex_lines(indices, digits=-(-bits // 4)))
+    padded = np.zeros(n_colors, dtype=np.int64)
+    padded[:len(palette)] = palette
+    with open(palette_path, "wb") as f:
+        f.write(hex_lines(padded, digits=3))
+    return bits
+
+
+def ramb36_count(depth, width):
+    """Fewest RAMB36 blocks holding a depth x width ROM in one aspect ratio."""
+    return min(-(-depth // d) * -(-width // w) for d, w in RAMB36_SHAPES)
+
+
+def report(original, indices, palette, n_colors):
+    """Bit counts and BRAM blocks of the RGB444 and indexed ROMs, plus the error."""
+    texels = len(original)
+    bits = index_bits(n_colors)
+    error = split_channels(original) - split_channels(sample(indices, palette))
+    return {
+        'texels': texels,
+        'colors': len(np.unique(original)),
+        'palette': len(palette),
+        'index_bits': bits,
+        'rgb_bits': texels * RGB444_BITS,
+        'indexed_bits': texels * bits + n_colors * RGB444_BITS,
+        'rgb_ramb36': ramb36_count(texels, RGB444_BITS),
+        'indexed_ramb36': ramb36_count(texels, bits),
+        'max_error': int(np.abs(error).max()) if texels else 0,
+        'changed_texels': int(np.count_nonzero(np.any(error != 0, axis=-1))),
+    }
+
+
+def format_report(r):
+    saved = 1.0 - r['indexed_bits'] / max(1, r['rgb_bits'])
+    side = int(np.sqrt(r['texels']))
+    # Largest square power-of-two atlas whose indices fit the RGB444 ROM's blocks
+    big = side
+    while ramb36_count((2 * big) ** 2, r['index_bits']) <= r['rgb_ramb36']:
+        big *= 2
+    return (f"Texture: {r['texels']} texels, {r['colors']} colors -> {r['palette']}-entry palette "
+            f"({r['index_bits']}-bit indices)\n"
+            f"  RGB444 ROM:  {r['rgb_bits']} bits, {r['rgb_ramb36']} RAMB36\n"
+            f"  Indexed ROM: {r['indexed_bits']} bits ({100 * saved:.1f}% smaller), "
+            f"{r['indexed_ramb36']} RAMB36 + palette\n"
+            f"  Changed texels: {r['changed_texels']} (max channel error {r['max_error']})\n"
+            f"  Same blocks fit a {big}x{big} indexed atlas (vs {side}x{side} RGB444)")
+
+
+# ==============================================================================
+# 4. GENERATOR EXPORT
+# ==============================================================================
+def export_palette(atlas_img, out_dir, n_colors=16, method="kmeans"):
+    """
+    Quantizes a generator's atlas to n_colors entries and writes
+    texture_index.mem / texture_palette.mem to out_dir. Returns the atlas as
+    the indexed ROM shows it, for texture.mem and the preview.
+    """
+    quantized, words, indices, palette = quantize_image(atlas_img, n_colors, method)
+    index_path = os.path.join(out_dir, "texture_index.mem")
+    palette_path = os.path.join(out_dir, "texture_palette.mem")
+    write_palette_mem(index_path, palette_path, indices, palette, n_colors)
+    print(format_report(report(words, indices, palette, n_colors)))
+    print(f"Saved {index_path}, {palette_path}")
+    return quantized
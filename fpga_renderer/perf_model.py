@@ -0,0 +1,254 @@
+"""
+Transaction-level performance model of the render pipeline:
+
+    geometry_engine -> vertex_fifo -> triangle_assembler -> rasterizer
+
+Every vertex write, FIFO read and triangle hand-off is an event with the
+cycle at which it becomes visible, using the state-machine latencies of the
+RTL (see the constants below). Triangle contents come from the bit-exact
+geometry model, so the rasterizer's pixel_iterator scans the real bounding
+boxes and the assembler culls the real back faces.
+
+Backpressure follows the RTL:
+  - geometry_engine only looks at i_vertex_fifo_full before it starts a
+    frame. Mid-stream it writes a vertex every GEOM_CYCLES_PER_VERTEX cycles
+    no matter what, and vertex_fifo drops writes while it is full. Dropped
+    vertices are counted, because they shift the triangle grouping.
+  - triangle_assembler holds OUTPUT_TRI while i_raster_busy is high and
+    stops reading the FIFO meanwhile.
+
+Per frame the model reports the cycle count, where each stage spent its
+cycles (busy / starved / blocked) and a FIFO occupancy histogram. sweep()
+repeats this over FIFO depths to size the FIFO and predict the frame rate.
+"""
+
+from bisect import bisect_right
+
+import numpy as np
+
+from fpga_renderer.geometry_model import transform
+from fpga_renderer.raster_model import fifo_vertices, cull_and_box, BUFFER_DEPTH
+
+CLOCK_HZ = 100_000_000  # urbana.xdc: 10 ns
+FIFO_DEPTH = 64         # fpga_top: vertex_fifo #(.DEPTH(64))
+
+# Iterative dividers (q16_16_div / q2_30_div): start seen -> o_done seen by
+# the caller: latch, 32 shift/subtract steps + 1, sign correct, registered done
+DIV_CYCLES = 35
+
+# geometry_engine, per vertex: 16 MVP words (the 5 vertex words are fetched
+# alongside), 4 matrix rows, the perspective divide, the viewport map
+GEOM_START_CYCLES = 2
+GEOM_FETCH_CYCLES = 16
+GEOM_TRANSFORM_CYCLES = 4
+GEOM_DIVIDE_CYCLES = DIV_CYCLES + 1
+GEOM_VIEWPORT_CYCLES = 1
+GEOM_CYCLES_PER_VERTEX = (GEOM_FETCH_CYCLES + GEOM_TRANSFORM_CYCLES +
+                          GEOM_DIVIDE_CYCLES + GEOM_VIEWPORT_CYCLES)
+GEOM_EOS_CYCLES = 6     # Fetching the EOS block until S_IDLE
+FIFO_WRITE_CYCLES = 1   # o_vertex_valid is registered
+
+# triangle_assembler: WAIT_Vn + READ_Vn per vertex, then CULL_CHECK
+ASM_READ_CYCLES = 2
+ASM_CULL_CYCLES = 1
+
+# rasterizer, per accepted triangle: IDLE + SETUP_MATH + SETUP_DIV, the
+# pixel_iterator scan (one pixel per cycle plus start / end-of-box / DONE),
+# then RASTER_FLUSH (5 counts, the return to IDLE, o_busy seen low)
+RAST_SETUP_CYCLES = 2 + DIV_CYCLES
+ITER_OVERHEAD_CYCLES = 3
+RAST_FLUSH_CYCLES = 7
+
+# fpga_top T_RESETING_BUFFERS: one frame / z-buffer address per cycle
+CLEAR_CYCLES = BUFFER_DEPTH
+
+
+# ==============================================================================
+# 1. STAGES
+# ==============================================================================
+def stream_triangles(x, y):
+    """
+    cull_and_box of every three consecutive FIFO entries: (drawn, scanned
+    pixels) lists per stream triangle, what the frame sees when no vertex is
+    dropped.
+    """
+    n_tris = len(x) // 3
+    drawn, box = cull_and_box(np.asarray(x[:n_tris * 3]).reshape(n_tris, 3),
+                              np.asarray(y[:n_tris * 3]).reshape(n_tris, 3))
+    return drawn.tolist(), box['pixels'].tolist()
+
+
+def frame_vertices(vertices, mvp, frame):
+    """(x, y) lists of screen positions in FIFO order for one MVP frame."""
+    verts = fifo_vertices(transform(vertices, mvp[frame]), 0)
+    return verts['x'].tolist(), verts['y'].tolist()
+
+
+# ==============================================================================
+# 2. FRAME SIMULATION
+# ==============================================================================
+def simulate_frame(x, y, fifo_depth=FIFO_DEPTH, clear_buffers=False):
+    """
+    Runs one frame of FIFO-order screen positions through the pipeline.
+
+    Returns a dict of cycle counts: 'cycles' (start to all stages idle),
+    'geometry' / 'assembler' / 'rasterizer' breakdowns, 'triangles',
+    'culled', 'pixels', 'dropped' vertices and 'fifo_histogram' (cycles
+    spent at each occupancy 0..fifo_depth).
+    """
+    n = len(x)
+    tri_drawn, tri_pixels = stream_triangles(x, y)
+    start = CLEAR_CYCLES if clear_buffers else 0
+    geom_done = start + GEOM_START_CYCLES + n * GEOM_CYCLES_PER_VERTEX + GEOM_EOS_CYCLES
+
+    writes = []     # Cycle each accepted vertex shows up in the FIFO count
+    read_out = []   # Cycle each read leaves the FIFO count (rising, one reader)
+    stored = []     # Vertex ids in FIFO order
+    dropped = 0
+
+    asm_wait = start          # Next cycle the assembler sits in WAIT_Vn
+    asm_starved = asm_blocked = 0
+    rast_ready = start        # First cycle o_busy reads low
+    rast_starved = rast_setup = rast_scan = rast_flush = 0
+    triangles = culled = pixels = 0
+
+    for i in range(n):
+        # o_vertex_valid is seen by the FIFO one cycle after S_VIEWPORT_MAP
+        write = start + GEOM_START_CYCLES + (i + 1) * GEOM_CYCLES_PER_VERTEX + FIFO_WRITE_CYCLES
+        if len(writes) - bisect_right(read_out, write - 1) >= fifo_depth:
+            dropped += 1  # i_we && o_full: the vertex is lost
+            continue
+        writes.append(write)
+        stored.append(i)
+
+        # Read it: WAIT_Vn until the FIFO count shows it, then READ_Vn
+        read = max(asm_wait, write)
+        asm_starved += read - asm_wait
+        read_out.append(read + ASM_READ_CYCLES)
+        asm_wait = read + ASM_READ_CYCLES
+        if len(stored) % 3:
+            continue
+
+        # Third vertex: CULL_CHECK, then OUTPUT_TRI until the rasterizer is free
+        a, b, c = stored[-3:]
+        asm_wait += ASM_CULL_CYCLES
+        if c == a + 2 and a % 3 == 0:
+            drawn, n_pix = tri_drawn[a // 3], tri_pixels[a // 3]
+        else:
+            # After a dropped vertex the FIFO regroups the stream
+            drawn, box = cull_and_box([x[a], x[b], x[c]], [y[a], y[b], y[c]])
+            drawn, n_pix = bool(drawn), int(box['pixels'])
+        if not drawn:
+            culled += 1
+            continue
+        leave = max(asm_wait, rast_ready)
+        asm_blocked += leave - asm_wait
+        accept = leave + 1
+        asm_wait = accept
+
+        rast_starved += accept - rast_ready
+        rast_setup += RAST_SETUP_CYCLES
+        rast_scan += n_pix + ITER_OVERHEAD_CYCLES
+        rast_flush += RAST_FLUSH_CYCLES
+        rast_ready = accept + RAST_SETUP_CYCLES + n_pix + ITER_OVERHEAD_CYCLES + RAST_FLUSH_CYCLES
+        triangles += 1
+        pixels += n_pix
+
+    end = max(geom_done, asm_wait, rast_ready)
+    asm_starved += end - asm_wait
+    rast_starved += end - rast_ready
+    return {
+        'cycles': end,
+        'clear': start,
+        'geometry': {'busy': geom_done - start, 'idle': end - geom_done},
+        'assembler': {'busy': len(stored) * ASM_READ_CYCLES + (len(stored) // 3) * ASM_CULL_CYCLES + triangles,
+                      'starved': asm_starved, 'blocked': asm_blocked},
+        'rasterizer': {'setup': rast_setup, 'scan': rast_scan, 'flush': rast_flush,
+                       'starved': rast_starved},
+        'triangles': triangles,
+        'culled': culled,
+        'pixels': pixels,
+        'dropped': dropped,
+        'fifo_histogram': occupancy_histogram(writes, read_out, start, end, fifo_depth),
+    }
+
+
+def occupancy_histogram(writes, reads, start, end, fifo_depth):
+    """Cycles spent at each FIFO count 0..fifo_depth over [start, end)."""
+    times = np.concatenate([[start], writes, reads, [end]])
+    steps = np.concatenate([[0], np.ones(len(writes)), -np.ones(len(reads)), [0]])
+    order = np.argsort(times, kind="stable")
+    times, level = times[order], np.cumsum(steps[order]).astype(np.int64)
+    return np.bincount(level[:-1], weights=np.diff(times), minlength=fifo_depth + 1).astype(np.int64)
+
+
+# ==============================================================================
+# 3. ANIMATIONS AND SWEEPS
+# ==============================================================================
+def simulate(vertices, mvp, frames=None, fifo_depth=FIFO_DEPTH, clear_buffers=False):
+    """simulate_frame for every frame of the MVP table (or the given ones)."""
+    frames = range(len(mvp)) if frames is None else frames
+    return [simulate_frame(*frame_vertices(vertices, mvp, f), fifo_depth, clear_buffers)
+            for f in frames]
+
+
+def summarize(results, clock_hz=CLOCK_HZ):
+    """Worst / mean frame cycles, predicted FPS and totals over a list of frames."""
+    cycles = np.array([r['cycles'] for r in results])
+    histogram = np.sum([r['fifo_histogram'] for r in results], axis=0)
+    return {
+        'frames': len(results),
+        'worst_cycles': int(cycles.max()),
+        'mean_cycles': float(cycles.mean()),
+        'worst_fps': clock_hz / cycles.max(),
+        'mean_fps': clock_hz / cycles.mean(),
+        'dropped': int(sum(r['dropped'] for r in results)),
+        'max_occupancy': int(np.flatnonzero(histogram)[-1]),
+        'fifo_histogram': histogram,
+        **{stage: {k: int(sum(r[stage][k] for r in results)) for k in results[0][stage]}
+           for stage in ('geometry', 'assembler', 'rasterizer')},
+    }
+
+
+def sweep(vertices, mvp, depths, frames=None, clear_buffers=False, clock_hz=CLOCK_HZ):
+    """summarize() for each FIFO depth. Geometry is transformed once per frame."""
+    frames = range(len(mvp)) if frames is None else frames
+    per_frame = [frame_vertices(vertices, mvp, f) for f in frames]
+    return {depth: summarize([simulate_frame(x, y, depth, clear_buffers) for x, y in per_frame], clock_hz)
+            for depth in depths}
+
+
+def pick_depth(sweep_results, tolerance=0.01):
+    """
+    Smallest depth that drops no vertices and is within tolerance of the best
+    worst-case frame time. None if every depth drops vertices.
+    """
+    safe = {d: s for d, s in sweep_results.items() if s['dropped'] == 0}
+    if not safe:
+        return None
+    best = min(s['worst_cycles'] for s in safe.values())
+    return min(d for d, s in safe.items() if s['worst_cycles'] <= best * (1 + tolerance))
+
+
+# ==============================================================================
+# 4. REPORTS
+# ==============================================================================
+def format_summary(s, clock_hz=CLOCK_HZ):
+    lines = [f"Frames: {s['frames']}, worst {s['worst_cycles']} cycles "
+             f"({s['worst_fps']:.1f} FPS @ {clock_hz / 1e6:g} MHz), mean {s['mean_cycles']:.0f} cycles "
+             f"({s['mean_fps']:.1f} FPS)",
+             f"FIFO: max occupancy {s['max_occupancy']}, dropped vertices {s['dropped']}"]
+    for stage in ('geometry', 'assembler', 'rasterizer'):
+        total = sum(s[stage].values()) or 1
+        parts = ", ".join(f"{k} {100.0 * v / total:.1f}%" for k, v in s[stage].items())
+        lines.append(f"  {stage:<10} {parts}")
+    return "\n".join(lines)
+
+
+def format_histogram(histogram, bins=8, width=40):
+    """Text bars of the time-weighted FIFO occupancy, grouped into bins."""
+    edges = np.unique(np.linspace(0, len(histogram), bins + 1).astype(int))
+    sums = np.add.reduceat(histogram, edges[:-1])
+    total = sums.sum() or 1
+    return "\n".join(f"  {lo:>4}-{hi - 1:<4} {'#' * round(width * c / total):<{width}} {100.0 * c / total:5.1f}%"
+                     for lo, hi, c in zip(edges[:-1], edges[1:], sums))
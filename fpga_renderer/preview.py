@@ -0,0 +1,236 @@
+"""
+Software rasterizer for the PC-side previews.
+
+Triangles are drawn as array math: edge functions, barycentric UV
+interpolation and the texel gather are whole-array operations over the
+bounding boxes of a batch of triangles, so previews of subdivided or imported
+meshes take seconds instead of minutes. The float math runs in the same order
+as the old per-pixel loop and later triangles still overwrite earlier ones,
+so the pixels written are identical.
+
+rasterize_zbuffered is the board-accurate variant: a per-pixel z-buffer with
+the hardware's 8-bit depth and strict '<' test, backface culling with the
+triangle_assembler's winding, and wrapping 64-texel addressing.
+"""
+
+import numpy as np
+
+# Pixels evaluated per batch (bounds memory for large meshes)
+BATCH_PIXELS = 1 << 21
+
+
+# ==============================================================================
+# 1. HELPERS
+# ==============================================================================
+def _edge_function(a, b, c_x, c_y):
+    """Same expression as the old scalar edge_function, on arrays of points."""
+    return (c_x - a[..., 0]) * (b[..., 1] - a[..., 1]) - (c_y - a[..., 1]) * (b[..., 0] - a[..., 0])
+
+
+def _boxes(pts, width, height):
+    """Integer bounding boxes (min_x, max_x, min_y, max_y) clamped to the screen."""
+    # Clip first: vertices near w = 0 project to huge (or inf) coordinates
+    lo = np.floor(np.clip(pts.min(axis=1), -2.0**31, 2.0**31)).astype(np.int64)
+    hi = np.ceil(np.clip(pts.max(axis=1), -2.0**31, 2.0**31)).astype(np.int64)
+    return (np.maximum(lo[:, 0], 0), np.minimum(hi[:, 0], width - 1),
+            np.maximum(lo[:, 1], 0), np.minimum(hi[:, 1], height - 1))
+
+
+def _box_pixels(min_x, max_x, min_y, max_y):
+    """Triangle id, x, y of every pixel in each box, row-major like the old loop."""
+    w = max_x - min_x + 1
+    count = w * (max_y - min_y + 1)
+    tri = np.repeat(np.arange(len(count)), count)
+    k = np.arange(count.sum()) - np.repeat(np.cumsum(count) - count, count)
+    return tri, min_x[tri] + k % w[tri], min_y[tri] + k // w[tri]
+
+
+# ==============================================================================
+# 2. TEXTURED TRIANGLES
+# ==============================================================================
+def rasterize_textured_triangles(canvas, texture, screen_verts, uvs):
+    """
+    Barycentric rasterizer with affine texture mapping, drawing into canvas in
+    place in list order (later triangles overwrite earlier ones).
+
+    canvas:       (H, W, 3) uint8 array
+    texture:      (tex_h, tex_w, 3) uint8 array
+    screen_verts: (T, 3, 2) screen x, y per corner
+    uvs:          (T, 3, 2) normalized (0.0-1.0) texture coordinates
+    """
+    height, width = canvas.shape[:2]
+    tex_h, tex_w = texture.shape[:2]
+    pts = np.asarray(screen_verts, dtype=np.float64).reshape(-1, 3, 2)
+    uvs = np.asarray(uvs, dtype=np.float64).reshape(-1, 3, 2)
+    if len(pts) == 0:
+        return
+
+    # 1. Setup: skip degenerate triangles and empty boxes
+    area = _edge_function(pts[:, 0], pts[:, 1], pts[:, 2, 0], pts[:, 2, 1])
+    min_x, max_x, min_y, max_y = _boxes(pts, width, height)
+    keep = (np.abs(area) >= 1e-9) & (min_x <= max_x) & (min_y <= max_y)
+    ids = np.flatnonzero(keep)
+    min_x, max_x, min_y, max_y = min_x[ids], max_x[ids], min_y[ids], max_y[ids]
+
+    count = (max_x - min_x + 1) * (max_y - min_y + 1)
+    batch_id = np.cumsum(count) // BATCH_PIXELS
+    edges = np.concatenate(([0], np.flatnonzero(np.diff(batch_id)) + 1, [len(ids)]))
+
+    for first, last in zip(edges[:-1], edges[1:]):
+        s = slice(first, last)
+        local, x, y = _box_pixels(min_x[s], max_x[s], min_y[s], max_y[s])
+        tri = ids[first:last][local]
+        p0, p1, p2 = pts[tri, 0], pts[tri, 1], pts[tri, 2]
+
+        # 2. Barycentric weights for every box pixel
+        w0 = _edge_function(p1, p2, x, y)
+        w1 = _edge_function(p2, p0, x, y)
+        w2 = _edge_function(p0, p1, x, y)
+
+        # Inside test with the same loose tolerance for edges
+        inside = (w0 >= -1e-9) & (w1 >= -1e-9) & (w2 >= -1e-9)
+        tri, x, y = tri[inside], x[inside], y[inside]
+        a = area[tri]
+        lambda0 = w0[inside] / a
+        lambda1 = w1[inside] / a
+        lambda2 = w2[inside] / a
+
+        # 3. Interpolate normalized UVs and map them to texels
+        uv = uvs[tri]
+        u_norm = lambda0 * uv[:, 0, 0] + lambda1 * uv[:, 1, 0] + lambda2 * uv[:, 2, 0]
+        v_norm = lambda0 * uv[:, 0, 1] + lambda1 * uv[:, 1, 1] + lambda2 * uv[:, 2, 1]
+        # astype truncates toward zero like int(); clamp keeps samples inside the image
+        tex_x = np.clip((u_norm * tex_w).astype(np.int64), 0, tex_w - 1)
+        tex_y = np.clip((v_norm * tex_h).astype(np.int64), 0, tex_h - 1)
+
+        # 4. Last triangle wins where boxes overlap, then gather texels in bulk
+        addr = y * width + x
+        _, last_hit = np.unique(addr[::-1], return_index=True)
+        pick = len(addr) - 1 - last_hit
+        canvas[y[pick], x[pick]] = texture[tex_y[pick], tex_x[pick]]
+
+
+def rasterize_textured_triangle(canvas, texture, p0, p1, p2, uv0, uv1, uv2):
+    """Single-triangle form: p* are screen (x, y), uv* normalized texture coordinates."""
+    rasterize_textured_triangles(canvas, texture, [[p0, p1, p2]], [[uv0, uv1, uv2]])
+
+
+# ==============================================================================
+# 3. PROJECTION
+# ==============================================================================
+def project_vertices(verts, mvp, width, height):
+    """
+    (N, 3) positions -> (N, 2) screen x, y (y down, like PIL) and (N,) NDC z,
+    with the same w guard the old per-vertex preview loops used.
+    """
+    verts = np.asarray(verts, dtype=np.float64)
+    v4 = np.concatenate([verts, np.ones((len(verts), 1))], axis=1)
+    clip = v4 @ np.asarray(mvp, dtype=np.float64).T
+    we = np.where(clip[:, 3] != 0, clip[:, 3], 0.0001)
+    ndc = clip[:, :3] / we[:, None]
+    screen = np.stack([(ndc[:, 0] + 1) * (width / 2), (1 - ndc[:, 1]) * (height / 2)], axis=1)
+    return screen, ndc[:, 2]
+
+
+def quantize_depth(z_ndc, depth_bits=8):
+    """NDC z -> the integer depth geometry_engine emits: floor((z + 1) * 127.5) for 8 bits, wrapped."""
+    full = (1 << depth_bits) - 1
+    scaled = np.clip(np.nan_to_num((np.asarray(z_ndc) + 1.0) * (full / 2.0)), -2.0**62, 2.0**62)
+    return np.floor(scaled).astype(np.int64) & full
+
+
+# ==============================================================================
+# 4. Z-BUFFERED TEXTURED TRIANGLES
+# ==============================================================================
+def rasterize_zbuffered(canvas, texture, screen_verts, z_ndc, uvs, depth_bits=8,
+                        cull_backfaces=True, zbuffer=None, mips=None, lod=None):
+    """
+    Per-pixel z-buffered, textured fill, drawing into canvas in place.
+
+    screen_verts: (T, 3, 2) screen x, y per corner (y down)
+    z_ndc:        (T, 3) NDC depth per corner
+    uvs:          (T, 3, 2) normalized texture coordinates (wrap like the texture_rom address)
+    depth_bits:   quantize depth like the board (8 = fragment_shader), None for float depth
+    mips, lod:    optional mip chain (level 0 first, see fpga_renderer.mipmap) and
+                  (T,) level per triangle; texture is ignored when they are given
+
+    A fragment is written only if its depth is '<' the buffer, so the nearest
+    fragment wins and earlier triangles win ties, as on the FPGA. With
+    cull_backfaces, only triangles counter-clockwise in hardware (y up) screen
+    space are drawn. Returns the (H, W) z-buffer.
+    """
+    height, width = canvas.shape[:2]
+    tex_h, tex_w = texture.shape[:2]
+    pts = np.asarray(screen_verts, dtype=np.float64).reshape(-1, 3, 2)
+    uvs = np.asarray(uvs, dtype=np.float64).reshape(-1, 3, 2)
+    z_ndc = np.asarray(z_ndc, dtype=np.float64).reshape(-1, 3)
+
+    if depth_bits:
+        clear = (1 << depth_bits) - 1
+        depth = quantize_depth(z_ndc, depth_bits).astype(np.float64)
+    else:
+        clear = np.inf
+        depth = z_ndc
+    if zbuffer is None:
+        zbuffer = np.full((height, width), clear, dtype=np.float64)
+    zflat = zbuffer.reshape(-1)
+    if len(pts) == 0:
+        return zbuffer
+
+    # 1. Setup: signed area (> 0 is counter-clockwise with y up), cull, boxes
+    area = _edge_function(pts[:, 0], pts[:, 1], pts[:, 2, 0], pts[:, 2, 1])
+    min_x, max_x, min_y, max_y = _boxes(pts, width, height)
+    keep = (area > 0) if cull_backfaces else (np.abs(area) >= 1e-9)
+    keep &= (min_x <= max_x) & (min_y <= max_y)
+    ids = np.flatnonzero(keep)
+    min_x, max_x, min_y, max_y = min_x[ids], max_x[ids], min_y[ids], max_y[ids]
+
+    count = (max_x - min_x + 1) * (max_y - min_y + 1)
+    batch_id = np.cumsum(count) // BATCH_PIXELS
+    edges = np.concatenate(([0], np.flatnonzero(np.diff(batch_id)) + 1, [len(ids)]))
+
+    for first, last in zip(edges[:-1], edges[1:]):
+        s = slice(first, last)
+        local, x, y = _box_pixels(min_x[s], max_x[s], min_y[s], max_y[s])
+        tri = ids[first:last][local]
+        p0, p1, p2 = pts[tri, 0], pts[tri, 1], pts[tri, 2]
+
+        # 2. Barycentric weights, normalized so either winding reads as inside
+        sign = np.sign(area[tri])
+        w0 = _edge_function(p1, p2, x, y) * sign
+        w1 = _edge_function(p2, p0, x, y) * sign
+        w2 = _edge_function(p0, p1, x, y) * sign
+        inside = (w0 >= 0) & (w1 >= 0) & (w2 >= 0)
+        tri, x, y = tri[inside], x[inside], y[inside]
+        a = np.abs(area[tri])
+        lambdas = np.stack([w0[inside], w1[inside], w2[inside]], axis=1) / a[:, None]
+
+        # 3. Depth, floored to integer steps when emulating the hardware
+        z = (lambdas * depth[tri]).sum(axis=1)
+        if depth_bits:
+            z = np.floor(z)
+        near = z < clear
+        tri, x, y, z, lambdas = tri[near], x[near], y[near], z[near], lambdas[near]
+
+        # 4. Per pixel: nearest fragment, earliest triangle on ties
+        addr = y * width + x
+        order = np.lexsort((tri, z, addr))
+        head = order[np.concatenate(([True], addr[order][1:] != addr[order][:-1]))]
+        head = head[z[head] < zflat[addr[head]]]
+
+        # 5. Texture only the surviving fragments
+        uv = (lambdas[head, :, None] * uvs[tri[head]]).sum(axis=1)
+        zflat[addr[head]] = z[head]
+        if mips is None:
+            tex_x = np.floor(uv[:, 0] * tex_w).astype(np.int64) % tex_w
+            tex_y = np.floor(uv[:, 1] * tex_h).astype(np.int64) % tex_h
+            canvas[y[head], x[head]] = texture[tex_y, tex_x]
+            continue
+        level = np.asarray(lod)[tri[head]]
+        for lv in np.unique(level):
+            sel = level == lv
+            size_y, size_x = mips[lv].shape[:2]
+            tex_x = np.floor(uv[sel, 0] * size_x).astype(np.int64) % size_x
+            tex_y = np.floor(uv[sel, 1] * size_y).astype(np.int64) % size_y
+            canvas[y[head][sel], x[head][sel]] = mips[lv][tex_y, tex_x]
+    return zbuffer
@@ -0,0 +1,204 @@
+"""
+Per-stage timing for the asset generators.
+
+Each generator wraps its stages (parse, atlas, transform, export, preview)
+in stage(); while profiling is off that is a no-op. With it on, every stage
+records its wall and CPU time plus whatever counts the generator fills in
+(rows written, faces, texels, ...), and nested stages remember their parent.
+
+  python gen.py --profile                 trace to profile_trace.json
+  python gen.py --profile trace.csv       one CSV row per stage
+  python gen.py --profile-stage atlas    also cProfile that stage (implies
+                                          --profile): writes
+                                          <trace>.atlas.pstats, prints the top
+  python gen.py --profile --no-cache      run every stage, not the cached outputs
+
+The asset build passes the same options per job (python -m fpga_renderer
+build scene.toml --profile) and puts each job's stage totals in the manifest.
+"""
+
+import argparse
+import contextlib
+import cProfile
+import csv
+import io
+import json
+import os
+import platform
+import pstats
+import sys
+import time
+
+DEFAULT_TRACE = "profile_trace.json"
+TOP_FUNCTIONS = 15
+
+_records = None  # list while profiling, None when off
+_stack = []
+_options = {}
+
+
+# ==============================================================================
+# 1. RECORDING
+# ==============================================================================
+def enable(cprofile_stage=None, dump_prefix=None):
+    """Starts a fresh trace. cprofile_stage: stage name to run under cProfile."""
+    global _records
+    _records = []
+    _stack.clear()
+    _options.update(cprofile_stage=cprofile_stage, dump_prefix=dump_prefix or "profile", started=time.time(),
+                    clock=time.perf_counter())
+
+
+def disable():
+    global _records
+    _records = None
+
+
+def enabled():
+    return _records is not None
+
+
+@contextlib.contextmanager
+def stage(name, **counts):
+    """
+    Times the block as stage name. Yields a dict of counts the block may add
+    to (counts['faces'] = ...); a throwaway dict when profiling is off.
+    """
+    if _records is None:
+        yield dict(counts)
+        return
+
+    t0, c0 = time.perf_counter(), time.process_time()
+    record = {'stage': name, 'parent': _stack[-1]['stage'] if _stack else None,
+              'depth': len(_stack), 'start': t0 - _options['clock'],
+              'seconds': 0.0, 'cpu_seconds': 0.0, 'counts': dict(counts)}
+    profiler = cProfile.Profile() if name == _options.get('cprofile_stage') else None
+    _stack.append(record)
+    if profiler:
+        profiler.enable()
+    try:
+        yield record['counts']
+    finally:
+        if profiler:
+            profiler.disable()
+        record['seconds'] = time.perf_counter() - t0
+        record['cpu_seconds'] = time.process_time() - c0
+        _stack.pop()
+        _records.append(record)
+        if profiler:
+            record['pstats'] = _dump(profiler, name)
+
+
+def _dump(profiler, name):
+    path = f"{_options['dump_prefix']}.{name}.pstats"
+    profiler.dump_stats(path)
+    out = io.StringIO()
+    pstats.Stats(profiler, stream=out).sort_stats("cumulative").print_stats(TOP_FUNCTIONS)
+    print(out.getvalue())
+    return path
+
+
+def records():
+    """
+    Finished stages in completion order (children before their parent);
+    'start' is seconds since enable().
+    """
+    return list(_records or [])
+
+
+# ==============================================================================
+# 2. TRACES
+# ==============================================================================
+def trace(script=None):
+    """JSON-able trace: run metadata and the stage records."""
+    return {
+        'script': script or os.path.abspath(sys.argv[0]),
+        'started': _options.get('started'),
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'cpus': os.cpu_count(),
+        'stages': records(),
+    }
+
+
+def write_trace(path, script=None):
+    """Writes the trace as JSON, or as CSV (one row per stage, one column per count) for .csv."""
+    data = trace(script)
+    if path.lower().endswith(".csv"):
+        keys = sorted({k for r in data['stages'] for k in r['counts']})
+        with open(path, "w", newline="") as f:
+            w = csv.writer(f)
+            w.writerow(["stage", "parent", "depth", "start", "seconds", "cpu_seconds"] + keys)
+            for r in data['stages']:
+                w.writerow([r['stage'], r['parent'] or "", r['depth'], f"{r['start']:.6f}", f"{r['seconds']:.6f}",
+                            f"{r['cpu_seconds']:.6f}"] + [r['counts'].get(k, "") for k in keys])
+    else:
+        with open(path, "w") as f:
+            json.dump(data, f, indent=2)
+    return path
+
+
+def totals(stages=None):
+    """Stage name -> summed seconds and counts (a stage may run more than once)."""
+    out = {}
+    for r in records() if stages is None else stages:
+        t = out.setdefault(r['stage'], {'seconds': 0.0, 'calls': 0})
+        t['seconds'] += r['seconds']
+        t['calls'] += 1
+        for k, v in r['counts'].items():
+            if isinstance(v, (int, float)):
+                t[k] = t.get(k, 0) + v
+    return out
+
+
+def format_trace(stages=None):
+    """Indented table in run order (parents before children), with counts per second."""
+    stages = records() if stages is None else stages
+    lines = [f"  {'Stage':<24} {'Wall (s)':>9} {'CPU (s)':>9}  Counts"]
+    # Records complete child-first; start order puts each parent above its children
+    for r in sorted(stages, key=lambda r: (r['start'], r['depth'])):
+        counts = ", ".join(f"{k} {v}" + (f" ({v / r['seconds']:,.0f}/s)" if r['seconds'] > 0
+                                          and isinstance(v, (int, float)) and v > 0 else "")
+                           for k, v in r['counts'].items())
+        lines.append(f"  {'  ' * r['depth'] + r['stage']:<24} {r['seconds']:>9.3f} "
+                     f"{r['cpu_seconds']:>9.3f}  {counts}")
+    return "\n".join(lines)
+
+
+# ==============================================================================
+# 3. COMMAND LINE
+# ==============================================================================
+def add_arguments(parser):
+    parser.add_argument("--profile", nargs="?", const=DEFAULT_TRACE, default=None, metavar="TRACE",
+                        help=f"time every stage; trace to TRACE (.json or .csv, default {DEFAULT_TRACE})")
+    parser.add_argument("--profile-stage", default=None, metavar="STAGE",
+                        help="also run STAGE under cProfile and dump its pstats (implies --profile)")
+    parser.add_argument("--no-cache", action="store_true", help="ignore the build cache")
+
+
+@contextlib.contextmanager
+def session(argv=None):
+    """
+    Command line handling for a generator's __main__ block. Yields the parsed
+    options ('profile', 'profile_stage', 'no_cache'); with --profile (or
+    --profile-stage, which implies it), the whole block is the 'total' stage
+    and the trace is written at the end.
+    """
+    parser = argparse.ArgumentParser()
+    add_arguments(parser)
+    options = vars(parser.parse_args(argv))
+    if options['profile_stage'] and not options['profile']:
+        options['profile'] = DEFAULT_TRACE
+    if not options['profile']:
+        yield options
+        return
+
+    enable(options['profile_stage'], os.path.splitext(options['profile'])[0])
+    try:
+        with stage("total"):
+            yield options
+    finally:
+        print("\nProfile:")
+        print(format_trace())
+        print(f"Saved {write_trace(options['profile'])}")
+        disable()
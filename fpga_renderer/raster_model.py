@@ -0,0 +1,256 @@
+"""
+Bit-exact model of the back half of the pipeline: vertex FIFO ->
+triangle_assembler -> rasterizer (pixel_iterator, edge_engine, interpolator,
+texture_rom) -> fragment_shader, producing the same 320x240 RGB444 frame
+buffer and 8-bit z-buffer as the RTL.
+
+Pixels are processed as arrays, a batch of triangles at a time. The z-test is
+a strict '<' applied in triangle order, so the surviving fragment at an
+address is the smallest z, earliest triangle on ties: that is what the batch
+resolve computes. Inside one triangle every pixel address is unique, so the
+6-cycle read/write distance of the z-buffer never matters.
+"""
+
+import os
+
+import numpy as np
+
+from fpga_renderer.encode import read_hex_words
+from fpga_renderer.fixed_point import wrap32, q2_30_div
+from fpga_renderer.geometry_model import transform, RTL_DIR
+from fpga_renderer.indexed import transform_indexed
+
+TEXTURE_MEM_FILE = os.path.join(RTL_DIR, "texture.mem")
+
+SCREEN_WIDTH = 320
+SCREEN_HEIGHT = 240
+BUFFER_DEPTH = SCREEN_WIDTH * SCREEN_HEIGHT  # frame / z-buffer BRAM DEPTH
+ADDR_BITS = 17                               # o_zb_addr / o_fb_addr width
+TEXTURE_DEPTH = 4096
+
+FB_CLEAR = 0x000
+ZB_CLEAR = 0xFF
+
+# Pixels evaluated per batch (bounds memory; whole frames usually fit in one)
+BATCH_PIXELS = 1 << 21
+
+
+# ==============================================================================
+# 1. INPUTS
+# ==============================================================================
+def load_texture_rom(path=TEXTURE_MEM_FILE):
+    """texture_rom contents: (4096,) 12-bit RGB444 words."""
+    rom = np.zeros(TEXTURE_DEPTH, dtype=np.int64)
+    words = read_hex_words(path, TEXTURE_DEPTH)
+    rom[:len(words)] = words & 0xFFF
+    return rom
+
+
+def fifo_vertices(geom, frame):
+    """
+    One frame of geometry_model.transform output as the FIFO carries it:
+    {x[31:16], y[31:16], z, u, v}. Returns a dict of (N,) int64 arrays.
+    """
+    return {
+        'x': geom['o_x'][frame] >> 16,  # signed [15:0]
+        'y': geom['o_y'][frame] >> 16,
+        'z': geom['o_z'][frame],
+        'u': geom['o_u'][frame],
+        'v': geom['o_v'][frame],
+    }
+
+
+# ==============================================================================
+# 2. TRIANGLE ASSEMBLER + SETUP
+# ==============================================================================
+# triangle_assembler emits every three FIFO entries as (v0, v2, v1)
+ASSEMBLER_ORDER = np.array([0, 2, 1])
+
+
+def cull_and_box(x, y):
+    """
+    (..., 3) FIFO x / y per triangle, in stream order. Returns (drawn, box):
+    the CULL_CHECK result on the emitted (v0, v2, v1),
+    (x1-x0)*(y2-y0) - (x2-x0)*(y1-y0) < 0 in 32 bits, and the clamped
+    bounding box pixel_iterator scans, {'min_x', 'min_y', 'max_x', 'max_y',
+    'pixels'}. The box max never goes below the min because pixel_iterator
+    always emits its first pixel and then one per row.
+    """
+    x, y = np.asarray(x)[..., ASSEMBLER_ORDER], np.asarray(y)[..., ASSEMBLER_ORDER]
+    cross = wrap32(wrap32((x[..., 1] - x[..., 0]) * (y[..., 2] - y[..., 0])) -
+                   wrap32((x[..., 2] - x[..., 0]) * (y[..., 1] - y[..., 0])))
+    min_x = np.maximum(x.min(axis=-1), 0)
+    min_y = np.maximum(y.min(axis=-1), 0)
+    max_x = np.maximum(np.minimum(x.max(axis=-1), SCREEN_WIDTH - 1), min_x)
+    max_y = np.maximum(np.minimum(y.max(axis=-1), SCREEN_HEIGHT - 1), min_y)
+    box = {'min_x': min_x, 'min_y': min_y, 'max_x': max_x, 'max_y': max_y,
+           'pixels': (max_x - min_x + 1) * (max_y - min_y + 1)}
+    return cross < 0, box
+
+
+def assemble(verts):
+    """
+    triangle_assembler: every 3 FIFO entries make a triangle, emitted as
+    (v0, v2, v1) (the RTL swaps the last two for CCW input) and kept only if
+    it passes CULL_CHECK (cull_and_box).
+
+    Returns a dict of (T, 3) arrays in output order, visible triangles only.
+    """
+    n_tris = len(verts['x']) // 3
+    stream = {k: v[:n_tris * 3].reshape(n_tris, 3) for k, v in verts.items()}
+    keep, _ = cull_and_box(stream['x'], stream['y'])
+    return {k: v[keep][:, ASSEMBLER_ORDER] for k, v in stream.items()}
+
+
+def setup(tris):
+    """
+    rasterizer SETUP_MATH / SETUP_DIV: clamped bounding box (cull_and_box)
+    and the Q2.30 inverse of the signed area.
+    """
+    x, y = tris['x'], tris['y']
+    _, box = cull_and_box(x, y)  # the box does not depend on the corner order
+    den = wrap32(wrap32((x[:, 2] - x[:, 0]) * (y[:, 1] - y[:, 0])) -
+                 wrap32((x[:, 1] - x[:, 0]) * (y[:, 2] - y[:, 0])))
+    return dict(box, inv_area=q2_30_div(1, den))
+
+
+# ==============================================================================
+# 3. PIXEL PIPELINE
+# ==============================================================================
+def edge_weight(px, py, ax, ay, bx, by):
+    """One edge_engine weight: (p-a) x (b-a), 32-bit."""
+    return wrap32(wrap32((px - ax) * (by - ay)) - wrap32((py - ay) * (bx - ax)))
+
+
+def _normalize(weighted_sum, inv_area):
+    """
+    interpolator stage 3: (96'(sum) * 96'(inv)) >>> 30, truncated to 32 bits.
+    The 96-bit product is split at bit 30 so it stays inside int64.
+    """
+    hi = weighted_sum >> 30
+    lo = weighted_sum & ((1 << 30) - 1)
+    return wrap32(hi * inv_area + ((lo * inv_area) >> 30))
+
+
+def _fragments(tris, box, first, last, texture):
+    """
+    Every pixel pixel_iterator scans for triangles [first, last). Returns
+    addr, z8, color and triangle id of the fragments that can pass the z-test.
+    """
+    w = box['max_x'][first:last] - box['min_x'][first:last] + 1
+    h = box['max_y'][first:last] - box['min_y'][first:last] + 1
+    count = w * h
+
+    tri = np.repeat(np.arange(first, last), count)
+    k = np.arange(count.sum()) - np.repeat(np.cumsum(count) - count, count)
+    wt = w[tri - first]
+    px = box['min_x'][tri] + k % wt
+    py = box['min_y'][tri] + k // wt
+
+    x, y = tris['x'][tri], tris['y'][tri]
+    w0 = edge_weight(px, py, x[:, 0], y[:, 0], x[:, 1], y[:, 1])
+    w1 = edge_weight(px, py, x[:, 1], y[:, 1], x[:, 2], y[:, 2])
+    w2 = edge_weight(px, py, x[:, 2], y[:, 2], x[:, 0], y[:, 0])
+
+    all_pos = (w0 >= 0) & (w1 >= 0) & (w2 >= 0)
+    all_neg = (w0 <= 0) & (w1 <= 0) & (w2 <= 0)
+    inside = all_pos | all_neg
+    sign = np.where(all_pos, 1, -1)
+    w0, w1, w2 = wrap32(w0 * sign), wrap32(w1 * sign), wrap32(w2 * sign)
+
+    inv = box['inv_area'][tri]
+
+    def interp(attr):
+        a = tris[attr][tri]
+        # 64-bit products and sum (int64 wraps the same way)
+        return _normalize(w1 * a[:, 0] + w2 * a[:, 1] + w0 * a[:, 2], inv)
+
+    z8 = interp('z') & 0xFF
+    p_u = interp('u')
+    p_v = interp('v')
+    color = texture[(((p_v >> 10) & 0x3F) << 6) | ((p_u >> 10) & 0x3F)]
+
+    addr = (py * SCREEN_WIDTH + px) & ((1 << ADDR_BITS) - 1)
+    # Addresses past DEPTH read X in simulation, so the z-test never passes
+    passes = inside & (z8 < ZB_CLEAR) & (addr < BUFFER_DEPTH)
+    return addr[passes], z8[passes], color[passes], tri[passes]
+
+
+def rasterize(tris, texture, fb=None, zb=None):
+    """
+    Draws assembled triangles into (fb, zb), both (76800,) int64 in BRAM
+    address order. New buffers are cleared to 0x000 / 0xFF.
+    """
+    fb = np.full(BUFFER_DEPTH, FB_CLEAR, dtype=np.int64) if fb is None else fb
+    zb = np.full(BUFFER_DEPTH, ZB_CLEAR, dtype=np.int64) if zb is None else zb
+    if len(tris['x']) == 0:
+        return fb, zb
+
+    box = setup(tris)
+    count = box['pixels']
+    # Batch edges: start a new batch whenever BATCH_PIXELS would be exceeded
+    batch_id = np.cumsum(count) // BATCH_PIXELS
+    edges = np.concatenate(([0], np.flatnonzero(np.diff(batch_id)) + 1, [len(count)]))
+
+    for first, last in zip(edges[:-1], edges[1:]):
+        addr, z8, color, tri = _fragments(tris, box, first, last, texture)
+
+        # Per address: smallest z, earliest triangle on ties
+        order = np.lexsort((tri, z8, addr))
+        addr, z8, color = addr[order], z8[order], color[order]
+        head = np.concatenate(([True], addr[1:] != addr[:-1]))
+        addr, z8, color = addr[head], z8[head], color[head]
+
+        # Earlier batches already in the buffers win ties
+        win = z8 < zb[addr]
+        zb[addr[win]] = z8[win]
+        fb[addr[win]] = color[win]
+    return fb, zb
+
+
+# ==============================================================================
+# 4. FRAMES
+# ==============================================================================
+def render_frame(vertices, mvp, texture, frame=0, indices=None):
+    """
+    Golden frame for one MVP frame: returns (fb, zb) as the testbench sees
+    them after the frame (buffers cleared to 0x000 / 0xFF first).
+    vertices: (N, 5) stream words; mvp: (F, 16) table; texture: (4096,) rom.
+    With indices, vertices are the unique vertices of an indexed export.
+    """
+    if indices is None:
+        geom = transform(vertices, mvp[frame])
+    else:
+        geom = transform_indexed(vertices, indices, mvp[frame])
+    tris = assemble(fifo_vertices(geom, 0))
+    return rasterize(tris, texture)
+
+
+def frame_to_rgb(fb):
+    """Frame buffer -> (240, 320, 3) uint8 image, top row first like the PPM dump."""
+    rows = fb.reshape(SCREEN_HEIGHT, SCREEN_WIDTH)[::-1]
+    rgb = np.stack([(rows >> 8) & 0xF, (rows >> 4) & 0xF, rows & 0xF], axis=-1)
+    return (rgb * 17).astype(np.uint8)
+
+
+def format_ppm(fb):
+    """Frame buffer -> the P3 text top_level_tb.sv writes (rows flipped, 4-bit channels)."""
+    rows = fb.reshape(SCREEN_HEIGHT, SCREEN_WIDTH)[::-1]
+    # "%0d %0d %0d " for every 12-bit value, looked up once
+    table = np.array([f"{c >> 8} {(c >> 4) & 0xF} {c & 0xF} " for c in range(4096)], dtype=object)
+    lines = ["".join(table[row]) for row in rows]
+    return "P3\n320 240\n15\n" + "\n".join(lines) + "\n"
+
+
+def write_ppm(path, fb):
+    with open(path, "w", newline="\n") as f:
+        f.write(format_ppm(fb))
+
+
+def read_ppm(path):
+    """Reads a testbench (or write_ppm) P3 dump back into a (76800,) frame buffer."""
+    with open(path) as f:
+        tokens = f.read().split()
+    w, h = int(tokens[1]), int(tokens[2])
+    rgb = np.array(tokens[4:4 + w * h * 3], dtype=np.int64).reshape(h, w, 3)[::-1]
+    return ((rgb[..., 0] << 8) | (rgb[..., 1] << 4) | rgb[..., 2]).ravel()
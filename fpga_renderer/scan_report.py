@@ -0,0 +1,215 @@
+"""
+Bounding-box scan efficiency of the rasterizer.
+
+pixel_iterator visits every pixel of a triangle's clamped bounding box, one
+per cycle, and edge_engine rejects the ones outside the triangle. A thin
+diagonal sliver covers a handful of pixels of a large box, so most of its
+scan cycles do nothing. For every triangle the assembler lets through, in
+every MVP frame, this counts:
+
+  scanned   pixels pixel_iterator visits (= scan cycles)
+  covered   pixels edge_engine accepts (inside test, before the z-test)
+
+with the same screen positions, culling and box clamping as raster_model.
+Per-frame totals, per-triangle totals over all frames and a screen-space
+map of the wasted pixels come out of it.
+"""
+
+import csv
+import json
+
+import numpy as np
+
+from fpga_renderer.geometry_model import transform
+from fpga_renderer.raster_model import (fifo_vertices, cull_and_box, edge_weight, ASSEMBLER_ORDER,
+                                        BATCH_PIXELS, SCREEN_WIDTH, SCREEN_HEIGHT, BUFFER_DEPTH)
+
+
+# ==============================================================================
+# 1. COUNTING
+# ==============================================================================
+def _triangles(geom, frame):
+    """All stream triangles of one frame in assembler order, the CULL_CHECK result and their boxes."""
+    verts = fifo_vertices(geom, frame)
+    n_tris = len(verts['x']) // 3
+    x = verts['x'][:n_tris * 3].reshape(n_tris, 3)
+    y = verts['y'][:n_tris * 3].reshape(n_tris, 3)
+    drawn, box = cull_and_box(x, y)
+    return {'x': x[:, ASSEMBLER_ORDER], 'y': y[:, ASSEMBLER_ORDER]}, drawn, box
+
+
+def _scan(tris, box, first, last):
+    """Scanned pixel address (BUFFER_DEPTH if off screen), triangle and inside flag for triangles [first, last)."""
+    w = box['max_x'][first:last] - box['min_x'][first:last] + 1
+    h = box['max_y'][first:last] - box['min_y'][first:last] + 1
+    count = w * h
+
+    tri = np.repeat(np.arange(first, last), count)
+    k = np.arange(count.sum()) - np.repeat(np.cumsum(count) - count, count)
+    wt = w[tri - first]
+    px = box['min_x'][tri] + k % wt
+    py = box['min_y'][tri] + k // wt
+
+    x, y = tris['x'][tri], tris['y'][tri]
+    w0 = edge_weight(px, py, x[:, 0], y[:, 0], x[:, 1], y[:, 1])
+    w1 = edge_weight(px, py, x[:, 1], y[:, 1], x[:, 2], y[:, 2])
+    w2 = edge_weight(px, py, x[:, 2], y[:, 2], x[:, 0], y[:, 0])
+    inside = (((w0 >= 0) & (w1 >= 0) & (w2 >= 0)) |
+              ((w0 <= 0) & (w1 <= 0) & (w2 <= 0)))
+    # A box entirely past the right / bottom edge still scans a pixel there: no screen address
+    addr = np.where((px < SCREEN_WIDTH) & (py < SCREEN_HEIGHT), py * SCREEN_WIDTH + px, BUFFER_DEPTH)
+    return addr, tri, inside
+
+
+def scan_frame(geom, frame, waste_map=None):
+    """
+    One frame of transform() output. Returns (T,) 'scanned' and 'covered'
+    counts per stream triangle (0 for culled ones) and the 'drawn' mask.
+    Wasted pixels (scanned, not covered) are added to waste_map, (76800,).
+    """
+    tris, drawn, box = _triangles(geom, frame)
+    scanned = np.zeros(len(drawn), dtype=np.int64)
+    covered = np.zeros(len(drawn), dtype=np.int64)
+    ids = np.flatnonzero(drawn)
+    if len(ids) == 0:
+        return {'scanned': scanned, 'covered': covered, 'drawn': drawn}
+
+    tris = {k: v[ids] for k, v in tris.items()}
+    box = {k: v[ids] for k, v in box.items()}
+    count = box['pixels']
+    scanned[ids] = count
+
+    batch_id = np.cumsum(count) // BATCH_PIXELS
+    edges = np.concatenate(([0], np.flatnonzero(np.diff(batch_id)) + 1, [len(count)]))
+    for first, last in zip(edges[:-1], edges[1:]):
+        addr, tri, inside = _scan(tris, box, first, last)
+        covered[ids[first:last]] = np.bincount(tri[inside] - first, minlength=last - first)
+        if waste_map is not None:
+            waste_map += np.bincount(addr[~inside], minlength=BUFFER_DEPTH + 1)[:BUFFER_DEPTH]
+    return {'scanned': scanned, 'covered': covered, 'drawn': drawn}
+
+
+def scan_efficiency(vertices, mvp, frames=None):
+    """
+    vertices: (N, 5) stream words, mvp: (F, 16) table.
+    Returns (F, T) 'scanned' / 'covered' / 'drawn' arrays for the selected
+    frames and 'waste_map', (240, 320) wasted scans summed over them, top
+    row first (rows flipped like frame_to_rgb and the PPM dump).
+    """
+    frames = range(len(mvp)) if frames is None else frames
+    waste_map = np.zeros(BUFFER_DEPTH, dtype=np.int64)
+    rows = []
+    for frame in frames:
+        geom = transform(vertices, mvp[frame])
+        rows.append(scan_frame(geom, 0, waste_map))
+    out = {k: np.array([r[k] for r in rows]) for k in ('scanned', 'covered', 'drawn')}
+    out['frames'] = list(frames)
+    out['waste_map'] = waste_map.reshape(SCREEN_HEIGHT, SCREEN_WIDTH)[::-1]
+    return out
+
+
+# ==============================================================================
+# 2. SUMMARIES
+# ==============================================================================
+def _ratio(covered, scanned):
+    return covered / np.maximum(scanned, 1)
+
+
+def frame_totals(scan):
+    """One dict per frame: triangles drawn, pixels scanned / covered, efficiency."""
+    scanned, covered = scan['scanned'].sum(axis=1), scan['covered'].sum(axis=1)
+    return [{
+        'frame': f,
+        'triangles': int(n),
+        'scanned': int(s),
+        'covered': int(c),
+        'wasted': int(s - c),
+        'efficiency': float(_ratio(c, s)),
+    } for f, n, s, c in zip(scan['frames'], scan['drawn'].sum(axis=1), scanned, covered)]
+
+
+def worst_triangles(scan, count=10):
+    """
+    Triangles with the most wasted scan cycles over all frames, worst first.
+    Each entry also gives its lowest single-frame efficiency and that frame.
+    """
+    scanned, covered = scan['scanned'], scan['covered']
+    wasted = (scanned - covered).sum(axis=0)
+    ratio = np.where(scan['drawn'], _ratio(covered, scanned), np.inf)
+    out = []
+    for t in np.argsort(-wasted, kind="stable")[:count]:
+        if wasted[t] == 0:
+            break
+        f = int(np.argmin(ratio[:, t]))
+        out.append({
+            'triangle': int(t),
+            'frames_drawn': int(scan['drawn'][:, t].sum()),
+            'scanned': int(scanned[:, t].sum()),
+            'covered': int(covered[:, t].sum()),
+            'wasted': int(wasted[t]),
+            'efficiency': float(_ratio(covered[:, t].sum(), scanned[:, t].sum())),
+            'worst_frame': scan['frames'][f],
+            'worst_frame_efficiency': float(ratio[f, t]),
+        })
+    return out
+
+
+def summarize(scan, worst=10):
+    totals = frame_totals(scan)
+    scanned = sum(r['scanned'] for r in totals)
+    covered = sum(r['covered'] for r in totals)
+    return {
+        'triangles': int(scan['drawn'].shape[1]),
+        'frames': len(totals),
+        'scanned': scanned,
+        'covered': covered,
+        'efficiency': float(_ratio(covered, scanned)),
+        'frame_totals': totals,
+        'worst_triangles': worst_triangles(scan, worst),
+    }
+
+
+def format_summary(s):
+    lines = [f"{s['triangles']} triangles x {s['frames']} frames: "
+             f"{s['covered']} of {s['scanned']} scanned pixels covered ({100 * s['efficiency']:.1f}%)"]
+    if s['frame_totals']:
+        worst = min(s['frame_totals'], key=lambda r: r['efficiency'])
+        lines.append(f"  Worst frame {worst['frame']}: {100 * worst['efficiency']:.1f}% "
+                     f"({worst['wasted']} wasted scan cycles)")
+    if s['worst_triangles']:
+        lines.append(f"  {'Tri':>6} {'Scanned':>9} {'Covered':>9} {'Eff':>6} {'Worst frame':>12}")
+        for r in s['worst_triangles']:
+            lines.append(f"  {r['triangle']:>6} {r['scanned']:>9} {r['covered']:>9} "
+                         f"{100 * r['efficiency']:>5.1f}% "
+                         f"{r['worst_frame']:>4} ({100 * r['worst_frame_efficiency']:.0f}%)")
+    return "\n".join(lines)
+
+
+# ==============================================================================
+# 3. OUTPUT
+# ==============================================================================
+def write_json(path, summary):
+    with open(path, "w") as f:
+        json.dump(summary, f, indent=2)
+
+
+def write_csv(path, rows):
+    """rows: frame_totals() or worst_triangles() output."""
+    with open(path, "w", newline="") as f:
+        if not rows:
+            return
+        writer = csv.DictWriter(f, fieldnames=list(rows[0]))
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def heatmap_rgb(waste_map):
+    """
+    (240, 320) counts -> (240, 320, 3) uint8, black -> red -> yellow -> white
+    (log scale). Rows stay in waste_map order: top row first, the same way up
+    as frame_to_rgb and the PPM dump.
+    """
+    level = np.log1p(waste_map.astype(np.float64))
+    level /= max(level.max(), 1e-9)
+    rgb = np.clip(np.stack([3 * level, 3 * level - 1, 3 * level - 2], axis=-1), 0.0, 1.0)
+    return (rgb * 255).astype(np.uint8)
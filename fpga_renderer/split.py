@@ -0,0 +1,220 @@
+"""
+Edge splitting of long, thin triangles to cut bounding-box scan cycles.
+
+pixel_iterator scans a triangle's whole clamped bounding box, so a sliver
+lying diagonally across the screen costs far more cycles than the pixels it
+covers. Cutting its longest edge in half gives two triangles whose boxes
+together are often much smaller, at the price of one more triangle through
+the geometry engine and the rasterizer setup.
+
+Whether a split pays off depends on how the triangle projects, so every
+candidate is scored on the screen positions of all MVP frames, from the
+bit-exact geometry model: the rasterizer cycles it would save (box pixels +
+per-triangle overhead, only in frames where the assembler draws it).
+
+Splits are applied to edges, not triangles: every triangle sharing the edge
+(by position) is cut at the same midpoint, so no T-junctions are created.
+Midpoints are the truncated average of the endpoint words, and each triangle
+averages its own U, V so seams keep their texture coordinates. Children
+keep the parent's winding and take its place in the stream.
+
+The greedy pass records the stream after every split. pick_split() runs
+each one through perf_model and keeps the fastest, since extra vertices can
+cost the geometry engine more than the rasterizer saves.
+"""
+
+import heapq
+
+import numpy as np
+
+from fpga_renderer.encode import hex_lines, EOS_WORD, EOS_COUNT
+from fpga_renderer.geometry_model import transform, WORDS_PER_VERTEX
+from fpga_renderer.perf_model import (simulate, RAST_SETUP_CYCLES, ITER_OVERHEAD_CYCLES,
+                                      RAST_FLUSH_CYCLES)
+from fpga_renderer.raster_model import cull_and_box
+
+# Rasterizer cycles per drawn triangle on top of its scanned pixels
+RAST_TRIANGLE_CYCLES = RAST_SETUP_CYCLES + ITER_OVERHEAD_CYCLES + RAST_FLUSH_CYCLES
+
+
+# ==============================================================================
+# 1. COSTS
+# ==============================================================================
+def raster_cycles(x, y):
+    """
+    x, y: (..., 3) FIFO screen positions in stream order. Rasterizer cycles
+    (scan + overhead) per triangle, 0 where the assembler culls it.
+    """
+    drawn, box = cull_and_box(x, y)
+    return np.where(drawn, box['pixels'] + RAST_TRIANGLE_CYCLES, 0)
+
+
+def _project(words, mvp):
+    """(N, 5) words -> (F, N) screen x, y as the FIFO carries them."""
+    geom = transform(words, mvp)
+    return geom['o_x'] >> 16, geom['o_y'] >> 16
+
+
+# ==============================================================================
+# 2. GREEDY EDGE SPLITTING
+# ==============================================================================
+def _halves(face, i, j, mvp):
+    """Face dict cut at the midpoint of corners i, j: two face dicts with costs."""
+    w = face['w']
+    mid = (w[i] + w[j]) >> 1
+    mx, my = _project(mid[None, :], mvp)
+    out = []
+    for replace in (j, i):
+        cw, cx, cy = w.copy(), face['x'].copy(), face['y'].copy()
+        cw[replace], cx[:, replace], cy[:, replace] = mid, mx[:, 0], my[:, 0]
+        out.append({'w': cw, 'x': cx, 'y': cy, 'cost': int(raster_cycles(cx, cy).sum())})
+    return out
+
+
+def _best_split_gain(face, mvp):
+    """Largest saving of cutting one edge of face on its own (neighbours ignored)."""
+    return max(face['cost'] - sum(h['cost'] for h in _halves(face, i, j, mvp))
+               for i, j in ((0, 1), (1, 2), (2, 0)))
+
+
+def _edge_key(words, i, j):
+    a, b = tuple(words[i, :3].tolist()), tuple(words[j, :3].tolist())
+    return (a, b) if a <= b else (b, a)
+
+
+def split_triangles(vertices, mvp, max_faces, min_gain=1):
+    """
+    vertices: (N, 5) stream words, mvp: (F, 16) table. Splits edges while the
+    stream stays within max_faces triangles and a split saves at least
+    min_gain rasterizer cycles over the animation, best saving per added
+    triangle first.
+
+    Returns 'steps', the (N, 5) stream after 0, 1, 2, ... splits, and
+    'gains', the estimated rasterizer cycles each split saved.
+    """
+    vertices = np.asarray(vertices, dtype=np.int64)
+    n_tris = len(vertices) // 3
+    x, y = _project(vertices[:n_tris * 3], mvp)
+
+    # Face id -> corner words (3, 5), screen x / y (F, 3), cost, stream order key
+    faces = {}
+    edges = {}
+    for t in range(n_tris):
+        sl = slice(3 * t, 3 * t + 3)
+        faces[t] = {'w': vertices[sl], 'x': x[:, sl], 'y': y[:, sl], 'order': (t,)}
+        faces[t]['cost'] = int(raster_cycles(faces[t]['x'], faces[t]['y']).sum())
+    next_id = n_tris
+
+    def add_edges(fid):
+        w = faces[fid]['w']
+        for i, j in ((0, 1), (1, 2), (2, 0)):
+            key = _edge_key(w, i, j)
+            if key[0] != key[1]:
+                edges.setdefault(key, set()).add(fid)
+
+    def children(fid, key):
+        """The two halves of face fid cut at the midpoint of edge key."""
+        w = faces[fid]['w']
+        pos = [tuple(c[:3].tolist()) for c in w]
+        return _halves(faces[fid], pos.index(key[0]), pos.index(key[1]), mvp)
+
+    def score(key):
+        """Saving of splitting key, plus the best follow-up split of each half."""
+        fids = edges[key]
+        if key[0] == tuple(((np.array(key[0]) + np.array(key[1])) >> 1).tolist()):
+            return None  # Endpoints one LSB apart: nothing to split
+        split = {fid: children(fid, key) for fid in fids}
+        gain = sum(faces[fid]['cost'] - sum(c['cost'] for c in split[fid]) for fid in fids)
+        # A sliver's first cut often leaves one half as long as before; the
+        # second cut is where the saving shows up, so look one split ahead
+        ahead = sum(max(0, _best_split_gain(c, mvp)) for halves in split.values() for c in halves)
+        return gain, gain + ahead, split
+
+    for fid in faces:
+        add_edges(fid)
+
+    heap = []
+    version = {}
+
+    def push(key):
+        version[key] = version.get(key, 0) + 1
+        scored = score(key)
+        if scored is not None and scored[1] >= min_gain:
+            heapq.heappush(heap, (-scored[1] / len(edges[key]), version[key], key))
+
+    for key in list(edges):
+        push(key)
+
+    def stream():
+        ordered = sorted(faces.values(), key=lambda f: f['order'])
+        if not ordered:
+            return vertices[:0]
+        return np.concatenate([f['w'] for f in ordered])
+
+    steps, gains = [stream()], []
+    while heap:
+        _, ver, key = heapq.heappop(heap)
+        if version.get(key) != ver or key not in edges:
+            continue
+        if len(faces) + len(edges[key]) > max_faces:
+            continue  # A smaller edge (fewer faces) may still fit
+        gain, _, split = score(key)
+
+        touched = set()
+        for fid, halves in split.items():
+            parent = faces.pop(fid)
+            for i, j in ((0, 1), (1, 2), (2, 0)):
+                e = _edge_key(parent['w'], i, j)
+                if e in edges:
+                    edges[e].discard(fid)
+                    touched.add(e)
+                    if not edges[e]:
+                        del edges[e]
+            for k, half in enumerate(halves):
+                half['order'] = parent['order'] + (k,)
+                faces[next_id] = half
+                add_edges(next_id)
+                next_id += 1
+        for fid in range(next_id - 2 * len(split), next_id):
+            w = faces[fid]['w']
+            touched.update(_edge_key(w, i, j) for i, j in ((0, 1), (1, 2), (2, 0)))
+        for e in touched:
+            if e in edges:
+                push(e)
+
+        steps.append(stream())
+        gains.append(gain)
+    return {'steps': steps, 'gains': gains}
+
+
+def pick_split(steps, mvp):
+    """
+    Runs every step through perf_model. Returns (index, cycles): the step with
+    the fewest total frame cycles that drops no more FIFO writes than the
+    original, and every step's total cycles.
+    """
+    cycles, dropped = [], []
+    for words in steps:
+        results = simulate(words, mvp)
+        cycles.append(sum(r['cycles'] for r in results))
+        dropped.append(sum(r['dropped'] for r in results))
+    ok = [i for i in range(len(steps)) if dropped[i] <= dropped[0]]
+    best = min(ok, key=lambda i: (cycles[i], i))
+    return best, cycles
+
+
+# ==============================================================================
+# 3. OUTPUT
+# ==============================================================================
+def format_stream(words, header=""):
+    """(N, 5) signed words -> vertex .mem text with the EOS block."""
+    body = hex_lines(np.asarray(words, dtype=np.int64).ravel() & 0xFFFFFFFF)
+    eos = hex_lines(np.full(EOS_COUNT, EOS_WORD, dtype=np.uint32))
+    return header.encode() + body + b"// EOS\n" + eos
+
+
+def write_stream_mem(path, words, header=""):
+    """Writes a vertex .mem file. Returns the number of data lines (EOS included)."""
+    with open(path, "wb") as f:
+        f.write(format_stream(words, header))
+    return len(words) * WORDS_PER_VERTEX + EOS_COUNT
@@ -0,0 +1,133 @@
+"""
+Per-frame triangle visibility for the fixed MVP table.
+
+triangle_assembler only learns that a triangle faces away after all three
+vertices went through fetch, transform, divide and viewport map. The MVP
+table is fixed, so this is known offline: every triangle of every frame is
+classified at once from the bit-exact geometry model's (frames, vertices)
+arrays:
+
+  backface   CULL_CHECK fails (the assembler would drop it)
+  offscreen  front facing, but the bounding box misses the screen entirely
+  drawn      everything else
+
+and written out as tables the geometry engine could consult before
+fetching a triangle:
+
+  bitmask   WORDS_PER_FRAME(T) words per frame, bit t of word t // 32 set
+            when triangle t is drawn (address = frame * words + t // 32)
+  draw list one start address per frame, then each frame's drawn triangle
+            numbers (vertex address = t * 15) followed by an EOS word
+"""
+
+import numpy as np
+
+from fpga_renderer.encode import hex_lines, EOS_WORD
+from fpga_renderer.geometry_model import transform
+from fpga_renderer.perf_model import GEOM_CYCLES_PER_VERTEX, ASM_READ_CYCLES, ASM_CULL_CYCLES
+from fpga_renderer.raster_model import cull_and_box, SCREEN_WIDTH, SCREEN_HEIGHT
+
+MASK_BITS = 32
+
+
+# ==============================================================================
+# 1. CLASSIFICATION
+# ==============================================================================
+def triangle_visibility(vertices, mvp):
+    """
+    vertices: (N, 5) stream words, mvp: (F, 16) table.
+    Returns (F, T) bool arrays 'backface', 'offscreen' and 'drawn'.
+    """
+    n_tris = len(vertices) // 3
+    geom = transform(np.asarray(vertices)[:n_tris * 3], mvp)
+    # FIFO x / y, grouped per triangle in stream order
+    x = (geom['o_x'] >> 16).reshape(len(mvp), n_tris, 3)
+    y = (geom['o_y'] >> 16).reshape(len(mvp), n_tris, 3)
+    front, _ = cull_and_box(x, y)
+    backface = ~front
+
+    outside = ((x < 0).all(axis=-1) | (x >= SCREEN_WIDTH).all(axis=-1) |
+               (y < 0).all(axis=-1) | (y >= SCREEN_HEIGHT).all(axis=-1))
+    offscreen = outside & ~backface
+    return {'backface': backface, 'offscreen': offscreen, 'drawn': ~(backface | outside)}
+
+
+# ==============================================================================
+# 2. TABLES
+# ==============================================================================
+def words_per_frame(n_tris):
+    return max(1, -(-n_tris // MASK_BITS))
+
+
+def pack_masks(drawn):
+    """(F, T) bool -> (F, words_per_frame(T)) uint32, bit t % 32 of word t // 32."""
+    n_frames, n_tris = drawn.shape
+    bits = np.zeros((n_frames, words_per_frame(n_tris) * MASK_BITS), dtype=np.uint64)
+    bits[:, :n_tris] = drawn
+    weights = np.uint64(1) << np.arange(MASK_BITS, dtype=np.uint64)
+    return (bits.reshape(n_frames, -1, MASK_BITS) * weights).sum(axis=-1).astype(np.uint32)
+
+
+def draw_lists(drawn):
+    """(F, T) bool -> (words, starts): offset table + per-frame lists, each EOS terminated."""
+    n_frames = len(drawn)
+    lengths = drawn.sum(axis=1) + 1
+    starts = n_frames + np.concatenate([[0], np.cumsum(lengths)[:-1]])
+    words = [starts.astype(np.uint32)]
+    for row in drawn:
+        words += [np.flatnonzero(row).astype(np.uint32), np.array([EOS_WORD], dtype=np.uint32)]
+    return np.concatenate(words), starts
+
+
+def write_visibility_mem(mask_path, list_path, drawn):
+    """Writes the bitmask and draw-list .mem files for an (F, T) drawn table."""
+    n_frames, n_tris = drawn.shape
+    with open(mask_path, "wb") as f:
+        f.write(f"// Visibility bitmask: {n_frames} frames x {words_per_frame(n_tris)} words, "
+                f"bit t = triangle t drawn\n".encode() + hex_lines(pack_masks(drawn)))
+    words, _ = draw_lists(drawn)
+    with open(list_path, "wb") as f:
+        f.write(f"// Draw lists: {n_frames} start addresses, then triangle numbers per frame "
+                f"(EOS terminated)\n".encode() + hex_lines(words))
+
+
+def unpack_masks(words, n_tris):
+    """Inverse of pack_masks: (F, W) words -> (F, T) bool."""
+    words = np.asarray(words, dtype=np.uint64)
+    bits = (words[..., None] >> np.arange(MASK_BITS, dtype=np.uint64)) & np.uint64(1)
+    return bits.reshape(len(words), -1)[:, :n_tris].astype(bool)
+
+
+# ==============================================================================
+# 3. REPORT
+# ==============================================================================
+def report(vis):
+    """Per-frame counts and the geometry / assembler cycles a draw list would skip."""
+    drawn = vis['drawn'].sum(axis=1)
+    n_tris = vis['drawn'].shape[1]
+    skipped = n_tris - drawn
+    cycles = 3 * (GEOM_CYCLES_PER_VERTEX + ASM_READ_CYCLES) + ASM_CULL_CYCLES
+    return {
+        'triangles': n_tris,
+        'drawn': drawn,
+        'backface': vis['backface'].sum(axis=1),
+        'offscreen': vis['offscreen'].sum(axis=1),
+        'skipped_cycles': skipped * cycles,
+        'full_cycles': n_tris * cycles,
+    }
+
+
+def format_report(r):
+    n_frames = len(r['drawn'])
+    skipped = r['triangles'] - r['drawn']
+    worst, best = int(np.argmin(skipped)), int(np.argmax(skipped))
+    pct = 100.0 * r['skipped_cycles'].sum() / max(1, r['full_cycles'] * n_frames)
+    return (f"Visibility: {r['triangles']} triangles x {n_frames} frames\n"
+            f"  Drawn per frame:     {r['drawn'].min()} - {r['drawn'].max()} "
+            f"(mean {r['drawn'].mean():.1f})\n"
+            f"  Backface per frame:  {r['backface'].min()} - {r['backface'].max()} "
+            f"(mean {r['backface'].mean():.1f})\n"
+            f"  Offscreen per frame: {r['offscreen'].min()} - {r['offscreen'].max()} "
+            f"(mean {r['offscreen'].mean():.1f})\n"
+            f"  Geometry work skipped: {pct:.1f}% of vertex fetch/transform/divide cycles "
+            f"(frame {best}: {skipped[best]} triangles, frame {worst}: {skipped[worst]})")
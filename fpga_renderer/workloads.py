@@ -0,0 +1,294 @@
+"""
+Synthetic scaling workloads for the pipeline models and the preview renderers.
+
+A workload is a plain dict of per-corner arrays, the shape the exporters and
+rasterizers already take:
+
+  'kind', 'params'
+  'positions'  (T, 3, 3) float32 corner positions
+  'uvs'        (T, 3, 2) float32 corner UVs
+  'texture'    (64, 64, 3) uint8 checkerboard
+
+Kinds (generate(kind, triangles, **params)):
+
+  sphere     icosahedron faces cut into n x n triangles, pushed onto a sphere
+             (20 * n^2 triangles: the nearest count to the one asked for)
+  grid       a screen-filling quad cut like the cube faces, two triangles per cell
+  slivers    the same quad cut into cells `aspect` times wider than tall and
+             turned by `angle`: thin triangles in mostly empty bounding boxes
+  overdraw   `layers` copies of the grid, each scaled towards the camera so
+             they cover the same pixels: depth complexity = layers
+  offscreen  the grid with all but `visible` of its triangles moved outside
+             the frustum
+
+Positions are laid out for the default camera of fpga_renderer.mvp (the
+mvp_matrix of the generators). write_workload() writes the native
+vertex_data.mem / texture.mem; vertex_stream() and texture_rom() are what
+geometry_model.load_vertex_stream (without the BRAM depth limit) and
+raster_model.load_texture_rom would read back from them.
+"""
+
+import math
+import os
+
+import numpy as np
+
+from fpga_renderer.encode import vertex_words, texture_words, write_vertex_mem, write_texture_mem
+from fpga_renderer.fixed_point import to_signed32
+from fpga_renderer.mvp import DEFAULTS as MVP_DEFAULTS
+
+# Side of the quad the grid-based kinds cut up; stays entirely on screen in the default view
+GRID_SIZE = 16.0
+SPHERE_RADIUS = 5.0
+# Triangles of the offscreen kind move this far sideways, well outside the frustum
+OFFSCREEN_SHIFT = 4 * GRID_SIZE
+
+TEXTURE_SIZE = 64
+CHECKER_SIZE = 8
+CHECKER_COLORS = ((255, 255, 255), (255, 0, 0))
+
+# d20gen's STANDARD_FACE_UVS: every icosahedron face maps onto the same texture triangle
+FACE_UVS = np.array([(0.1, 0.9), (0.9, 0.9), (0.5, 0.1)])
+
+VERTEX_MEM_FILE = "vertex_data.mem"
+TEXTURE_MEM_FILE = "texture.mem"
+
+
+# ==============================================================================
+# 1. PRIMITIVES
+# ==============================================================================
+def icosahedron(scale):
+    """(12, 3) float32 vertices and (20, 3) int faces of the d20."""
+    phi = (1.0 + math.sqrt(5.0)) / 2.0
+    verts = np.array([
+        (-1,  phi, 0), ( 1,  phi, 0), (-1, -phi, 0), ( 1, -phi, 0),
+        ( 0, -1,  phi), ( 0,  1,  phi), ( 0, -1, -phi), ( 0,  1, -phi),
+        ( phi, 0, -1), ( phi, 0,  1), (-phi, 0, -1), (-phi, 0,  1)
+    ], dtype=np.float32) * scale
+    faces = np.array([
+        (0, 11, 5), (0, 5, 1), (0, 1, 7), (0, 7, 10), (0, 10, 11),
+        (1, 5, 9), (5, 11, 4), (11, 10, 2), (10, 7, 6), (7, 1, 8),
+        (3, 9, 4), (3, 4, 2), (3, 2, 6), (3, 6, 8), (3, 8, 9),
+        (4, 9, 5), (2, 4, 11), (6, 2, 10), (8, 6, 7), (9, 8, 1)
+    ])
+    return verts, faces
+
+
+def subdivide_quad(bl, br, tr, tl, uv_bl, uv_br, uv_tr, uv_tl, steps, cols=None):
+    """
+    A quad cut into steps rows x cols columns (cols defaults to steps), two
+    triangles per cell, (BL, BR, TR) and (BL, TR, TL), row by row from the
+    bottom: the cube's subdivided faces without the per-cell loop. Returns
+    (steps * cols * 2, 3, D) positions and (..., 3, 2) UVs.
+    """
+    cols = steps if cols is None else cols
+    rr = (np.arange(steps + 1) / steps)[:, None, None]
+    cr = (np.arange(cols + 1) / cols)[None, :, None]
+
+    def lattice(p_bl, p_br, p_tr, p_tl):
+        p_bl, p_br, p_tr, p_tl = (np.asarray(p, dtype=np.float64) for p in (p_bl, p_br, p_tr, p_tl))
+        left = p_bl + (p_tl - p_bl) * rr
+        right = p_br + (p_tr - p_br) * rr
+        return left + (right - left) * cr
+
+    def triangles(grid):
+        p00, p10, p11, p01 = grid[:-1, :-1], grid[:-1, 1:], grid[1:, 1:], grid[1:, :-1]
+        tris = np.stack([np.stack([p00, p10, p11], axis=2), np.stack([p00, p11, p01], axis=2)], axis=2)
+        return tris.reshape(-1, 3, grid.shape[-1])
+
+    return triangles(lattice(bl, br, tr, tl)), triangles(lattice(uv_bl, uv_br, uv_tr, uv_tl))
+
+
+def subdivide_triangles(corners, uvs, n):
+    """
+    (F, 3, D) triangles cut into n x n smaller ones each, same winding.
+    uvs: the (3, 2) corner UVs every face shares. Returns (F * n^2, 3, D) and (F * n^2, 3, 2).
+    """
+    i, j = np.meshgrid(np.arange(n), np.arange(n), indexing="ij")
+    up, down = (i + j <= n - 1), (i + j <= n - 2)
+    iu, ju, id_, jd = i[up], j[up], i[down], j[down]
+    # Corners of every small triangle in steps along (b - a, c - a): n(n+1)/2 up, n(n-1)/2 down
+    bary = np.concatenate([
+        np.stack([np.stack([iu, ju], -1), np.stack([iu + 1, ju], -1), np.stack([iu, ju + 1], -1)], axis=1),
+        np.stack([np.stack([id_ + 1, jd], -1), np.stack([id_ + 1, jd + 1], -1), np.stack([id_, jd + 1], -1)], axis=1),
+    ]) / n
+    face_uvs = _barycentric(np.asarray(uvs)[None], bary)
+    return _barycentric(corners, bary), np.tile(face_uvs, (len(corners), 1, 1))
+
+
+def _barycentric(tris, bary):
+    """a + (b - a) s + (c - a) t for every (s, t) of bary (K, 3, 2), for every triangle (a, b, c)."""
+    tris = np.asarray(tris, dtype=np.float64)
+    a, b, c = (tris[:, k, None, None, :] for k in range(3))
+    s, t = bary[None, ..., 0:1], bary[None, ..., 1:2]
+    return (a + (b - a) * s + (c - a) * t).reshape(-1, 3, tris.shape[-1])
+
+
+# ==============================================================================
+# 2. KINDS
+# ==============================================================================
+# Corner UVs of a grid quad: BL, BR, TR, TL (V = 0 is the top row of the texture)
+QUAD_UVS = (np.array([0.0, 1.0]), np.array([1.0, 1.0]), np.array([1.0, 0.0]), np.array([0.0, 0.0]))
+
+
+def _quad(size):
+    """BL, BR, TR, TL of a size x size quad in the z = 0 plane, facing the default camera."""
+    h = size / 2.0
+    return (np.array([-h, -h, 0.0]), np.array([h, -h, 0.0]), np.array([h, h, 0.0]), np.array([-h, h, 0.0]))
+
+
+def sphere(triangles, radius=SPHERE_RADIUS):
+    """Subdivided icosahedron: 20 * n^2 triangles, n picked so the count is closest to triangles."""
+    n = max(1, round(math.sqrt(triangles / 20.0)))
+    verts, faces = icosahedron(1.0)
+    positions, uvs = subdivide_triangles(verts[faces], FACE_UVS, n)
+    positions *= radius / np.linalg.norm(positions, axis=-1, keepdims=True)
+    return positions, uvs
+
+
+def grid(triangles, size=GRID_SIZE):
+    """Square grid of about sqrt(triangles / 2) cells a side, cut to exactly triangles."""
+    steps = max(1, math.ceil(math.sqrt(triangles / 2.0)))
+    positions, uvs = subdivide_quad(*_quad(size), *QUAD_UVS, steps)
+    return positions[:triangles], uvs[:triangles]
+
+
+def slivers(triangles, aspect=100.0, angle=30.0, size=GRID_SIZE):
+    """Grid of cells aspect times wider than tall, turned by angle degrees about the view axis."""
+    cells = max(1, math.ceil(triangles / 2.0))
+    cols = max(1, round(math.sqrt(cells / aspect)))
+    rows = math.ceil(cells / cols)
+    positions, uvs = subdivide_quad(*_quad(size), *QUAD_UVS, rows, cols)
+    c, s = math.cos(math.radians(angle)), math.sin(math.radians(angle))
+    rot = np.array([[c, -s, 0.0], [s, c, 0.0], [0.0, 0.0, 1.0]])
+    return positions[:triangles] @ rot.T, uvs[:triangles]
+
+
+def overdraw(triangles, layers=8, order="back_to_front", nearest=0.5, size=GRID_SIZE):
+    """
+    layers grids, each pulled towards the camera (down to nearest of the
+    distance) and shrunk to match, so all of them cover the same pixels.
+    back_to_front passes every depth test, front_to_back fails all but the first.
+    """
+    if order not in ("back_to_front", "front_to_back"):
+        raise ValueError(f"order must be back_to_front or front_to_back, not {order!r}")
+    positions, uvs = grid(math.ceil(triangles / layers), size)
+    scales = np.linspace(1.0, nearest, layers)
+    if order == "front_to_back":
+        scales = scales[::-1]
+    cam = np.array(MVP_DEFAULTS['cam_pos'], dtype=np.float64)
+    stack = cam + (positions[None] - cam) * scales[:, None, None, None]
+    uvs = np.broadcast_to(uvs, (layers,) + uvs.shape)
+    return stack.reshape(-1, 3, 3)[:triangles], uvs.reshape(-1, 3, 2)[:triangles]
+
+
+def offscreen(triangles, visible=0.1, seed=0, size=GRID_SIZE):
+    """
+    The grid with a random 1 - visible of its triangles shifted left or right
+    out of view (sideways keeps them in front of the camera, so w stays positive).
+    """
+    positions, uvs = grid(triangles, size)
+    rng = np.random.default_rng(seed)
+    moved = rng.random(len(positions)) >= visible
+    shifts = np.array([(1, 0, 0), (-1, 0, 0)], dtype=np.float64) * OFFSCREEN_SHIFT
+    positions = positions.copy()
+    positions[moved] += shifts[rng.integers(0, 2, moved.sum())][:, None, :]
+    return positions, uvs
+
+
+KINDS = {
+    'sphere': sphere,
+    'grid': grid,
+    'slivers': slivers,
+    'overdraw': overdraw,
+    'offscreen': offscreen,
+}
+
+
+def checker_texture(size=TEXTURE_SIZE, checker=CHECKER_SIZE, colors=CHECKER_COLORS):
+    """(size, size, 3) uint8 checkerboard of checker x checker squares."""
+    ij = np.arange(size) // checker
+    odd = (ij[:, None] + ij[None, :]) % 2
+    return np.asarray(colors, dtype=np.uint8)[odd]
+
+
+def generate(kind, triangles, **params):
+    """Workload dict of the given kind with about `triangles` triangles (see the module docstring)."""
+    if kind not in KINDS:
+        raise KeyError(f"Unknown workload {kind!r} (one of {', '.join(KINDS)})")
+    positions, uvs = KINDS[kind](triangles, **params)
+    return {
+        'kind': kind,
+        'params': dict(params, triangles=triangles),
+        'positions': positions.astype(np.float32),
+        'uvs': uvs.astype(np.float32),
+        'texture': checker_texture(),
+    }
+
+
+# ==============================================================================
+# 3. OUTPUTS
+# ==============================================================================
+def write_workload(workload, out_dir, vertex_file=VERTEX_MEM_FILE, texture_file=TEXTURE_MEM_FILE):
+    """Writes the vertex stream and texture .mem files. Returns their paths."""
+    os.makedirs(out_dir, exist_ok=True)
+    vertex_path = os.path.join(out_dir, vertex_file)
+    texture_path = os.path.join(out_dir, texture_file)
+    header = (f"// Synthetic {workload['kind']} workload: {len(workload['positions'])} triangles\n"
+              "// Format: X, Y, Z, U, V (Q16.16 Hex)\n")
+    write_vertex_mem(vertex_path, workload['positions'], workload['uvs'], header=header)
+    write_texture_mem(texture_path, workload['texture'])
+    return vertex_path, texture_path
+
+
+def vertex_stream(workload):
+    """(N, 5) signed X, Y, Z, U, V words, as load_vertex_stream reads them (no BRAM limit)."""
+    return to_signed32(vertex_words(workload['positions'], workload['uvs']))
+
+
+def texture_rom(workload):
+    """(4096,) RGB444 texture_rom words, as load_texture_rom reads them."""
+    return texture_words(workload['texture']).astype(np.int64)
+
+
+# ==============================================================================
+# 4. STATISTICS
+# ==============================================================================
+def summary(workload, mvp, width=320, height=240):
+    """
+    What the workload asks of a renderer under mvp: triangle and vertex-line
+    counts, the share of triangles whose bounding box touches the screen,
+    front-facing share, approximate depth complexity (on-screen triangle area
+    over screen area, partly visible triangles scaled by their visible
+    bounding box) and the median triangle / bounding box area ratio.
+    """
+    from fpga_renderer.preview import project_vertices
+
+    tris = len(workload['positions'])
+    screen, _ = project_vertices(workload['positions'].reshape(-1, 3), mvp, width, height)
+    p = screen.reshape(tris, 3, 2)
+    e1, e2 = p[:, 1] - p[:, 0], p[:, 2] - p[:, 0]
+    cross = e1[:, 0] * e2[:, 1] - e1[:, 1] * e2[:, 0]
+    area = np.abs(cross) / 2.0
+    lo, hi = p.min(axis=1), p.max(axis=1)
+    box = np.prod(hi - lo, axis=1)
+    clipped = np.prod(np.clip(np.minimum(hi, (width, height)) - np.maximum(lo, 0), 0, None), axis=1)
+    onscreen = clipped > 0
+    visible_area = area * np.divide(clipped, box, out=np.zeros_like(box), where=box > 0)
+    fill = np.divide(area, box, out=np.zeros_like(box), where=box > 0)
+    return {
+        'kind': workload['kind'],
+        'triangles': tris,
+        'vertex_lines': tris * 3 * 5,
+        'onscreen': float(onscreen.mean()) if tris else 0.0,
+        # y points down on screen: negative cross is counter-clockwise in the view
+        'front_facing': float((cross < 0).mean()) if tris else 0.0,
+        'depth_complexity': float(visible_area.sum() / (width * height)),
+        'bbox_fill': float(np.median(fill[onscreen])) if onscreen.any() else 0.0,
+    }
+
+
+def format_summary(s):
+    return (f"{s['kind']}: {s['triangles']:,} triangles ({s['vertex_lines']:,} vertex lines), "
+            f"{100 * s['onscreen']:.1f}% on screen, {100 * s['front_facing']:.1f}% front facing, "
+            f"depth complexity {s['depth_complexity']:.2f}, median bbox fill {s['bbox_fill']:.2f}")
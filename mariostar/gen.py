@@ -9,7 +9,20 @@
 import os
 import sys
 import numpy as np
-from PIL import Image, ImageDraw
+from PIL import Image
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from fpga_renderer.obj_stream import rotate_inplace
+from fpga_renderer.mesh import Mesh
+from fpga_renderer.cache import make_key, cached_arrays, cached_outputs, evict
+from fpga_renderer.encode import write_vertex_mem, write_texture_mem
+from fpga_renderer.indexed import write_indexed_mem, weld_corners, report as indexed_report, format_report
+from fpga_renderer.decimate import decimate, faces_for_lines, faces_for_indexed_lines
+from fpga_renderer.preview import project_vertices, rasterize_zbuffered
+from fpga_renderer.palette import export_palette
+from fpga_renderer.mipmap import mip_chain, write_mip_mem, preview_mips
+from fpga_renderer.atlas import pack_atlas, uv_extents
+from fpga_renderer.profiling import stage, session
 
 # ==============================================================================
 # 1. CONFIGURATION
@@ -31,8 +44,24 @@ FLIP_CULLING = False # Toggle if faces look inside-out
 
 # --- HARDWARE SPECS ---
 MAX_BRAM_LINES = 1024
+# Write unique vertices + a triangle index .mem instead of 5 lines per corner
+INDEXED_EXPORT = False
+# Collapse edges (quadric error) until the model fits MAX_BRAM_LINES
+DECIMATE = True
+DECIMATE_FACES = None  # Explicit triangle budget (None = derive from MAX_BRAM_LINES)
 TEXTURE_SIZE = 64     # 64x64 Atlas
-ATLAS_SLOT_H = 32     # We will split vertically: 64x32 per texture
+ATLAS_GUTTER = 1      # Edge texels around every packed texture
+PALETTE_COLORS = None # 16 / 256: quantize the atlas, also write texture_index.mem + texture_palette.mem
+PALETTE_METHOD = "kmeans"  # or "median_cut"
+MIPMAP = False         # Also write texture_mips.mem (mip chain + level offset table), LOD preview
+MIP_FILTER = "box"     # or "lanczos"
+
+# --- BUILD CACHE ---
+USE_CACHE = True      # Reuse parsed mesh / atlas / outputs when inputs are unchanged
+
+# --- PREVIEW ---
+PREVIEW_DEPTH_BITS = 8        # Board z-buffer precision (None = float depth)
+PREVIEW_CULL_BACKFACES = True # Drop faces the triangle assembler would cull
 
 # --- MVP MATRIX (Standard View for Preview) ---
 mvp_matrix = np.array([
@@ -61,11 +90,6 @@ class MaterialManager:
         print(f"Parsing materials from {mtl_path}...")
         current_mat = None
         
-        # We need to assign slots. 
-        # Slot 0 (Top) -> First material found
-        # Slot 1 (Bottom) -> Second material found
-        slot_index = 0
-        
         if not os.path.exists(mtl_path):
             print("WARNING: MTL file not found. Using defaults.")
             return
@@ -78,46 +102,39 @@ class MaterialManager:
                 
                 if parts[0] == 'newmtl':
                     current_mat = parts[1]
-                    self.materials[current_mat] = {'texture_file': None, 'slot': slot_index}
-                    slot_index += 1
+                    self.materials[current_mat] = {'texture_file': None}
                 elif parts[0] in ['map_Kd', 'map_Ka'] and current_mat:
                     # Found a texture file definition
                     # Handle cases where path has spaces or backslashes
                     tex_file = parts[-1].split('\\')[-1].split('/')[-1]
                     self.materials[current_mat]['texture_file'] = tex_file
 
-    def generate_atlas(self):
-        """Stitches images into a 64x64 atlas."""
-        self.atlas_image = Image.new("RGB", (TEXTURE_SIZE, TEXTURE_SIZE), (255, 0, 255))
-        
+    def generate_atlas(self, extents=None):
+        """Packs every material's texture into the atlas (MaxRects, see fpga_renderer.atlas)."""
+        # extents: material name -> (u0, v0, u1, v1) its faces use; None = whole texture
+        extents = extents or {}
+        names, images = [], []
         for mat_name, data in self.materials.items():
             tex_file = data['texture_file']
-            slot = data['slot']
-            
             if not tex_file: 
                 continue
                 
             path = os.path.join(INPUT_DIR, tex_file)
             if os.path.exists(path):
-                img = Image.open(path).convert("RGB")
-                # Resize to fill the slot (64 width, 32 height)
-                img = img.resize((TEXTURE_SIZE, ATLAS_SLOT_H))
-                
-                # Calculate paste position (Top or Bottom)
-                y_offset = slot * ATLAS_SLOT_H
-                
-                # Paste
-                self.atlas_image.paste(img, (0, y_offset))
-                
-                # Store UV transform info
-                # If slot 0 (Top): V range is 0.0 to 0.5
-                # If slot 1 (Bot): V range is 0.5 to 1.0
-                # (Assuming UV (0,0) is Top-Left for the texture memory)
-                data['uv_scale'] = (1.0, 0.5)
-                data['uv_offset'] = (0.0, float(slot) * 0.5)
+                names.append(mat_name)
+                images.append(Image.open(path).convert("RGB"))
             else:
                 print(f" [!] Missing texture: {tex_file}")
 
+        self.atlas_image, transforms, stats = pack_atlas(
+            images, [extents.get(name, (0.0, 0.0, 1.0, 1.0)) for name in names],
+            size=TEXTURE_SIZE, gutter=ATLAS_GUTTER)
+        for name, xform in zip(names, transforms):
+            self.materials[name]['uv_scale'] = xform['uv_scale']
+            self.materials[name]['uv_offset'] = xform['uv_offset']
+        print(f" Packed {len(images)} textures into {stats['tiles']} tiles "
+              f"(scale {stats['scale']:.2f}, {100 * stats['fill']:.0f}% of the atlas)")
+
         return self.atlas_image
 
     def get_transformed_uv(self, mat_name, u, v):
@@ -143,77 +160,26 @@ class MaterialManager:
 # ==============================================================================
 def parse_obj(filepath, mat_mgr):
     print(f"Parsing {filepath}...")
-    
-    vertices = []    # v
-    tex_coords = []  # vt
-    faces = []       # {verts: [], uvs: [], mat: str}
-    
-    current_mat = None
-    
-    with open(filepath, 'r') as f:
-        for line in f:
-            line = line.strip()
-            if not line or line.startswith('#'): continue
-            
-            parts = line.split()
-            cmd = parts[0]
-            
-            if cmd == 'v':
-                vertices.append([float(parts[1]), float(parts[2]), float(parts[3])])
-            
-            elif cmd == 'vt':
-                # OBJ UVs often have V inverted compared to image coords.
-                # Standard OBJ: (0,0) bottom-left.
-                # Images/Memory: (0,0) top-left.
-                # We usually flip V here: 1.0 - v
-                u = float(parts[1])
-                v = float(parts[2]) % 1.0 
-                tex_coords.append([u, 1.0 - v]) 
-                
-            elif cmd == 'usemtl':
-                current_mat = parts[1]
-                
-            elif cmd == 'f':
-                # f v/vt/vn v/vt/vn ...
-                v_indices = []
-                vt_indices = []
-                
-                for p in parts[1:]:
-                    vals = p.split('/')
-                    # Vertex Index (1-based)
-                    v_idx = int(vals[0]) - 1
-                    v_indices.append(v_idx)
-                    
-                    # Texture Index (1-based), handles "v//vn" case
-                    if len(vals) > 1 and vals[1]:
-                        vt_idx = int(vals[1]) - 1
-                        vt_indices.append(vt_idx)
-                    else:
-                        vt_indices.append(0) # Default to 0 if missing
-
-                if FLIP_CULLING:
-                    v_indices.reverse()
-                    vt_indices.reverse()
-                
-                # Triangulate
-                if len(v_indices) == 3:
-                    faces.append({'verts': v_indices, 'uvs': vt_indices, 'mat': current_mat})
-                elif len(v_indices) == 4:
-                    faces.append({'verts': [v_indices[0], v_indices[1], v_indices[2]], 
-                                  'uvs': [vt_indices[0], vt_indices[1], vt_indices[2]], 
-                                  'mat': current_mat})
-                    faces.append({'verts': [v_indices[0], v_indices[2], v_indices[3]], 
-                                  'uvs': [vt_indices[0], vt_indices[2], vt_indices[3]], 
-                                  'mat': current_mat})
-                    
-    return np.array(vertices), np.array(tex_coords), faces
+    mesh = Mesh.load(filepath, flip_winding=FLIP_CULLING)
+
+    # OBJ UVs often have V inverted compared to image coords.
+    # Standard OBJ: (0,0) bottom-left.
+    # Images/Memory: (0,0) top-left.
+    # We usually flip V here: 1.0 - v
+    # (in place: on huge meshes these are memory-mapped)
+    mesh.uvs[:, 1] = 1.0 - (mesh.uvs[:, 1] % 1.0)
+
+    # Corners without a UV use UV 0
+    np.maximum(mesh.face_uvs, 0, out=mesh.face_uvs)
+    return mesh
 
 # ==============================================================================
 # 4. TRANSFORMS (Geometry)
 # ==============================================================================
-def process_geometry(verts, rotation_deg, scale_factor):
+def process_geometry(verts, rotation_deg, scale_factor, center=None):
     # Center
-    center = verts.mean(axis=0)
+    if center is None:
+        center = verts.mean(axis=0)
     verts -= center
     
     # Scale
@@ -226,121 +192,196 @@ def process_geometry(verts, rotation_deg, scale_factor):
     mat_z = np.array([[np.cos(rz),-np.sin(rz),0],[np.sin(rz),np.cos(rz),0],[0,0,1]])
     
     rot_mat = mat_z @ mat_y @ mat_x
+    if isinstance(verts, np.memmap):
+        return rotate_inplace(verts, rot_mat)
     verts = (rot_mat @ verts.T).T
     
     return verts
 
+def decimate_to(mesh, target):
+    """Decimates the mesh to at most target faces."""
+    # UV seams and material borders are kept; UV indices still point into mesh.uvs
+    print(f"Decimating {len(mesh)} faces to {target}...")
+    result = decimate(mesh.positions, mesh.face_verts, target, face_uvs=mesh.face_uvs, face_mats=mesh.face_mats)
+    if not result['reached']:
+        print(f"!!! WARNING: Stopped at {len(result['face_verts'])} faces (no legal collapse left).")
+    return mesh.replace(positions=result['positions'], face_verts=result['face_verts'],
+                        face_uvs=result['face_uvs'], face_mats=result['face_mats'])
+
+def fit_to_budget(mesh, mat_mgr):
+    """
+    Decimates the mesh if it does not fit the BRAM budget: the flat stream,
+    or with INDEXED_EXPORT the welded vertex + index pair.
+    """
+    if not DECIMATE:
+        return mesh
+    if DECIMATE_FACES is not None or not INDEXED_EXPORT:
+        target = DECIMATE_FACES if DECIMATE_FACES is not None else faces_for_lines(MAX_BRAM_LINES)
+        return decimate_to(mesh, target) if len(mesh) > target else mesh
+
+    # Unique vertices per face change as the mesh shrinks: weld again after every pass
+    while True:
+        unique, _ = weld_corners(mesh.corners(), atlas_uvs(mesh, mat_mgr))
+        r = indexed_report(len(mesh), len(unique))
+        if r['vertex_lines'] + r['index_lines'] <= MAX_BRAM_LINES:
+            return mesh
+        target = min(len(mesh) - 1, faces_for_indexed_lines(MAX_BRAM_LINES, len(mesh), len(unique)))
+        mesh = decimate_to(mesh, target)
+        if len(mesh) > target:
+            return mesh
+
 # ==============================================================================
 # 5. HEX EXPORTERS
 # ==============================================================================
-def to_q16_16(val):
-    scaled = int(val * 65536.0)
-    if scaled < 0: scaled = (1 << 32) + scaled
-    return f"{scaled & 0xFFFFFFFF:08X}"
+def atlas_uvs(mesh, mat_mgr):
+    """(F, 3, 2) per-corner UVs remapped into each face's atlas slot."""
+    # Per-face atlas transform (identity for unknown / untextured materials)
+    uv_xform = np.array([[1.0, 1.0, 0.0, 0.0]] * (len(mesh.materials) + 1))
+    for i, name in enumerate(mesh.materials):
+        data = mat_mgr.materials.get(name, {})
+        if 'uv_scale' in data:
+            uv_xform[i] = [*data['uv_scale'], *data['uv_offset']]
+    su, sv, ou, ov = uv_xform[mesh.face_mats].T  # face_mats == -1 picks the identity row
 
-def to_rgb_444(r, g, b):
-    return f"{(r>>4):X}{(g>>4):X}{(b>>4):X}"
+    raw_uv = mesh.corner_uvs()  # (F, 3, 2)
+    return np.stack([(raw_uv[..., 0] * su[:, None]) + ou[:, None],
+                     (raw_uv[..., 1] * sv[:, None]) + ov[:, None]], axis=-1)
 
-def write_outputs(verts, tex_coords, faces, mat_mgr, atlas_img):
+def write_outputs(mesh, mat_mgr, atlas_img):
     # 1. Texture MEM
     tex_path = os.path.join(OUTPUT_DIR, "texture.mem")
-    with open(tex_path, 'w') as f:
-        pixels = atlas_img.load()
-        for y in range(TEXTURE_SIZE):
-            for x in range(TEXTURE_SIZE):
-                r, g, b = pixels[x, y]
-                f.write(to_rgb_444(r, g, b) + "\n")
+    write_texture_mem(tex_path, atlas_img)
     print(f"Saved {tex_path}")
+    if MIPMAP:
+        mip_path = os.path.join(OUTPUT_DIR, "texture_mips.mem")
+        words = write_mip_mem(mip_path, mip_chain(atlas_img, MIP_FILTER))
+        print(f"Saved {mip_path} ({words} words)")
 
     # 2. Vertex MEM
     vert_path = os.path.join(OUTPUT_DIR, "vertex_data.mem")
-    lines_needed = len(faces) * 3 * 5 
+    final_uv = atlas_uvs(mesh, mat_mgr)
+    if INDEXED_EXPORT:
+        index_path = os.path.join(OUTPUT_DIR, "index_data.mem")
+        mem_report = write_indexed_mem(vert_path, index_path, mesh.corners(), final_uv,
+                                       header="// Star Data (indexed)\n// X, Y, Z, U, V (Q16.16)\n")
+        print(format_report(mem_report))
+        lines_needed = mem_report['vertex_lines'] + mem_report['index_lines']
+        if lines_needed > MAX_BRAM_LINES:
+            print(f"!!! ERROR: Model too big! ({lines_needed} vertex + index lines). Reduce geometry.")
+        print(f"Saved {vert_path}, {index_path}")
+        return lines_needed
+
+    lines_needed = len(mesh) * 3 * 5
     print(f"Memory Usage: {lines_needed} lines.")
 
-    with open(vert_path, 'w') as f:
-        f.write("// Star Data\n// X, Y, Z, U, V (Q16.16)\n")
-        
-        for face in faces:
-            mat_name = face['mat']
-            
-            # Write 3 vertices
-            for i in range(3):
-                v_idx = face['verts'][i]
-                vt_idx = face['uvs'][i]
-                
-                # Geometry
-                vert = verts[v_idx]
-                
-                # UVs
-                if len(tex_coords) > 0:
-                    raw_u, raw_v = tex_coords[vt_idx]
-                    final_u, final_v = mat_mgr.get_transformed_uv(mat_name, raw_u, raw_v)
-                else:
-                    final_u, final_v = (0.0, 0.0)
-
-                f.write(to_q16_16(vert[0]) + "\n") # X
-                f.write(to_q16_16(vert[1]) + "\n") # Y
-                f.write(to_q16_16(vert[2]) + "\n") # Z
-                f.write(to_q16_16(final_u) + "\n") # U
-                f.write(to_q16_16(final_v) + "\n") # V
-        
-        f.write("// EOS\n")
-        f.write("FFFFFFFF\n" * 5)
+    write_vertex_mem(vert_path, mesh.corners(), final_uv,
+                     header="// Star Data\n// X, Y, Z, U, V (Q16.16)\n")
         
     print(f"Saved {vert_path}")
+    return lines_needed
 
 # ==============================================================================
 # 6. VISUALIZATION
 # ==============================================================================
-def generate_preview(verts, tex_coords, faces, mat_mgr, atlas_img):
+def generate_preview(mesh, mat_mgr, atlas_img):
     w, h = 320, 240
-    img = Image.new("RGB", (w, h), (20, 20, 30))
-    draw = ImageDraw.Draw(img)
+    canvas = np.full((h, w, 3), (20, 20, 30), dtype=np.uint8)
+
+    # Per-pixel z-buffer with textured fill, like the board draws it
+    screen, z_ndc = project_vertices(mesh.positions, mvp_matrix, w, h)
+    screen_tris = mesh.corners(screen)
+    uvs = atlas_uvs(mesh, mat_mgr)
+    mips, lod = None, None
+    if MIPMAP:
+        mips, lod = preview_mips(screen_tris, uvs, atlas_img, TEXTURE_SIZE, MIP_FILTER, PREVIEW_CULL_BACKFACES)
+    rasterize_zbuffered(canvas, np.asarray(atlas_img.convert("RGB")),
+                        screen_tris, mesh.corners(z_ndc), uvs,
+                        depth_bits=PREVIEW_DEPTH_BITS, cull_backfaces=PREVIEW_CULL_BACKFACES,
+                        mips=mips, lod=lod)
+
+    prev_path = os.path.join(OUTPUT_DIR, "preview_scene.png")
+    Image.fromarray(canvas).save(prev_path)
+    print(f"Saved {prev_path}")
+
+# ==============================================================================
+# 7. BUILD STAGES (cached)
+# ==============================================================================
+def material_extents(mesh):
+    """Material name -> (u0, v0, u1, v1) of the UVs its faces use."""
+    extents = uv_extents(mesh.uvs, mesh.face_uvs, mesh.face_mats, len(mesh.materials))
+    return {name: tuple(extents[i].tolist()) for i, name in enumerate(mesh.materials)}
+
+def load_atlas(mat_mgr, extents, atlas_key):
+    if atlas_key is None:
+        return mat_mgr.generate_atlas(extents)
+
+    def build():
+        img = mat_mgr.generate_atlas(extents)
+        return {'atlas': np.asarray(img)}, {'materials': mat_mgr.materials}
+
+    arrays, meta = cached_arrays(atlas_key, build)
+    mat_mgr.materials = meta['materials']
+    mat_mgr.atlas_image = Image.fromarray(np.asarray(arrays['atlas']))
+    return mat_mgr.atlas_image
+
+def load_geometry(obj_path, mat_mgr, parse_key):
+    if parse_key is None:
+        return parse_obj(obj_path, mat_mgr)
+
+    def build():
+        return parse_obj(obj_path, mat_mgr).to_cache()
+
+    return Mesh.from_cache(*cached_arrays(parse_key, build))
+
+def build_outputs(obj_path, mat_mgr, parse_key=None, atlas_key=None):
+    # 2. Parse OBJ (Geometry + UVs)
+    with stage("parse") as counts:
+        mesh = load_geometry(obj_path, mat_mgr, parse_key)
+        counts.update(verts=mesh.num_verts, faces=len(mesh))
+    print(f"Loaded {mesh.num_verts} verts, {len(mesh)} faces.")
+
+    # 3. Generate Atlas (Load images, sized to the UVs each material uses)
+    print("Generating Atlas...")
+    with stage("atlas") as counts:
+        atlas_img = load_atlas(mat_mgr, material_extents(mesh), atlas_key)
+        if PALETTE_COLORS is not None:
+            # texture.mem and the preview get the quantized texels, as the indexed ROM would show them
+            atlas_img = export_palette(atlas_img, OUTPUT_DIR, PALETTE_COLORS, PALETTE_METHOD)
+        atlas_img.save(os.path.join(OUTPUT_DIR, "preview_texture.png"))
+        counts['texels'] = atlas_img.width * atlas_img.height
     
-    screen_polys = []
+    # 4. Transform Geometry
+    with stage("transform") as counts:
+        mesh = mesh.replace(positions=process_geometry(mesh.positions, ROTATION, SCALE, mesh.center))
+        mesh = fit_to_budget(mesh, mat_mgr)
+        counts.update(verts=mesh.num_verts, faces=len(mesh))
     
-    for face in faces:
-        mat_name = face['mat']
-        poly_verts = []
-        avg_z = 0
-        
-        # Get UV of first vertex just for color sampling (Simple flat shading approx)
-        vt_idx_0 = face['uvs'][0]
-        raw_u, raw_v = tex_coords[vt_idx_0]
-        fu, fv = mat_mgr.get_transformed_uv(mat_name, raw_u, raw_v)
-        
-        cx, cy = int(fu * TEXTURE_SIZE), int(fv * TEXTURE_SIZE)
-        # Clamp
-        cx = max(0, min(cx, TEXTURE_SIZE-1))
-        cy = max(0, min(cy, TEXTURE_SIZE-1))
-        color = atlas_img.getpixel((cx, cy))
-
-        for v_idx in face['verts']:
-            v = verts[v_idx]
-            v4 = np.array([v[0], v[1], v[2], 1.0])
-            clip = mvp_matrix @ v4
-            we = clip[3] if clip[3] != 0 else 0.0001
-            ndc = clip / we
-            sx = (ndc[0] + 1) * (w/2)
-            sy = (1 - ndc[1]) * (h/2)
-            poly_verts.append((sx, sy))
-            avg_z += we 
-            
-        screen_polys.append((avg_z, poly_verts, color))
-        
-    screen_polys.sort(key=lambda x: x[0], reverse=True)
+    # 5. Export
+    with stage("export") as counts:
+        counts['rows'] = write_outputs(mesh, mat_mgr, atlas_img)
+        counts['texels'] = atlas_img.width * atlas_img.height
     
-    for _, pts, color in screen_polys:
-        draw.polygon(pts, fill=color, outline=(255,255,255))
-        
-    prev_path = os.path.join(OUTPUT_DIR, "preview_scene.png")
-    img.save(prev_path)
-    print(f"Saved {prev_path}")
+    # 6. Preview
+    with stage("preview") as counts:
+        generate_preview(mesh, mat_mgr, atlas_img)
+        counts['faces'] = len(mesh)
 
 # ==============================================================================
 # MAIN
 # ==============================================================================
-if __name__ == "__main__":
+def output_config():
+    """Every constant the outputs depend on (some also through the parse / atlas keys)."""
+    return {'INPUT_DIR': INPUT_DIR, 'OBJ_FILENAME': OBJ_FILENAME, 'MTL_FILENAME': MTL_FILENAME,
+            'SCALE': SCALE, 'ROTATION': ROTATION, 'FLIP_CULLING': FLIP_CULLING,
+            'MAX_BRAM_LINES': MAX_BRAM_LINES, 'INDEXED_EXPORT': INDEXED_EXPORT,
+            'DECIMATE': DECIMATE, 'DECIMATE_FACES': DECIMATE_FACES,
+            'TEXTURE_SIZE': TEXTURE_SIZE, 'ATLAS_GUTTER': ATLAS_GUTTER,
+            'PALETTE_COLORS': PALETTE_COLORS, 'PALETTE_METHOD': PALETTE_METHOD,
+            'MIPMAP': MIPMAP, 'MIP_FILTER': MIP_FILTER,
+            'PREVIEW_DEPTH_BITS': PREVIEW_DEPTH_BITS, 'PREVIEW_CULL_BACKFACES': PREVIEW_CULL_BACKFACES,
+            'mvp_matrix': mvp_matrix.tolist()}
+
+def main():
     if not os.path.exists(OUTPUT_DIR): os.makedirs(OUTPUT_DIR)
     
     # Paths
@@ -354,23 +395,40 @@ if __name__ == "__main__":
     # 1. Setup Material Manager & Parse MTL
     mat_mgr = MaterialManager()
     mat_mgr.parse_mtl(mtl_path)
-    
-    # 2. Generate Atlas (Load images)
-    print("Generating Atlas...")
-    atlas_img = mat_mgr.generate_atlas()
-    atlas_img.save(os.path.join(OUTPUT_DIR, "preview_texture.png"))
 
-    # 3. Parse OBJ (Geometry + UVs)
-    raw_verts, raw_uvs, raw_faces = parse_obj(obj_path, mat_mgr)
-    print(f"Loaded {len(raw_verts)} verts, {len(raw_faces)} faces.")
-    
-    # 4. Transform Geometry
-    final_verts = process_geometry(raw_verts, ROTATION, SCALE)
-    
-    # 5. Export
-    write_outputs(final_verts, raw_uvs, raw_faces, mat_mgr, atlas_img)
-    
-    # 6. Preview
-    generate_preview(final_verts, raw_uvs, raw_faces, mat_mgr, atlas_img)
+    if not USE_CACHE:
+        build_outputs(obj_path, mat_mgr)
+    else:
+        # Each stage is keyed on its own inputs, so e.g. a SCALE change
+        # reuses the parsed mesh and the atlas.
+        tex_paths = [os.path.join(INPUT_DIR, d['texture_file'])
+                     for d in mat_mgr.materials.values() if d['texture_file']]
+        parse_key = make_key("mariostar-parse", [obj_path], {'FLIP_CULLING': FLIP_CULLING})
+        atlas_key = make_key("mariostar-atlas", [mtl_path] + tex_paths,
+                             {'TEXTURE_SIZE': TEXTURE_SIZE, 'ATLAS_GUTTER': ATLAS_GUTTER}, [parse_key])
+        output_key = make_key("mariostar-outputs", [__file__], output_config(),
+                              [parse_key, atlas_key])
+        output_paths = [os.path.join(OUTPUT_DIR, name) for name in
+                        ("preview_texture.png", "texture.mem", "vertex_data.mem", "preview_scene.png")]
+        if INDEXED_EXPORT:
+            output_paths.append(os.path.join(OUTPUT_DIR, "index_data.mem"))
+        if PALETTE_COLORS is not None:
+            output_paths += [os.path.join(OUTPUT_DIR, name) for name in
+                             ("texture_index.mem", "texture_palette.mem")]
+        if MIPMAP:
+            output_paths.append(os.path.join(OUTPUT_DIR, "texture_mips.mem"))
+
+        with stage("outputs") as counts:
+            counts['cache_hit'] = int(cached_outputs(output_key, output_paths,
+                                                     lambda: build_outputs(obj_path, mat_mgr, parse_key, atlas_key)))
+        if counts['cache_hit']:
+            print("Inputs unchanged: restored outputs from cache.")
+        evict()
     
-    print("--- Done ---")
\ No newline at end of file
+    print("--- Done ---")
+
+
+if __name__ == "__main__":
+    with session(sys.argv[1:]) as options:
+        USE_CACHE = USE_CACHE and not options['no_cache']
+        main()
@@ -0,0 +1,52 @@
+# /// script
+# requires-python = ">=3.11"
+# dependencies = [
+#     "numpy",
+#     "pillow",
+# ]
+# ///
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from fpga_renderer.animate import render_frames, write_animation
+from fpga_renderer.geometry_model import (load_mvp_lutram, load_vertex_stream,
+                                          MVP_LUTRAM_FILE, VERTEX_MEM_FILE, VERTEX_BRAM_DEPTH)
+from fpga_renderer.raster_model import load_texture_rom, TEXTURE_MEM_FILE
+
+# ==============================================================================
+# 1. SETUP
+# ==============================================================================
+# Any exported mesh, e.g. "../starwing/output/vertex_data.mem" + its texture.mem
+VERTEX_MEM = VERTEX_MEM_FILE
+TEXTURE_MEM = TEXTURE_MEM_FILE
+
+# MVP table: mvp_lutram.sv, or a file holding the array mvp_mat.py prints
+MVP_LUTRAM = MVP_LUTRAM_FILE
+
+# Only load what fits in the vertex BRAM (what the board would draw)
+LIMIT_TO_BRAM = True
+
+# Output: *.gif for an animated GIF, anything else is a directory of PNGs
+OUTPUT = "animation.gif"
+FRAME_MS = 50
+UPSCALE = 2       # Nearest-neighbour zoom for viewing
+WORKERS = None    # Process pool size (None = all cores, 1 = no pool)
+
+# ==============================================================================
+# MAIN
+# ==============================================================================
+if __name__ == "__main__":
+    print("--- ANIMATION RENDERER (bit-exact model) ---")
+
+    vertices = load_vertex_stream(VERTEX_MEM, VERTEX_BRAM_DEPTH if LIMIT_TO_BRAM else None)
+    mvp = load_mvp_lutram(MVP_LUTRAM)
+    texture = load_texture_rom(TEXTURE_MEM)
+    print(f"Vertices: {len(vertices)} ({len(vertices) // 3} triangles), Frames: {len(mvp)}")
+
+    t0 = time.perf_counter()
+    count = write_animation(OUTPUT, render_frames(vertices, mvp, texture, workers=WORKERS, upscale=UPSCALE),
+                            frame_ms=FRAME_MS)
+    print(f"Wrote {count} frames to {OUTPUT} in {time.perf_counter() - t0:.2f} s")
@@ -1,38 +1,58 @@
+# /// script
+# requires-python = ">=3.11"
+# dependencies = [
+#     "numpy",
+# ]
+# ///
+
 import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from fpga_renderer.memimage import write_image, read_image
+
+# ==============================================================================
+# 1. SETUP
+# ==============================================================================
+# 320 x 240 pixels, as in the SV buffer loops
+DEPTH = 76800
+
+# Name -> (width in bits, fill value): 12'h000 frame buffer, 8'hFF z buffer
+BUFFERS = {
+    "frame_buffer": (12, 0x000),
+    "z_buffer": (8, 0xFF),
+}
+
+# Image formats to write: .mem ($readmemh), .coe (Xilinx), .bin (raw), .hex (Intel HEX)
+FORMATS = (".mem",)
 
+
+# ==============================================================================
+# 2. GENERATE
+# ==============================================================================
 def generate_mem_files():
-    # Configuration based on your SV loop
-    DEPTH = 76800
-    
-    # --- Frame Buffer Settings ---
-    # 12'h000 -> 12 bits = 3 hex digits
-    FB_FILENAME = "frame_buffer.mem"
-    FB_WIDTH_HEX = 3 
-    FB_VAL = 0x000 
-    
-    # --- Z Buffer Settings ---
-    # 8'hFF -> 8 bits = 2 hex digits
-    ZB_FILENAME = "z_buffer.mem"
-    ZB_WIDTH_HEX = 2
-    ZB_VAL = 0xFF
-
-    print(f"Generating {FB_FILENAME} with {DEPTH} entries of {FB_WIDTH_HEX}-digit hex...")
-    with open(FB_FILENAME, 'w') as f:
-        # Format: {:03X} for 3 digits, {:02X} for 2 digits
-        # We pre-calculate the string to speed up the loop
-        line_str = f"{FB_VAL:0{FB_WIDTH_HEX}X}\n"
-        
-        for _ in range(DEPTH):
-            f.write(line_str)
-
-    print(f"Generating {ZB_FILENAME} with {DEPTH} entries of {ZB_WIDTH_HEX}-digit hex...")
-    with open(ZB_FILENAME, 'w') as f:
-        line_str = f"{ZB_VAL:0{ZB_WIDTH_HEX}X}\n"
-        
-        for _ in range(DEPTH):
-            f.write(line_str)
-            
+    for name, (width, fill) in BUFFERS.items():
+        for ext in FORMATS:
+            path = name + ext
+            start = time.perf_counter()
+            write_image(path, [], width, depth=DEPTH, fill=fill)
+            written = time.perf_counter() - start
+
+            # Read it back as a check
+            start = time.perf_counter()
+            words = read_image(path, width=width)
+            read = time.perf_counter() - start
+            if len(words) != DEPTH or (words != fill).any():
+                raise RuntimeError(f"{path} does not read back as {DEPTH} x {fill:X}")
+            print(f"{path}: {DEPTH} x {width}-bit {fill:X} "
+                  f"(write {1e3 * written:.1f} ms, read back {1e3 * read:.1f} ms)")
+
     print("Done. Files created in current directory.")
 
+
+# ==============================================================================
+# MAIN
+# ==============================================================================
 if __name__ == "__main__":
-    generate_mem_files()
\ No newline at end of file
+    generate_mem_files()
@@ -1,6 +1,13 @@
 # gen_texture.py
 # Generates a 64x64 texture (4096 lines) in hex format for Verilog $readmemh
 
+import os
+import sys
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from fpga_renderer.encode import hex_lines
+
 def generate_xor_texture():
     filename = "texture.mem"
     width = 64
@@ -8,20 +15,18 @@ def generate_xor_texture():
     
     print(f"Generating {width}x{height} texture to {filename}...")
     
-    with open(filename, "w") as f:
-        for y in range(height):
-            for x in range(width):
-                # XOR Pattern Logic
-                # We combine X and Y to create a pattern that changes over the surface
-                r = (x ^ y) & 0xF
-                g = (x + y) & 0xF
-                b = (x & y) & 0xF
-                
-                # Combine into 12-bit color (0xRGB)
-                pixel = (r << 8) | (g << 4) | b
-                
-                # Write hex string (e.g., "f05")
-                f.write(f"{pixel:03x}\n")
+    y, x = np.mgrid[0:height, 0:width]
+
+    # XOR Pattern Logic
+    # We combine X and Y to create a pattern that changes over the surface
+    r = (x ^ y) & 0xF
+    g = (x + y) & 0xF
+    b = (x & y) & 0xF
+
+    # Combine into 12-bit color (0xRGB), written as 3-digit hex (e.g., "f05")
+    pixels = (r << 8) | (g << 4) | b
+    with open(filename, "wb") as f:
+        f.write(hex_lines(pixels, digits=3, upper=False))
                 
     print("Done! Texture file created.")
 
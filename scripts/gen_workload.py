@@ -0,0 +1,85 @@
+# /// script
+# requires-python = ">=3.11"
+# dependencies = [
+#     "numpy",
+#     "pillow",
+# ]
+# ///
+
+import argparse
+import ast
+import os
+import sys
+import numpy as np
+from PIL import Image
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from fpga_renderer.workloads import KINDS, generate, write_workload, summary, format_summary
+from fpga_renderer.mvp import mvp_table
+from fpga_renderer.preview import project_vertices, rasterize_zbuffered
+
+# ==============================================================================
+# 1. CONFIGURATION
+# ==============================================================================
+# Defaults; every one can be given on the command line:
+#   python gen_workload.py sphere 1000000 --out workload
+#   python gen_workload.py overdraw 200000 --param layers=16 --param order=front_to_back
+KIND = "sphere"
+TRIANGLES = 100_000
+PARAMS = {}
+OUTPUT_DIR = "workload"
+
+SCREEN_WIDTH = 320
+SCREEN_HEIGHT = 240
+PREVIEW_FILE = "workload_preview.png"  # Written next to the .mem files with --preview
+
+
+# ==============================================================================
+# 2. HELPERS
+# ==============================================================================
+def parse_param(text):
+    """key=value with a Python literal value (strings may go unquoted)."""
+    key, _, value = text.partition("=")
+    try:
+        return key, ast.literal_eval(value)
+    except (ValueError, SyntaxError):
+        return key, value
+
+
+def render_preview(workload, mvp, path):
+    """Z-buffered preview of the workload under the default camera."""
+    canvas = np.zeros((SCREEN_HEIGHT, SCREEN_WIDTH, 3), dtype=np.uint8)
+    screen, z = project_vertices(workload['positions'].reshape(-1, 3), mvp, SCREEN_WIDTH, SCREEN_HEIGHT)
+    tris = len(workload['positions'])
+    rasterize_zbuffered(canvas, workload['texture'], screen.reshape(tris, 3, 2), z.reshape(tris, 3),
+                        workload['uvs'])
+    Image.fromarray(canvas).save(path)
+    return path
+
+
+# ==============================================================================
+# MAIN
+# ==============================================================================
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Synthetic scaling workloads as vertex_data.mem / texture.mem")
+    parser.add_argument("kind", nargs="?", default=KIND, choices=list(KINDS))
+    parser.add_argument("triangles", nargs="?", type=int, default=TRIANGLES)
+    parser.add_argument("--param", action="append", default=[], metavar="KEY=VALUE",
+                        help="kind parameter, e.g. layers=16, aspect=500, visible=0.05")
+    parser.add_argument("--out", default=OUTPUT_DIR, help=f"output directory (default {OUTPUT_DIR})")
+    parser.add_argument("--preview", action="store_true", help=f"also render {PREVIEW_FILE}")
+    args = parser.parse_args(argv)
+
+    params = dict(PARAMS, **dict(parse_param(p) for p in args.param))
+    workload = generate(args.kind, args.triangles, **params)
+    mvp = mvp_table(num_frames=1)[0]
+    print(format_summary(summary(workload, mvp, SCREEN_WIDTH, SCREEN_HEIGHT)))
+
+    for path in write_workload(workload, args.out):
+        print(f"Saved {path}")
+    if args.preview:
+        print(f"Saved {render_preview(workload, mvp, os.path.join(args.out, PREVIEW_FILE))}")
+
+
+if __name__ == "__main__":
+    main()
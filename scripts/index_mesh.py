@@ -0,0 +1,60 @@
+# /// script
+# requires-python = ">=3.11"
+# dependencies = [
+#     "numpy",
+# ]
+# ///
+
+import os
+import sys
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from fpga_renderer.fixed_point import to_unsigned32
+from fpga_renderer.geometry_model import load_mvp_lutram, load_vertex_stream, MVP_LUTRAM_FILE, REPO_DIR
+from fpga_renderer.indexed import weld, write_indexed_words, load_indexed, format_report
+from fpga_renderer.raster_model import load_texture_rom, render_frame
+
+# ==============================================================================
+# 1. SETUP
+# ==============================================================================
+# Flat vertex .mem to convert (any exporter output) and the texture it uses
+VERTEX_MEM = os.path.join(REPO_DIR, "starwing", "output", "vertex_data.mem")
+TEXTURE_MEM = os.path.join(REPO_DIR, "starwing", "output", "texture.mem")
+MVP_LUTRAM = MVP_LUTRAM_FILE
+
+# Indexed outputs
+INDEXED_VERTEX_MEM = "indexed_vertex_data.mem"
+INDEX_MEM = "index_data.mem"
+
+# Render every MVP frame through both engines and compare
+VERIFY = True
+
+# ==============================================================================
+# MAIN
+# ==============================================================================
+if __name__ == "__main__":
+    print("--- INDEXED VERTEX BUFFER EXPORT ---")
+
+    flat = load_vertex_stream(VERTEX_MEM, depth=None)
+    flat = flat[:len(flat) // 3 * 3]  # the assembler drops a partial triangle
+    unique, indices = weld(to_unsigned32(flat))
+
+    mem_report = write_indexed_words(INDEXED_VERTEX_MEM, INDEX_MEM, unique, indices,
+                                     header="// Indexed vertices\n// X, Y, Z, U, V (Q16.16)\n")
+    print(format_report(mem_report))
+    print(f"Saved {INDEXED_VERTEX_MEM}, {INDEX_MEM}")
+
+    if VERIFY:
+        # Read the files back so the check covers the encoding too
+        vertices, indices = load_indexed(INDEXED_VERTEX_MEM, INDEX_MEM)
+        assert np.array_equal(vertices[indices], flat), "expanded stream differs"
+
+        mvp = load_mvp_lutram(MVP_LUTRAM)
+        texture = load_texture_rom(TEXTURE_MEM)
+        bad = [f for f in range(len(mvp))
+               if any(not np.array_equal(a, b) for a, b in
+                      zip(render_frame(flat, mvp, texture, f),
+                          render_frame(vertices, mvp, texture, f, indices=indices)))]
+        print(f"Rendered {len(mvp)} frames flat vs index-fetching engine: "
+              f"{'identical' if not bad else f'{len(bad)} frames differ: {bad}'}")
@@ -0,0 +1,70 @@
+# /// script
+# requires-python = ">=3.11"
+# dependencies = [
+#     "numpy",
+# ]
+# ///
+
+import os
+import sys
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from fpga_renderer.geometry_model import (load_mvp_lutram, load_vertex_stream,
+                                          MVP_LUTRAM_FILE, VERTEX_MEM_FILE)
+from fpga_renderer.raster_model import load_texture_rom, render_frame, TEXTURE_MEM_FILE
+from fpga_renderer.palette import quantize, sample, write_palette_mem, report, format_report
+
+# ==============================================================================
+# 1. SETUP
+# ==============================================================================
+# Any exported texture + the mesh that samples it, e.g. "../starwing/output/..."
+TEXTURE_MEM = TEXTURE_MEM_FILE
+VERTEX_MEM = VERTEX_MEM_FILE
+MVP_LUTRAM = MVP_LUTRAM_FILE
+
+# Palette entries (16 -> 4-bit indices, 256 -> 8-bit) and quantizer
+PALETTE_COLORS = 16
+PALETTE_SIZES = (16, 256)  # Checked by VERIFY for the smallest lossless one
+METHOD = "kmeans"  # or "median_cut"
+
+# Outputs
+INDEX_MEM = "texture_index.mem"
+PALETTE_MEM = "texture_palette.mem"
+
+# Render every MVP frame through the indexed ROM model and compare to texture.mem;
+# exits 1 if any pixel differs
+VERIFY = True
+
+# ==============================================================================
+# MAIN
+# ==============================================================================
+if __name__ == "__main__":
+    print("--- PALETTE TEXTURE ---")
+
+    rom = load_texture_rom(TEXTURE_MEM)
+    indices, palette = quantize(rom, PALETTE_COLORS, METHOD)
+    print(format_report(report(rom, indices, palette, PALETTE_COLORS)))
+
+    write_palette_mem(INDEX_MEM, PALETTE_MEM, indices, palette, PALETTE_COLORS)
+    print(f"Saved {INDEX_MEM}, {PALETTE_MEM}")
+
+    if VERIFY:
+        vertices = load_vertex_stream(VERTEX_MEM)
+        mvp = load_mvp_lutram(MVP_LUTRAM)
+        reference = [render_frame(vertices, mvp, rom, f)[0] for f in range(len(mvp))]
+
+        def changed_pixels(n_colors):
+            """Pixels, over every frame, where the n_colors indexed ROM differs from texture.mem."""
+            indexed_rom = sample(*quantize(rom, n_colors, METHOD))
+            return sum(np.count_nonzero(render_frame(vertices, mvp, indexed_rom, f)[0] != ref)
+                       for f, ref in enumerate(reference))
+
+        changed = {n: changed_pixels(n) for n in sorted({PALETTE_COLORS, *PALETTE_SIZES})}
+        lossless = next((n for n in sorted(PALETTE_SIZES) if changed[n] == 0), None)
+        print(f"Rendered {len(mvp)} frames: {changed[PALETTE_COLORS]} pixels differ from the RGB444 ROM "
+              f"at {PALETTE_COLORS} colors")
+        print(f"Smallest lossless palette: {lossless or f'none of {PALETTE_SIZES}'}")
+        if changed[PALETTE_COLORS]:
+            sys.exit(f"FAIL: the {PALETTE_COLORS}-color preview differs from texture.mem")
+        print("Preview unchanged (lossless)")
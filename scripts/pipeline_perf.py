@@ -0,0 +1,68 @@
+# /// script
+# requires-python = ">=3.11"
+# dependencies = [
+#     "numpy",
+# ]
+# ///
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from fpga_renderer.geometry_model import (load_mvp_lutram, load_vertex_stream,
+                                          MVP_LUTRAM_FILE, VERTEX_MEM_FILE, VERTEX_BRAM_DEPTH)
+from fpga_renderer.perf_model import (simulate, summarize, sweep, pick_depth,
+                                      format_summary, format_histogram, FIFO_DEPTH, CLOCK_HZ)
+
+# ==============================================================================
+# 1. SETUP
+# ==============================================================================
+# Any exported mesh, e.g. "../starwing/output/vertex_data.mem"
+VERTEX_MEM = VERTEX_MEM_FILE
+MVP_LUTRAM = MVP_LUTRAM_FILE
+
+# Only load what fits in the vertex BRAM (what the board would draw)
+LIMIT_TO_BRAM = True
+
+# Pipeline being modelled
+FIFO_DEPTH_MODEL = FIFO_DEPTH
+CLOCK = CLOCK_HZ
+CLEAR_BUFFERS = True  # T_RESETING_BUFFERS before every frame, as fpga_top does unless skip_reset_buffers
+
+# FIFO depths to try (empty list = no sweep)
+SWEEP_DEPTHS = [4, 8, 16, 32, 48, 64, 96, 128]
+
+# ==============================================================================
+# MAIN
+# ==============================================================================
+if __name__ == "__main__":
+    print("--- PIPELINE PERFORMANCE MODEL ---")
+
+    vertices = load_vertex_stream(VERTEX_MEM, VERTEX_BRAM_DEPTH if LIMIT_TO_BRAM else None)
+    mvp = load_mvp_lutram(MVP_LUTRAM)
+    print(f"Vertices: {len(vertices)} ({len(vertices) // 3} triangles), Frames: {len(mvp)}")
+
+    results = simulate(vertices, mvp, fifo_depth=FIFO_DEPTH_MODEL, clear_buffers=CLEAR_BUFFERS)
+    summary = summarize(results, CLOCK)
+    clear_note = "including" if CLEAR_BUFFERS else "excluding"
+    print(f"\nFIFO depth {FIFO_DEPTH_MODEL} ({clear_note} the buffer clear):")
+    print(format_summary(summary, CLOCK))
+    print("FIFO occupancy (share of cycles):")
+    print(format_histogram(summary['fifo_histogram']))
+
+    worst = max(range(len(results)), key=lambda f: results[f]['cycles'])
+    r = results[worst]
+    print(f"\nWorst frame {worst}: {r['cycles']} cycles, {r['triangles']} drawn, "
+          f"{r['culled']} culled, {r['pixels']} pixels scanned")
+
+    if SWEEP_DEPTHS:
+        rows = sweep(vertices, mvp, SWEEP_DEPTHS, clear_buffers=CLEAR_BUFFERS, clock_hz=CLOCK)
+        print(f"\n{'Depth':>6} {'Worst cyc':>10} {'Worst FPS':>10} {'Mean FPS':>10} {'Max occ':>8} {'Dropped':>8}")
+        for depth, s in rows.items():
+            print(f"{depth:>6} {s['worst_cycles']:>10} {s['worst_fps']:>10.1f} {s['mean_fps']:>10.1f} "
+                  f"{s['max_occupancy']:>8} {s['dropped']:>8}")
+        best = pick_depth(rows)
+        if best is None:
+            print("Every depth drops vertices: the geometry engine outruns the rasterizer.")
+        else:
+            print(f"Smallest depth with no drops and best frame time: {best}")
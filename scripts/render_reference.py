@@ -0,0 +1,65 @@
+# /// script
+# requires-python = ">=3.11"
+# dependencies = [
+#     "numpy",
+# ]
+# ///
+
+import os
+import sys
+import time
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from fpga_renderer.geometry_model import (load_mvp_lutram, load_vertex_stream,
+                                          MVP_LUTRAM_FILE, VERTEX_MEM_FILE)
+from fpga_renderer.raster_model import (load_texture_rom, render_frame, write_ppm, read_ppm,
+                                        TEXTURE_MEM_FILE)
+
+# ==============================================================================
+# 1. SETUP
+# ==============================================================================
+# Same files top_level_tb.sv runs on
+VERTEX_MEM = VERTEX_MEM_FILE
+TEXTURE_MEM = TEXTURE_MEM_FILE
+MVP_LUTRAM = MVP_LUTRAM_FILE
+
+# Frames to render (top_level_tb.sv loops over all 64)
+FRAMES = range(64)
+
+# Golden output_image-XX.ppm files go here
+OUTPUT_DIR = "reference_frames"
+
+# Optional: directory holding the simulator's output_image-XX.ppm to diff against
+SIM_DIR = None
+
+# ==============================================================================
+# MAIN
+# ==============================================================================
+if __name__ == "__main__":
+    print("--- REFERENCE RASTERIZER (bit-exact model) ---")
+
+    vertices = load_vertex_stream(VERTEX_MEM)
+    mvp = load_mvp_lutram(MVP_LUTRAM)
+    texture = load_texture_rom(TEXTURE_MEM)
+    os.makedirs(OUTPUT_DIR, exist_ok=True)
+
+    worst = 0.0
+    mismatched = 0
+    for frame in FRAMES:
+        t0 = time.perf_counter()
+        fb, zb = render_frame(vertices, mvp, texture, frame)
+        worst = max(worst, time.perf_counter() - t0)
+
+        name = f"output_image-{frame:02d}.ppm"
+        write_ppm(os.path.join(OUTPUT_DIR, name), fb)
+
+        sim_path = os.path.join(SIM_DIR, name) if SIM_DIR else None
+        if sim_path and os.path.exists(sim_path):
+            diff = np.count_nonzero(read_ppm(sim_path) != fb)
+            mismatched += diff > 0
+            print(f"{name}: {np.count_nonzero(zb != 0xFF)} px drawn, {diff} px differ from simulation")
+
+    print(f"Wrote {len(FRAMES)} frames to {OUTPUT_DIR}/ (slowest frame {worst * 1e3:.1f} ms)")
+    if SIM_DIR:
+        print(f"Frames differing from simulation: {mismatched}")
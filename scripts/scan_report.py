@@ -0,0 +1,68 @@
+# /// script
+# requires-python = ">=3.11"
+# dependencies = [
+#     "numpy",
+#     "pillow",
+# ]
+# ///
+
+import os
+import sys
+from PIL import Image
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from fpga_renderer.geometry_model import (load_mvp_lutram, load_vertex_stream,
+                                          MVP_LUTRAM_FILE, VERTEX_MEM_FILE, VERTEX_BRAM_DEPTH)
+from fpga_renderer.scan_report import (scan_efficiency, summarize, format_summary,
+                                       write_json, write_csv, heatmap_rgb)
+
+# ==============================================================================
+# 1. SETUP
+# ==============================================================================
+# Exported meshes to compare (name -> vertex_data.mem)
+ASSETS = {
+    "star": VERTEX_MEM_FILE,
+    "starwing": "../starwing/output/vertex_data.mem",
+    "mariostar": "../mariostar/output/vertex_data.mem",
+}
+MVP_LUTRAM = MVP_LUTRAM_FILE
+
+# Only load what fits in the vertex BRAM (what the board would draw)
+LIMIT_TO_BRAM = True
+
+# Triangles listed as worst offenders per asset
+WORST_COUNT = 10
+
+# Outputs: <name>_scan.json (everything), <name>_frames.csv, <name>_triangles.csv
+OUTPUT_DIR = "scan_report"
+HEATMAP = True      # <name>_waste.png: where wasted scan cycles land on screen
+HEATMAP_SCALE = 2
+
+# ==============================================================================
+# MAIN
+# ==============================================================================
+if __name__ == "__main__":
+    print("--- BOUNDING-BOX SCAN EFFICIENCY ---")
+
+    mvp = load_mvp_lutram(MVP_LUTRAM)
+    os.makedirs(OUTPUT_DIR, exist_ok=True)
+
+    for name, path in ASSETS.items():
+        if not os.path.exists(path):
+            print(f"\n{name}: {path} not found, skipped")
+            continue
+        vertices = load_vertex_stream(path, VERTEX_BRAM_DEPTH if LIMIT_TO_BRAM else None)
+        scan = scan_efficiency(vertices, mvp)
+        summary = summarize(scan, WORST_COUNT)
+        print(f"\n{name}: {format_summary(summary)}")
+
+        base = os.path.join(OUTPUT_DIR, name)
+        write_json(f"{base}_scan.json", summary)
+        write_csv(f"{base}_frames.csv", summary['frame_totals'])
+        write_csv(f"{base}_triangles.csv", summary['worst_triangles'])
+        if HEATMAP:
+            img = Image.fromarray(heatmap_rgb(scan['waste_map']))
+            img.resize((img.width * HEATMAP_SCALE, img.height * HEATMAP_SCALE),
+                       Image.Resampling.NEAREST).save(f"{base}_waste.png")
+
+    print(f"\nReports written to {OUTPUT_DIR}/")
@@ -0,0 +1,83 @@
+# /// script
+# requires-python = ">=3.11"
+# dependencies = [
+#     "numpy",
+# ]
+# ///
+
+import os
+import sys
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from fpga_renderer.decimate import faces_for_lines
+from fpga_renderer.geometry_model import (load_mvp_lutram, load_vertex_stream,
+                                          MVP_LUTRAM_FILE, VERTEX_MEM_FILE, VERTEX_BRAM_DEPTH)
+from fpga_renderer.perf_model import simulate, summarize, CLOCK_HZ
+from fpga_renderer.raster_model import load_texture_rom, render_frame, TEXTURE_MEM_FILE
+from fpga_renderer.split import split_triangles, pick_split, write_stream_mem
+
+# ==============================================================================
+# 1. SETUP
+# ==============================================================================
+# Any exported mesh, e.g. "../starwing/output/vertex_data.mem" + its texture.mem
+VERTEX_MEM = VERTEX_MEM_FILE
+TEXTURE_MEM = TEXTURE_MEM_FILE
+MVP_LUTRAM = MVP_LUTRAM_FILE
+
+# The split stream must still fit in the vertex BRAM
+MAX_BRAM_LINES = VERTEX_BRAM_DEPTH
+
+# Smallest rasterizer saving (cycles over all frames, one split ahead) worth a split
+MIN_GAIN = 1
+
+# Output, a normal vertex stream (copy over sources_1/new/vertex_data.mem to use it)
+OUTPUT_MEM = "vertex_data_split.mem"
+
+# Render every frame from both streams and compare the covered pixels
+VERIFY = True
+
+# ==============================================================================
+# MAIN
+# ==============================================================================
+if __name__ == "__main__":
+    print("--- TRIANGLE SPLITTING ---")
+
+    vertices = load_vertex_stream(VERTEX_MEM)
+    vertices = vertices[:len(vertices) // 3 * 3]
+    mvp = load_mvp_lutram(MVP_LUTRAM)
+    budget = faces_for_lines(MAX_BRAM_LINES)
+    print(f"Triangles: {len(vertices) // 3}, budget {budget} ({MAX_BRAM_LINES} lines), frames: {len(mvp)}")
+
+    result = split_triangles(vertices, mvp, budget, MIN_GAIN)
+    best, cycles = pick_split(result['steps'], mvp)
+    words = result['steps'][best]
+    print(f"Splits tried: {len(result['gains'])}, kept: {best} "
+          f"({len(words) // 3} triangles, {sum(result['gains'][:best])} rasterizer cycles saved)")
+
+    before = summarize(simulate(vertices, mvp))
+    after = summarize(simulate(words, mvp))
+    print(f"{'':>10} {'Worst cyc':>10} {'Mean cyc':>10} {'Mean FPS':>9} {'Scan cyc':>10} {'Geom busy':>10}")
+    for name, s in (("original", before), ("split", after)):
+        print(f"{name:>10} {s['worst_cycles']:>10} {s['mean_cycles']:>10.0f} {s['mean_fps']:>9.1f} "
+              f"{s['rasterizer']['scan']:>10} {s['geometry']['busy']:>10}")
+    saved = cycles[0] - cycles[best]
+    print(f"Estimated saving: {saved} cycles over {len(mvp)} frames "
+          f"({100.0 * saved / cycles[0]:.1f}%, {saved / CLOCK_HZ * 1e3:.2f} ms)")
+    if best == 0:
+        print("No split shortens the modelled frames: the extra vertices cost more than the scan saves.")
+
+    lines = write_stream_mem(OUTPUT_MEM, words, "// Split mesh\n// X, Y, Z, U, V (Q16.16)\n")
+    print(f"Saved {OUTPUT_MEM} ({lines} lines)")
+
+    if VERIFY and best:
+        texture = load_texture_rom(TEXTURE_MEM)
+        lost = gained = drawn = 0
+        for f in range(len(mvp)):
+            a, _ = render_frame(vertices, mvp, texture, f)
+            b, _ = render_frame(words, mvp, texture, f)
+            lost += np.count_nonzero((a != 0) & (b == 0))
+            gained += np.count_nonzero((a == 0) & (b != 0))
+            drawn += np.count_nonzero(a)
+        # Midpoints snap to whole pixels, so slivers a pixel or two wide change shape
+        print(f"Coverage vs original: {lost} pixels lost, {gained} gained (of {drawn} drawn)")
@@ -6,9 +6,14 @@
 # ]
 # ///
 
+import os
+import sys
 import numpy as np
 from PIL import Image, ImageDraw
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from fpga_renderer.encode import vertex_words, hex_lines
+
 # ==============================================================================
 # 1. SETUP
 # ==============================================================================
@@ -90,37 +95,30 @@ uv_quad = [
 uvs = uv_quad * 6 # Repeat 6 times for 6 faces
 
 # ==============================================================================
-# 2. HELPER: Q16.16 HEX CONVERTER
+# 2. HELPER: Q16.16 HEX DUMP
 # ==============================================================================
-def float_to_hex(val):
-    """Converts a float to a 32-bit Q16.16 hex string."""
-    fixed_val = int(val * 65536.0)
-    if fixed_val < 0:
-        fixed_val = (1 << 32) + fixed_val
-    return f"{fixed_val & 0xFFFFFFFF:08X}"
-
 def print_hex_data(verts, uv_coords):
-    print("// ==========================================")
-    print("// VERTEX DATA (Q16.16 HEX FORMAT)")
-    print(f"// Total Vertices: {len(verts)} ({len(verts)//3} Triangles)")
-    print("// Format: X, Y, Z, U, V")
-    print("// ==========================================")
-    
-    for i, (v, uv) in enumerate(zip(verts, uv_coords)):
-        x, y, z = v[0], v[1], v[2]
-        u, v_coord = uv
-        
+    xyz = np.array(verts)[:, :3]
+    # One block of 5 hex lines per vertex, encoded in one go
+    hex_blocks = hex_lines(vertex_words(xyz, np.array(uv_coords))).decode().split("\n")
+
+    out = [
+        "// ==========================================",
+        "// VERTEX DATA (Q16.16 HEX FORMAT)",
+        f"// Total Vertices: {len(verts)} ({len(verts)//3} Triangles)",
+        "// Format: X, Y, Z, U, V",
+        "// ==========================================",
+    ]
+    for i, (x, y, z) in enumerate(xyz):
         # Add a separator every 3 vertices (every triangle)
         if i % 3 == 0:
-            print(f"// --- Triangle {i // 3} ---")
-
-        print(f"// V{i}: ({x:.3f}, {y:.3f}, {z:.3f})")
-        print(float_to_hex(x)) # X
-        print(float_to_hex(y)) # Y
-        print(float_to_hex(z)) # Z
-        print(float_to_hex(u)) # U
-        print(float_to_hex(v_coord)) # V
-        print("")
+            out.append(f"// --- Triangle {i // 3} ---")
+
+        out.append(f"// V{i}: ({x:.3f}, {y:.3f}, {z:.3f})")
+        out.extend(hex_blocks[i * 5:i * 5 + 5]) # X, Y, Z, U, V
+        out.append("")
+
+    sys.stdout.write("\n".join(out) + "\n")
 
 # ==============================================================================
 # 3. GEOMETRY PIPELINE
@@ -5,85 +5,70 @@
 # ]
 # ///
 
+import os
+import sys
+import time
 import numpy as np
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from fpga_renderer.fixed_point import to_unsigned32
+from fpga_renderer.geometry_model import (load_mvp_lutram, load_vertex_stream, transform,
+                                          MVP_LUTRAM_FILE, VERTEX_MEM_FILE)
+
 # ==============================================================================
-# 1. SETUP THE EXACT MATRIX FROM YOUR VERILOG
+# 1. SETUP
 # ==============================================================================
-# We reconstruct the matrix columns from your SystemVerilog code
-# Note: Your code calculates dot products row by row.
-# mvp_matrix = np.array([
-# [  0.530,   -0.530,    0.000,    0.000],
-#  [   0.632,    0.632,   -0.447,   -0.000],
-#  [  -0.317,   -0.317,   -0.896,   11.003],
-#  [  -0.316,   -0.316,   -0.894,   11.180]], 
-#  dtype=np.float32)
-
-
-mvp_matrix = np.array([
-    [ 0.750,    0.000,    0.000,    0.000],
-    [ 0.000,    0.894,   -0.447,   -0.000],
-    [ 0.000,   -0.494,   -0.989,   10.252],
-    [ 0.000,   -0.447,   -0.894,   11.180]
-], dtype=np.float32)
+# Same files the geometry engine loads ($readmemh / LUTRAM initializer)
+VERTEX_MEM = VERTEX_MEM_FILE
+MVP_LUTRAM = MVP_LUTRAM_FILE
 
-# Re-creating the exact hex values you used to ensure 1:1 match
-# 32'h000087C3 = 0.5303...
-# 32'hFFFF783D = -0.5303...
-# etc...
-# For verification, we will use float math, but it will be close enough to check logic.
+# Which frame / how many vertices to print (compare these to your waveform)
+SHOW_FRAME = 0
+SHOW_VERTICES = 6
 
 # ==============================================================================
-# 2. DEFINE THE TEST TRIANGLE (From vertex_data.mem)
+# 2. FLOAT REFERENCE
 # ==============================================================================
-# (-1, -1, 1), (1, -1, 1), (1, 1, 1)
-vertices = [
-    np.array([-1.0, -1.0, 1.0, 1.0]),
-    np.array([ 1.0, -1.0, 1.0, 1.0]),
-    np.array([ 1.0,  1.0, 1.0, 1.0])
-]
+def float_pipeline(vertices, mvp):
+    """Ideal float math of the same pipeline, to see how far fixed point drifts."""
+    xyz1 = np.concatenate([vertices[:, :3] / 65536.0, np.ones((len(vertices), 1))], axis=1)
+    mats = mvp.reshape(-1, 4, 4) / 65536.0
+    clip = np.einsum("frc,nc->frn", mats, xyz1)
+    ndc = clip[:, :3] / clip[:, 3:4]
+    return (ndc[:, 0] + 1.0) * 160.0, (ndc[:, 1] + 1.0) * 120.0, (ndc[:, 2] + 1.0) * 127.5
 
-print("--- GEOMETRY ENGINE VERIFICATION ---")
+# ==============================================================================
+# MAIN
+# ==============================================================================
+if __name__ == "__main__":
+    print("--- GEOMETRY ENGINE VERIFICATION (bit-exact model) ---")
 
-for i, v in enumerate(vertices):
-    print(f"\nProcessing Vertex {i}: {v[:3]}")
-    
-    # STEP 1: MATRIX TRANSFORM
-    # -----------------------------------------------------
-    # Clip Coords = Matrix * Vector
-    clip = mvp_matrix @ v
-    
-    print(f"  [1] Clip Space (x_out, y_out, z_out, w_out):")
-    print(f"      X: {clip[0]:.4f}")
-    print(f"      Y: {clip[1]:.4f}")
-    print(f"      Z: {clip[2]:.4f}")
-    print(f"      W: {clip[3]:.4f} (Should be > 0.1)")
+    vertices = load_vertex_stream(VERTEX_MEM)
+    mvp = load_mvp_lutram(MVP_LUTRAM)
+    print(f"Vertices: {len(vertices)} ({len(vertices) // 3} triangles), Frames: {len(mvp)}")
 
-    # STEP 2: PERSPECTIVE DIVIDE
-    # -----------------------------------------------------
-    # NDC = Clip / W
-    ndc_x = clip[0] / clip[3]
-    ndc_y = clip[1] / clip[3]
-    ndc_z = clip[2] / clip[3]
-    
-    print(f"  [2] NDC (x_ndc, y_ndc):")
-    print(f"      X: {ndc_x:.4f}")
-    print(f"      Y: {ndc_y:.4f}")
+    t0 = time.perf_counter()
+    out = transform(vertices, mvp)
+    dt = time.perf_counter() - t0
+    print(f"Modelled {out['o_x'].size} vertex transforms in {dt * 1e3:.1f} ms")
 
-    # STEP 3: VIEWPORT MAP
-    # -----------------------------------------------------
-    # Screen X = (NDC_X + 1.0) * 160
-    # Screen Y = (NDC_Y + 1.0) * 120
-    screen_x = (ndc_x + 1.0) * 160.0
-    screen_y = (ndc_y + 1.0) * 120.0
-    screen_z = (ndc_z + 1.0) * 127.5 # [-1,1] to [0,255]
-    
-    # Convert to Q16.16 Hex for comparison
-    def to_hex(val):
-        fixed = int(val * 65536.0)
-        return f"{fixed:08X}"
+    # --- Per-vertex register dump for one frame ---
+    f = SHOW_FRAME
+    for i in range(min(SHOW_VERTICES, len(vertices))):
+        print(f"\nFrame {f}, Vertex {i}: input {[f'{w:08X}' for w in to_unsigned32(vertices[i, :3])]}")
+        print("  [1] Clip: " + " ".join(f"{k[0].upper()}={to_unsigned32(out[k][f, i]):08X}"
+                                         for k in ('x_clip', 'y_clip', 'z_clip', 'w_clip')))
+        print("  [2] NDC:  " + " ".join(f"{k[0].upper()}={to_unsigned32(out[k][f, i]):08X}"
+                                         for k in ('x_ndc', 'y_ndc', 'z_ndc')))
+        print("  [3] FINAL OUTPUT:")
+        print(f"      x register (Dec): {out['o_x'][f, i] >> 16} (Hex: {to_unsigned32(out['o_x'][f, i]):08X})")
+        print(f"      y register (Dec): {out['o_y'][f, i] >> 16} (Hex: {to_unsigned32(out['o_y'][f, i]):08X})")
+        print(f"      o_z (8-bit):      {out['o_z'][f, i]}")
 
-    print(f"  [3] FINAL OUTPUT (Compare these to your waveform):")
-    print(f"      x register (Dec): {int(screen_x)} (Hex: {to_hex(screen_x)})")
-    print(f"      y register (Dec): {int(screen_y)} (Hex: {to_hex(screen_y)})")
-    print(f"      z register (Dec): {int(screen_z)} (Hex: {to_hex(screen_z)})")
\ No newline at end of file
+    # --- Fixed point vs float, over every frame ---
+    fx, fy, fz = float_pipeline(vertices, mvp)
+    err_x = np.abs(out['o_x'] / 65536.0 - fx).max()
+    err_y = np.abs(out['o_y'] / 65536.0 - fy).max()
+    err_z = np.abs(out['o_z'] - np.floor(fz)).max()
+    print(f"\nMax deviation from float math over all frames: "
+          f"x {err_x:.4f} px, y {err_y:.4f} px, z {err_z:.0f} LSB")
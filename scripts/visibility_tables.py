@@ -0,0 +1,66 @@
+# /// script
+# requires-python = ">=3.11"
+# dependencies = [
+#     "numpy",
+# ]
+# ///
+
+import os
+import sys
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from fpga_renderer.encode import read_hex_words
+from fpga_renderer.geometry_model import (load_mvp_lutram, load_vertex_stream,
+                                          MVP_LUTRAM_FILE, VERTEX_MEM_FILE, VERTEX_BRAM_DEPTH)
+from fpga_renderer.raster_model import load_texture_rom, render_frame, TEXTURE_MEM_FILE
+from fpga_renderer.visibility import (triangle_visibility, write_visibility_mem, unpack_masks,
+                                      words_per_frame, report, format_report)
+
+# ==============================================================================
+# 1. SETUP
+# ==============================================================================
+# Any exported mesh, e.g. "../starwing/output/vertex_data.mem" + its texture.mem
+VERTEX_MEM = VERTEX_MEM_FILE
+TEXTURE_MEM = TEXTURE_MEM_FILE
+MVP_LUTRAM = MVP_LUTRAM_FILE
+
+# Only load what fits in the vertex BRAM (what the board would draw)
+LIMIT_TO_BRAM = True
+
+# Outputs
+MASK_MEM = "visibility_mask.mem"
+DRAW_LIST_MEM = "draw_list.mem"
+
+# Render every frame with only the drawn triangles and compare to the full stream
+VERIFY = True
+
+# ==============================================================================
+# MAIN
+# ==============================================================================
+if __name__ == "__main__":
+    print("--- VISIBILITY TABLES ---")
+
+    vertices = load_vertex_stream(VERTEX_MEM, VERTEX_BRAM_DEPTH if LIMIT_TO_BRAM else None)
+    vertices = vertices[:len(vertices) // 3 * 3]  # the assembler drops a partial triangle
+    mvp = load_mvp_lutram(MVP_LUTRAM)
+
+    vis = triangle_visibility(vertices, mvp)
+    print(format_report(report(vis)))
+
+    write_visibility_mem(MASK_MEM, DRAW_LIST_MEM, vis['drawn'])
+    print(f"Saved {MASK_MEM}, {DRAW_LIST_MEM}")
+
+    if VERIFY:
+        n_tris = len(vertices) // 3
+        masks = read_hex_words(MASK_MEM).reshape(len(mvp), words_per_frame(n_tris))
+        assert np.array_equal(unpack_masks(masks, n_tris), vis['drawn']), "bitmask round trip differs"
+
+        texture = load_texture_rom(TEXTURE_MEM)
+        tris = vertices.reshape(n_tris, 3, -1)
+        bad = [f for f in range(len(mvp))
+               if any(not np.array_equal(a, b) for a, b in
+                      zip(render_frame(vertices, mvp, texture, f),
+                          render_frame(tris[vis['drawn'][f]].reshape(-1, vertices.shape[1]), mvp, texture, f)))]
+        print(f"Rendered {len(mvp)} frames full stream vs draw lists: "
+              f"{'identical' if not bad else f'{len(bad)} frames differ: {bad}'}")
@@ -6,10 +6,24 @@
 # ]
 # ///
 
+import glob
 import os
 import sys
 import numpy as np
-from PIL import Image, ImageDraw
+from PIL import Image
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from fpga_renderer.obj_stream import rotate_inplace
+from fpga_renderer.mesh import Mesh
+from fpga_renderer.cache import make_key, cached_arrays, cached_outputs, evict
+from fpga_renderer.encode import write_vertex_mem, write_texture_mem
+from fpga_renderer.indexed import write_indexed_mem, weld_corners, report as indexed_report, format_report
+from fpga_renderer.decimate import decimate, faces_for_lines, faces_for_indexed_lines
+from fpga_renderer.preview import project_vertices, rasterize_zbuffered
+from fpga_renderer.palette import export_palette
+from fpga_renderer.mipmap import mip_chain, write_mip_mem, preview_mips
+from fpga_renderer.atlas import pack_atlas
+from fpga_renderer.profiling import stage, session
 
 # ==============================================================================
 # 1. CONFIGURATION
@@ -33,9 +47,24 @@ FLIP_CULLING = True
 
 # --- HARDWARE SPECS ---
 MAX_BRAM_LINES = 1024
+# Write unique vertices + a triangle index .mem instead of 5 lines per corner
+INDEXED_EXPORT = False
+# Collapse edges (quadric error) until the model fits MAX_BRAM_LINES
+DECIMATE = True
+DECIMATE_FACES = None  # Explicit triangle budget (None = derive from MAX_BRAM_LINES)
 TEXTURE_SIZE = 64
-ATLAS_GRID = 8  # 8x8 grid = 64 slots
-SLOT_SIZE = TEXTURE_SIZE // ATLAS_GRID # 8 pixels
+ATLAS_GUTTER = 1  # Edge texels around every packed color (a solid slot is 1 texel + gutter)
+PALETTE_COLORS = None  # 16 / 256: quantize the atlas, also write texture_index.mem + texture_palette.mem
+PALETTE_METHOD = "kmeans"  # or "median_cut"
+MIPMAP = False  # Also write texture_mips.mem (mip chain + level offset table), LOD preview
+MIP_FILTER = "box"  # or "lanczos"
+
+# --- BUILD CACHE ---
+USE_CACHE = True  # Reuse parsed mesh / outputs when inputs are unchanged
+
+# --- PREVIEW ---
+PREVIEW_DEPTH_BITS = 8        # Board z-buffer precision (None = float depth)
+PREVIEW_CULL_BACKFACES = True # Drop faces the triangle assembler would cull
 
 # --- MVP MATRIX (Standard View) ---
 mvp_matrix = np.array([
@@ -52,8 +81,8 @@ class MaterialManager:
     def __init__(self):
         self.materials = {} # Name -> { 'id': int, 'color': (r,g,b) }
         self.next_id = 0
-        self.max_ids = ATLAS_GRID * ATLAS_GRID
         self.missing_color = (255, 0, 255) # Hot Pink
+        self.slot_centers = {} # id -> (u, v), filled by generate_atlas
 
     def get_material_id(self, mat_name):
         # 1. Check if exists
@@ -61,10 +90,6 @@ class MaterialManager:
             return self.materials[mat_name]['id']
         
         # 2. Create new
-        if self.next_id >= self.max_ids:
-            print(f"WARNING: Too many materials! Clamping {mat_name} to ID 0.")
-            return 0
-            
         color = self._load_color_from_file(mat_name)
         new_id = self.next_id
         self.materials[mat_name] = { 'id': new_id, 'color': color }
@@ -90,36 +115,19 @@ class MaterialManager:
             return self.missing_color
 
     def generate_atlas(self):
-        # Create 64x64 Image
-        img = Image.new("RGB", (TEXTURE_SIZE, TEXTURE_SIZE), (0,0,0))
-        draw = ImageDraw.Draw(img)
-        
-        for name, data in self.materials.items():
-            idx = data['id']
-            color = data['color']
-            
-            # Calc Grid Pos
-            row = idx // ATLAS_GRID
-            col = idx % ATLAS_GRID
-            
-            x0 = col * SLOT_SIZE
-            y0 = row * SLOT_SIZE
-            x1 = x0 + SLOT_SIZE
-            y1 = y0 + SLOT_SIZE
-            
-            draw.rectangle([x0, y0, x1-1, y1-1], fill=color)
-            
+        # Pack one solid slot per material (identical colors share a slot)
+        ids = sorted(data['id'] for data in self.materials.values())
+        colors = {data['id']: data['color'] for data in self.materials.values()}
+        tiles = [np.array([[colors[i]]], dtype=np.uint8) for i in ids]
+        img, transforms, stats = pack_atlas(tiles, size=TEXTURE_SIZE, gutter=ATLAS_GUTTER,
+                                            background=(0, 0, 0))
+        self.slot_centers = {i: xform['uv_offset'] for i, xform in zip(ids, transforms)}
+        print(f"Packed {len(ids)} materials into {stats['tiles']} atlas slots.")
         return img
 
     def get_uv_center_normalized(self, mat_id):
         # Returns (u, v) 0.0-1.0 pointing to center of slot
-        row = mat_id // ATLAS_GRID
-        col = mat_id % ATLAS_GRID
-        
-        center_x_px = (col * SLOT_SIZE) + (SLOT_SIZE / 2.0)
-        center_y_px = (row * SLOT_SIZE) + (SLOT_SIZE / 2.0)
-        
-        return (center_x_px / TEXTURE_SIZE, center_y_px / TEXTURE_SIZE)
+        return self.slot_centers.get(mat_id, (0.0, 0.0))
 
 
 # ==============================================================================
@@ -127,65 +135,22 @@ class MaterialManager:
 # ==============================================================================
 def parse_obj(filepath, mat_mgr):
     print(f"Parsing {filepath}...")
-    
-    vertices = [] # List of [x, y, z]
-    faces = []    # List of { 'verts': [i1, i2, i3], 'mat_id': int }
-    
-    current_mat_id = 0
-    
-    with open(filepath, 'r') as f:
-        for line in f:
-            line = line.strip()
-            if not line or line.startswith('#'):
-                continue
-                
-            parts = line.split()
-            cmd = parts[0]
-            
-            if cmd == 'v':
-                # Vertex: v x y z
-                v = [float(parts[1]), float(parts[2]), float(parts[3])]
-                vertices.append(v)
-                
-            elif cmd == 'usemtl':
-                # Material Switch: usemtl color_EE
-                mat_name = parts[1]
-                current_mat_id = mat_mgr.get_material_id(mat_name)
-                
-            elif cmd == 'f':
-                # Face: f v1/vt1/vn1 v2...
-                # We handle triangles (3) and quads (4)
-                # OBJ indices are 1-based string "v_idx/vt_idx/vn_idx"
-                
-                # Extract just vertex indices
-                v_indices = []
-                for p in parts[1:]:
-                    # split "9/37/37" -> take "9"
-                    v_str = p.split('/')[0] 
-                    v_idx = int(v_str) - 1 # Convert to 0-based
-                    v_indices.append(v_idx)
-
-                # --- NEW: Flip Culling Logic ---
-                if FLIP_CULLING:
-                    v_indices.reverse()
-                # -------------------------------
-                
-                # Triangulate if Quad (0,1,2,3) -> (0,1,2) & (0,2,3)
-                if len(v_indices) == 3:
-                    faces.append({ 'verts': v_indices, 'mat_id': current_mat_id })
-                elif len(v_indices) == 4:
-                    faces.append({ 'verts': [v_indices[0], v_indices[1], v_indices[2]], 'mat_id': current_mat_id })
-                    faces.append({ 'verts': [v_indices[0], v_indices[2], v_indices[3]], 'mat_id': current_mat_id })
-                    
-    return np.array(vertices), faces
+    mesh = Mesh.load(filepath, flip_winding=FLIP_CULLING)
+
+    # Register materials in the order the OBJ first uses them, so the atlas
+    # slot ids match the file order. Faces before any usemtl have index -1,
+    # which picks the trailing ID 0. From here on face_mats holds slot ids.
+    mat_ids = np.array([mat_mgr.get_material_id(name) for name in mesh.materials] + [0])
+    return mesh.replace(face_mats=mat_ids[mesh.face_mats])
 
 # ==============================================================================
 # 4. TRANSFORMS
 # ==============================================================================
-def process_geometry(verts, rotation_deg, scale_factor):
+def process_geometry(verts, rotation_deg, scale_factor, center=None):
     # 1. Center at (0,0,0)
-    # Find center of mass
-    center = verts.mean(axis=0)
+    # Find center of mass (streamed meshes pass the loader's running mean)
+    if center is None:
+        center = verts.mean(axis=0)
     verts -= center
     
     # 2. Scale
@@ -204,119 +169,184 @@ def process_geometry(verts, rotation_deg, scale_factor):
     rot_mat = mat_z @ mat_y @ mat_x
     
     # Apply to all vertices
-    # Transpose for multiplication (3xN) then transpose back
+    # Transpose for multiplication (3xN) then transpose back.
+    # Memory-mapped (streamed) meshes are rotated in place, block by block.
+    if isinstance(verts, np.memmap):
+        return rotate_inplace(verts, rot_mat)
     verts = (rot_mat @ verts.T).T
     
     return verts
 
+def decimate_to(mesh, target):
+    """Decimates the mesh to at most target faces."""
+    # Atlas slots are per face, so material borders are the only seams
+    print(f"Decimating {len(mesh)} faces to {target}...")
+    result = decimate(mesh.positions, mesh.face_verts, target, face_mats=mesh.face_mats)
+    if not result['reached']:
+        print(f"!!! WARNING: Stopped at {len(result['face_verts'])} faces (no legal collapse left).")
+    # The UVs are not used (every corner samples its slot center)
+    return mesh.replace(positions=result['positions'], face_verts=result['face_verts'],
+                        face_uvs=None, face_mats=result['face_mats'])
+
+def fit_to_budget(mesh, mat_mgr):
+    """
+    Decimates the mesh if it does not fit the BRAM budget: the flat stream,
+    or with INDEXED_EXPORT the welded vertex + index pair.
+    """
+    if not DECIMATE:
+        return mesh
+    if DECIMATE_FACES is not None or not INDEXED_EXPORT:
+        target = DECIMATE_FACES if DECIMATE_FACES is not None else faces_for_lines(MAX_BRAM_LINES)
+        return decimate_to(mesh, target) if len(mesh) > target else mesh
+
+    # Unique vertices per face change as the mesh shrinks: weld again after every pass
+    while True:
+        unique, _ = weld_corners(mesh.corners(), slot_uvs(mesh, mat_mgr))
+        r = indexed_report(len(mesh), len(unique))
+        if r['vertex_lines'] + r['index_lines'] <= MAX_BRAM_LINES:
+            return mesh
+        target = min(len(mesh) - 1, faces_for_indexed_lines(MAX_BRAM_LINES, len(mesh), len(unique)))
+        mesh = decimate_to(mesh, target)
+        if len(mesh) > target:
+            return mesh
+
 # ==============================================================================
 # 5. HEX EXPORTERS
 # ==============================================================================
-def to_q16_16(val):
-    scaled = int(val * 65536.0)
-    if scaled < 0:
-        scaled = (1 << 32) + scaled
-    return f"{scaled & 0xFFFFFFFF:08X}"
-
-def to_rgb_444(r, g, b):
-    return f"{(r>>4):X}{(g>>4):X}{(b>>4):X}"
+def slot_uvs(mesh, mat_mgr):
+    """(F, 3, 2) UVs: every corner of a face samples the center of its material's atlas slot."""
+    slot_uv = np.array([mat_mgr.get_uv_center_normalized(i) for i in range(max(1, mat_mgr.next_id))])
+    return np.repeat(slot_uv[mesh.face_mats][:, None, :], 3, axis=1)
 
-def write_outputs(verts, faces, mat_mgr, atlas_img):
+def write_outputs(mesh, mat_mgr, atlas_img):
     # --- 1. Texture MEM ---
     tex_path = os.path.join(OUTPUT_DIR, "texture.mem")
-    with open(tex_path, 'w') as f:
-        pixels = atlas_img.load()
-        for y in range(TEXTURE_SIZE):
-            for x in range(TEXTURE_SIZE):
-                r, g, b = pixels[x, y]
-                f.write(to_rgb_444(r, g, b) + "\n")
+    write_texture_mem(tex_path, atlas_img)
     print(f"Saved {tex_path}")
+    if MIPMAP:
+        mip_path = os.path.join(OUTPUT_DIR, "texture_mips.mem")
+        words = write_mip_mem(mip_path, mip_chain(atlas_img, MIP_FILTER))
+        print(f"Saved {mip_path} ({words} words)")
 
     # --- 2. Vertex MEM ---
     vert_path = os.path.join(OUTPUT_DIR, "vertex_data.mem")
     
-    lines_needed = len(faces) * 3 * 5 # 3 verts per face, 5 lines per vert
+    if INDEXED_EXPORT:
+        index_path = os.path.join(OUTPUT_DIR, "index_data.mem")
+        mem_report = write_indexed_mem(vert_path, index_path, mesh.corners(), slot_uvs(mesh, mat_mgr),
+                                       header="// Arwing Data (indexed)\n// X, Y, Z, U, V (Q16.16)\n")
+        print(format_report(mem_report))
+        lines_needed = mem_report['vertex_lines'] + mem_report['index_lines']
+        if lines_needed > MAX_BRAM_LINES:
+            print(f"!!! ERROR: Model too big! ({lines_needed} vertex + index lines). Reduce geometry.")
+        print(f"Saved {vert_path}, {index_path}")
+        return lines_needed
+
+    lines_needed = len(mesh) * 3 * 5 # 3 verts per face, 5 lines per vert
     print(f"Memory Usage: {lines_needed} / {MAX_BRAM_LINES} lines.")
     
     if lines_needed > MAX_BRAM_LINES:
         print(f"!!! ERROR: Model too big! ({lines_needed} lines). Reduce geometry.")
+        print("    Set DECIMATE = True, or INDEXED_EXPORT = True to weld shared vertices.")
         # We will write anyway, but warn heavily
     
-    with open(vert_path, 'w') as f:
-        f.write("// Arwing Data\n// X, Y, Z, U, V (Q16.16)\n")
-        
-        for face in faces:
-            mat_id = face['mat_id']
-            # Get UV center for this material
-            u, v = mat_mgr.get_uv_center_normalized(mat_id)
-            
-            # Write 3 vertices
-            for v_idx in face['verts']:
-                vert = verts[v_idx]
-                
-                f.write(to_q16_16(vert[0]) + "\n") # X
-                f.write(to_q16_16(vert[1]) + "\n") # Y
-                f.write(to_q16_16(vert[2]) + "\n") # Z
-                f.write(to_q16_16(u) + "\n")       # U
-                f.write(to_q16_16(v) + "\n")       # V
-        
-        # EOS
-        f.write("// EOS\n")
-        f.write("FFFFFFFF\n" * 5)
+    write_vertex_mem(vert_path, mesh.corners(), slot_uvs(mesh, mat_mgr),
+                     header="// Arwing Data\n// X, Y, Z, U, V (Q16.16)\n")
         
     print(f"Saved {vert_path}")
+    return lines_needed
 
 # ==============================================================================
 # 6. VISUALIZATION
 # ==============================================================================
-def generate_preview(verts, faces, mat_mgr, atlas_img):
+def generate_preview(mesh, mat_mgr, atlas_img):
     w, h = 320, 240
-    img = Image.new("RGB", (w, h), (10, 10, 10))
-    draw = ImageDraw.Draw(img)
+    canvas = np.full((h, w, 3), (10, 10, 10), dtype=np.uint8)
+
+    # Per-pixel z-buffer with textured fill, like the board draws it
+    screen, z_ndc = project_vertices(mesh.positions, mvp_matrix, w, h)
+    screen_tris = mesh.corners(screen)
+    uvs = slot_uvs(mesh, mat_mgr)
+    # Every face samples one slot center, so its UV area is 0 and it stays on level 0
+    mips, lod = None, None
+    if MIPMAP:
+        mips, lod = preview_mips(screen_tris, uvs, atlas_img, TEXTURE_SIZE, MIP_FILTER, PREVIEW_CULL_BACKFACES)
+    rasterize_zbuffered(canvas, np.asarray(atlas_img.convert("RGB")),
+                        screen_tris, mesh.corners(z_ndc), uvs,
+                        depth_bits=PREVIEW_DEPTH_BITS, cull_backfaces=PREVIEW_CULL_BACKFACES,
+                        mips=mips, lod=lod)
+
+    prev_path = os.path.join(OUTPUT_DIR, "preview_scene.png")
+    Image.fromarray(canvas).save(prev_path)
+    print(f"Saved {prev_path}")
+
+# ==============================================================================
+# 7. BUILD STAGES (cached)
+# ==============================================================================
+def load_geometry(path_to_obj, mat_mgr, parse_key):
+    if parse_key is None:
+        return parse_obj(path_to_obj, mat_mgr)
+
+    def build():
+        arrays, meta = parse_obj(path_to_obj, mat_mgr).to_cache()
+        return arrays, dict(meta, slots={'materials': mat_mgr.materials, 'next_id': mat_mgr.next_id})
+
+    arrays, meta = cached_arrays(parse_key, build)
+    # Material slots and colors were read from the PNGs during the original parse
+    mat_mgr.materials = {name: {'id': d['id'], 'color': tuple(d['color'])}
+                         for name, d in meta['slots']['materials'].items()}
+    mat_mgr.next_id = meta['slots']['next_id']
+    return Mesh.from_cache(arrays, meta)
+
+def build_outputs(path_to_obj, mat_mgr, parse_key=None):
+    # 2. Parse OBJ (Builds material list dynamically)
+    with stage("parse") as counts:
+        mesh = load_geometry(path_to_obj, mat_mgr, parse_key)
+        counts.update(verts=mesh.num_verts, faces=len(mesh))
+    print(f"Loaded {mesh.num_verts} vertices, {len(mesh)} faces.")
     
-    # Simple Pipeline
-    screen_polys = []
+    # 3. Generate Atlas
+    print(f"Found {len(mat_mgr.materials)} unique materials.")
+    with stage("atlas") as counts:
+        atlas_img = mat_mgr.generate_atlas()
+        if PALETTE_COLORS is not None:
+            # texture.mem and the preview get the quantized texels, as the indexed ROM would show them
+            atlas_img = export_palette(atlas_img, OUTPUT_DIR, PALETTE_COLORS, PALETTE_METHOD)
+        atlas_img.save(os.path.join(OUTPUT_DIR, "preview_texture.png"))
+        counts['texels'] = atlas_img.width * atlas_img.height
     
-    for face in faces:
-        mat_id = face['mat_id']
-        poly_verts = []
-        avg_z = 0
-        
-        for v_idx in face['verts']:
-            v = verts[v_idx]
-            v4 = np.array([v[0], v[1], v[2], 1.0])
-            
-            clip = mvp_matrix @ v4
-            we = clip[3] if clip[3] != 0 else 0.0001
-            ndc = clip / we
-            
-            sx = (ndc[0] + 1) * (w/2)
-            sy = (1 - ndc[1]) * (h/2)
-            
-            poly_verts.append((sx, sy))
-            avg_z += we # Use W for depth approx
-            
-        # Get Color
-        u, v = mat_mgr.get_uv_center_normalized(mat_id)
-        cx, cy = int(u * TEXTURE_SIZE), int(v * TEXTURE_SIZE)
-        color = atlas_img.getpixel((cx, cy))
-        
-        screen_polys.append((avg_z, poly_verts, color))
-        
-    # Sort Back-to-Front
-    screen_polys.sort(key=lambda x: x[0], reverse=True)
+    # 4. Transform Geometry
+    with stage("transform") as counts:
+        mesh = mesh.replace(positions=process_geometry(mesh.positions, ROTATION, SCALE, mesh.center))
+        mesh = fit_to_budget(mesh, mat_mgr)
+        counts.update(verts=mesh.num_verts, faces=len(mesh))
     
-    for _, pts, color in screen_polys:
-        draw.polygon(pts, fill=color, outline=(255,255,255))
-        
-    prev_path = os.path.join(OUTPUT_DIR, "preview_scene.png")
-    img.save(prev_path)
-    print(f"Saved {prev_path}")
+    # 5. Export Hardware Files
+    with stage("export") as counts:
+        counts['rows'] = write_outputs(mesh, mat_mgr, atlas_img)
+        counts['texels'] = atlas_img.width * atlas_img.height
+    
+    # 6. Preview
+    with stage("preview") as counts:
+        generate_preview(mesh, mat_mgr, atlas_img)
+        counts['faces'] = len(mesh)
 
 # ==============================================================================
 # MAIN
 # ==============================================================================
-if __name__ == "__main__":
+def output_config():
+    """Every constant the outputs depend on (some also through the parse key)."""
+    return {'INPUT_DIR': INPUT_DIR, 'OBJ_FILENAME': OBJ_FILENAME,
+            'SCALE': SCALE, 'ROTATION': ROTATION, 'FLIP_CULLING': FLIP_CULLING,
+            'MAX_BRAM_LINES': MAX_BRAM_LINES, 'INDEXED_EXPORT': INDEXED_EXPORT,
+            'DECIMATE': DECIMATE, 'DECIMATE_FACES': DECIMATE_FACES,
+            'TEXTURE_SIZE': TEXTURE_SIZE, 'ATLAS_GUTTER': ATLAS_GUTTER,
+            'PALETTE_COLORS': PALETTE_COLORS, 'PALETTE_METHOD': PALETTE_METHOD,
+            'MIPMAP': MIPMAP, 'MIP_FILTER': MIP_FILTER,
+            'PREVIEW_DEPTH_BITS': PREVIEW_DEPTH_BITS, 'PREVIEW_CULL_BACKFACES': PREVIEW_CULL_BACKFACES,
+            'mvp_matrix': mvp_matrix.tolist()}
+
+def main():
     # Create output dir
     if not os.path.exists(OUTPUT_DIR):
         os.makedirs(OUTPUT_DIR)
@@ -328,23 +358,38 @@ if __name__ == "__main__":
         
     # 1. Setup Material Manager
     mat_mgr = MaterialManager()
+
+    if not USE_CACHE:
+        build_outputs(path_to_obj, mat_mgr)
+    else:
+        # Material colors come from the PNGs, so they are part of the parse key.
+        # Transform-only changes (SCALE, ROTATION) reuse the parsed mesh.
+        png_paths = sorted(glob.glob(os.path.join(INPUT_DIR, "*.png")))
+        parse_key = make_key("starwing-parse", [path_to_obj] + png_paths,
+                             {'FLIP_CULLING': FLIP_CULLING})
+        output_key = make_key("starwing-outputs", [__file__], output_config(),
+                              [parse_key])
+        output_paths = [os.path.join(OUTPUT_DIR, name) for name in
+                        ("preview_texture.png", "texture.mem", "vertex_data.mem", "preview_scene.png")]
+        if INDEXED_EXPORT:
+            output_paths.append(os.path.join(OUTPUT_DIR, "index_data.mem"))
+        if PALETTE_COLORS is not None:
+            output_paths += [os.path.join(OUTPUT_DIR, name) for name in
+                             ("texture_index.mem", "texture_palette.mem")]
+        if MIPMAP:
+            output_paths.append(os.path.join(OUTPUT_DIR, "texture_mips.mem"))
+
+        with stage("outputs") as counts:
+            counts['cache_hit'] = int(cached_outputs(output_key, output_paths,
+                                                     lambda: build_outputs(path_to_obj, mat_mgr, parse_key)))
+        if counts['cache_hit']:
+            print("Inputs unchanged: restored outputs from cache.")
+        evict()
     
-    # 2. Parse OBJ (Builds material list dynamically)
-    raw_verts, raw_faces = parse_obj(path_to_obj, mat_mgr)
-    print(f"Loaded {len(raw_verts)} vertices, {len(raw_faces)} faces.")
-    
-    # 3. Generate Atlas
-    print(f"Found {len(mat_mgr.materials)} unique materials.")
-    atlas_img = mat_mgr.generate_atlas()
-    atlas_img.save(os.path.join(OUTPUT_DIR, "preview_texture.png"))
-    
-    # 4. Transform Geometry
-    final_verts = process_geometry(raw_verts, ROTATION, SCALE)
-    
-    # 5. Export Hardware Files
-    write_outputs(final_verts, raw_faces, mat_mgr, atlas_img)
-    
-    # 6. Preview
-    generate_preview(final_verts, raw_faces, mat_mgr, atlas_img)
-    
-    print("--- Done ---")
\ No newline at end of file
+    print("--- Done ---")
+
+
+if __name__ == "__main__":
+    with session(sys.argv[1:]) as options:
+        USE_CACHE = USE_CACHE and not options['no_cache']
+        main()